@@ -2,6 +2,17 @@ from .moysklad import MoySklad
 from .wb import WB
 from .ym import YaMarket
 from .ozon import Ozon
+from .moysklad_async import AsyncMoySklad
+from .wb_async import AsyncWB
+from .ym_async import AsyncYaMarket
+from .ozon_async import AsyncOzon
+from .ozon_lookup import OzonProductLookup
+from .ozon_tariffs import OzonTariffSnapshot
+from .wb_orders import WbOrderStore
+from .wb_stocks import WbStocksReport, WbSizesStocks
+from .wb_cards import AsyncWbCards
+from .wb_warehouses import WbWarehouseDirectory
+from .wb_tariffs import WbLogisticsTariffs
 from .tabstyle import TabStyles, ExcelStyle
 from .utils import get_api_keys, format_date, date_to_utc, dict_to_json_file
 from .desired_prices import (get_ym_desired_prices, get_ym_profitability, get_oz_desired_prices, get_oz_profitability,
@@ -1,16 +1,81 @@
 import logging
 import requests
 import time
+from requests.adapters import HTTPAdapter
+from market_api_app import fastjson
+from market_api_app.circuit import circuit_breakers, OPEN
+from market_api_app.http_cache import HttpCache
+from market_api_app.ratelimit import rate_limiter
+from market_api_app.retry import RetryPolicy
+from market_api_app.singleflight import single_flight
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('API')
 
 
 class ApiBase:
-    def __init__(self, max_retries: int = 3, delay_seconds: int = 10):
+    # Общий для всех клиентов ограничитель запросов по хосту и токену
+    rate_limiter = rate_limiter
+    # Общее для всех клиентов объединение одинаковых запросов
+    single_flight = single_flight
+    # Общие для всех клиентов предохранители по хосту и методу API
+    circuit_breakers = circuit_breakers
+
+    def __init__(self, max_retries: int = 3, delay_seconds: int = 10, pool_connections: int = 4,
+                 pool_maxsize: int = 10, keep_alive: bool = True, timeout: tuple = (10, 120),
+                 retry_policy: RetryPolicy = None, cache_dir: str | None = None, coalesce_ttl: float = 60.0):
+        """
+        :param delay_seconds: Максимальная задержка между повторами запроса
+        :param pool_connections: Количество хостов, для которых хранится пул соединений
+        :param pool_maxsize: Максимальное количество соединений в пуле одного хоста
+        :param keep_alive: Держать соединения открытыми между запросами
+        :param timeout: Таймауты соединения и чтения ответа, секунды
+        :param retry_policy: Политика повторов, по умолчанию RetryPolicy(max_retries, delay_seconds)
+        :param cache_dir: Каталог кэша ответов с ETag / Last-Modified, None - без кэша. Тела ответов сохраняются
+                          на диск, включая ответы с токеном, поэтому кэш включается явно для клиента
+        :param coalesce_ttl: Сколько секунд повторно отдавать результат одинакового запроса, 0 - не объединять запросы
+        """
         self.headers = {'Content-Type': 'application/json'}
-        self.max_retries = max_retries
-        self.delay_seconds = delay_seconds
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=max_retries, max_delay=delay_seconds)
+        self.timeout = timeout
+        self.http_cache = HttpCache(cache_dir) if cache_dir else None
+        self.coalesce_ttl = coalesce_ttl
+        self.session = self.create_session(pool_connections, pool_maxsize, keep_alive)
+
+    @property
+    def max_retries(self) -> int:
+        return self.retry_policy.max_retries
+
+    @max_retries.setter
+    def max_retries(self, value: int):
+        self.retry_policy.max_retries = value
+
+    @property
+    def delay_seconds(self) -> float:
+        return self.retry_policy.max_delay
+
+    @delay_seconds.setter
+    def delay_seconds(self, value: float):
+        self.retry_policy.max_delay = value
+
+    @staticmethod
+    def create_session(pool_connections: int = 4, pool_maxsize: int = 10, keep_alive: bool = True) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     @staticmethod
     def raise_for_status_(response):
@@ -19,44 +84,152 @@ class ApiBase:
             return
         response.raise_for_status()
 
-    def handle_request_errors(self, func, *args, **kwargs):
-        for attempt in range(self.max_retries):
+    @staticmethod
+    def decode(response, schema=None):
+        """
+        Разбор тела ответа быстрым декодером (orjson / msgspec, если установлены).
+        Каждый вызов разбирает тело заново: при объединении запросов ответ общий, а изменяемые dict/list -
+        у каждого вызывающего свои.
+        :param schema: Структура из market_api_app.schemas, None - обычные dict/list
+        """
+        return fastjson.loads(response.content) if schema is None else fastjson.decode(response.content, schema)
+
+    def is_available(self, url: str) -> bool:
+        """
+        False, если предохранитель метода url открыт после серии отказов.
+        Для url без пути (например, self.host) - если открыт любой предохранитель хоста.
+        """
+        return not self.circuit_breakers.is_open(url)
+
+    def handle_request_errors(self, func, url, *args, retry_policy: RetryPolicy | None = None, **kwargs):
+        """:param retry_policy: Политика повторов только этого запроса вместо self.retry_policy"""
+        policy = retry_policy or self.retry_policy
+        deadline_at = policy.start()
+        breaker = self.circuit_breakers.get(url)
+        for attempt in range(policy.max_retries):
+            if not breaker.allow():
+                logger.error(f'Метод недоступен после серии отказов, запрос пропущен '
+                             f'(повторная проверка через {breaker.retry_in:.0f} секунд). URL: {url}')
+                return None
             try:
-                response = func(*args, **kwargs)
+                self.rate_limiter.acquire(url, kwargs.get('headers') or self.headers)
+                response = func(url, *args, **kwargs)
+                self.rate_limiter.update(url, kwargs.get('headers') or self.headers, response)
+                breaker.record(response.status_code)
                 self.raise_for_status_(response)
                 return response
-            except requests.RequestException as e:
-                if attempt < self.max_retries - 1:
-                    logger.debug(e.response.text)
-                    delay_seconds = int(e.response.headers.get('X-Ratelimit-Retry', self.delay_seconds))
-                    logger.error(f'Неудачный запрос, ошибка: {e}. Повтор через {delay_seconds} секунд.')
-                    time.sleep(delay_seconds)
+            except (requests.HTTPError, requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                response = e.response
+                if response is not None:
+                    logger.debug(response.text)
                 else:
+                    breaker.record(None)
+                if not policy.is_retryable(response.status_code if response is not None else None):
+                    logger.error(f'Неудачный запрос, ошибка: {e}. Повтор не имеет смысла.')
+                    return None
+                if attempt == policy.max_retries - 1:
                     logger.error(
-                        f'Достигнуто максимальное количество попыток ({self.max_retries}). '
+                        f'Достигнуто максимальное количество попыток ({policy.max_retries}). '
                         f'Прекращение повторных запросов.')
+                    return None
+                if breaker.state == OPEN:
+                    logger.error(f'Неудачный запрос, ошибка: {e}. Метод отключен после серии отказов.')
+                    return None
+                delay_seconds = policy.get_delay(attempt, response)
+                if not policy.fits_deadline(deadline_at, delay_seconds):
+                    logger.error(f'Неудачный запрос, ошибка: {e}. Исчерпан бюджет времени ({policy.deadline} секунд).')
+                    return None
+                logger.error(f'Неудачный запрос, ошибка: {e}. Повтор через {delay_seconds:.1f} секунд.')
+                time.sleep(delay_seconds)
+            except requests.RequestException as e:
+                # Ошибка не связана с доступностью API, пробный запрос предохранителя считается завершенным
+                breaker.record_success()
+                logger.error(f'Неудачный запрос, ошибка: {e}. Повтор не имеет смысла.')
+                return None
         return None
 
-    def get(self, url, params=None):
-        return self.handle_request_errors(self._get, url, params=params)
+    def cached_request(self, func, url, headers=None, **kwargs):
+        """
+        Условный запрос: при наличии сохраненного ответа отправляет If-None-Match / If-Modified-Since
+        и при ответе 304 возвращает сохраненное тело без повторной загрузки.
+        """
+        headers = headers or self.headers
+        key = self.http_cache.get_key(func.__name__.strip('_').upper(), url, headers, kwargs.get('params'), kwargs.get('json'))
+        entry = self.http_cache.load(key)
+        conditional_headers = {**headers, **self.http_cache.conditional_headers(entry)}
+        response = self.handle_request_errors(func, url, headers=conditional_headers, **kwargs)
+        if response is None:
+            return None
+        if response.status_code == 304 and not entry:
+            # Сохраненного тела нет (файл кэша удален), ответ 304 пустой - запрос повторяется без условных заголовков
+            logger.warning(f'Ответ 304 без сохраненного ответа, повтор без условных заголовков. URL: {url}')
+            response = self.handle_request_errors(func, url, headers=headers, **kwargs)
+            if response is None or response.status_code == 304:
+                return None
+        if response.status_code == 304:
+            logger.debug(f'Ответ не изменился, используется кэш. URL: {url}')
+            self.http_cache.touch(key, entry)
+            cached = requests.Response()
+            cached.status_code = 200
+            cached.url = response.url
+            cached.headers['Content-Type'] = entry['content_type']
+            cached.encoding = 'utf-8'
+            cached._content = entry['content']
+            return cached
+        if response:
+            self.http_cache.store(key, response.url, response.headers, response.content)
+        return response
+
+    def request(self, func, url, cache: bool = False, coalesce: bool = False, mutating: bool = False, **kwargs):
+        """
+        :param cache: Условный запрос с кэшем ETag / Last-Modified
+        :param coalesce: Объединять одинаковые запросы (только для чтения и без изменения во времени)
+        :param mutating: Запрос изменяет данные (PUT, DELETE, создающий POST):
+                         после выполнения сбрасываются сохраненные результаты объединенных запросов
+        :param headers: Заголовки только этого запроса вместо self.headers
+        :param retry_policy: Политика повторов только этого запроса вместо self.retry_policy
+        """
+        if coalesce and self.coalesce_ttl:
+            key = HttpCache.get_key(func.__name__.strip('_').upper(), url, kwargs.get('headers') or self.headers,
+                                    kwargs.get('params'), kwargs.get('json'))
+            return self.single_flight.do(key, lambda: self.send(func, url, cache, **kwargs), self.coalesce_ttl)
+        response = self.send(func, url, cache, **kwargs)
+        if mutating:
+            self.single_flight.clear()
+        return response
+
+    def send(self, func, url, cache: bool = False, **kwargs):
+        if cache and self.http_cache:
+            return self.cached_request(func, url, **kwargs)
+        return self.handle_request_errors(func, url, **kwargs)
+
+    def get(self, url, params=None, cache: bool = False, coalesce: bool = False, headers: dict | None = None,
+            retry_policy: RetryPolicy | None = None):
+        """:param coalesce: True только для справочников: ответ повторно отдается всем вызовам в течение coalesce_ttl"""
+        return self.request(self._get, url, cache, coalesce, params=params, headers=headers, retry_policy=retry_policy)
 
-    def post(self, url, data):
-        return self.handle_request_errors(self._post, url, json=data)
+    def post(self, url, data, cache: bool = False, coalesce: bool = False, mutating: bool = False):
+        """
+        :param coalesce: True для запросов чтения через POST (списки, расчет тарифов)
+        :param mutating: True для POST, создающих документы: сбрасывает объединенные ответы
+        """
+        return self.request(self._post, url, cache, coalesce, mutating, json=data)
 
     def put(self, url, data):
-        return self.handle_request_errors(self._put, url, json=data)
+        return self.request(self._put, url, mutating=True, json=data)
 
     def delete(self, url):
-        return self.handle_request_errors(self._delete, url)
+        return self.request(self._delete, url, mutating=True)
 
-    def _get(self, url, params=None):
-        return requests.get(url, headers=self.headers, params=params)
+    def _get(self, url, params=None, headers=None):
+        return self.session.get(url, headers=headers or self.headers, params=params, timeout=self.timeout)
 
-    def _post(self, url, json):
-        return requests.post(url, headers=self.headers, json=json)
+    def _post(self, url, json, headers=None):
+        return self.session.post(url, headers=headers or self.headers, json=json, timeout=self.timeout)
 
     def _put(self, url, json):
-        return requests.put(url, headers=self.headers, json=json)
+        return self.session.put(url, headers=self.headers, json=json, timeout=self.timeout)
 
     def _delete(self, url):
-        return requests.delete(url, headers=self.headers)
+        return self.session.delete(url, headers=self.headers, timeout=self.timeout)
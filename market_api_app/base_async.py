@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import aiohttp
+from market_api_app.base import ApiBase
+from market_api_app.circuit import circuit_breakers, OPEN
+from market_api_app.http_cache import HttpCache
+from market_api_app.ratelimit import rate_limiter
+from market_api_app.retry import RetryPolicy
+from market_api_app.singleflight import single_flight
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('API ASYNC')
+
+
+class AsyncResponse:
+    """
+    Прочитанный ответ aiohttp с интерфейсом requests.Response: status_code, url, headers, content, text, json().
+    Как и requests.Response, приводится к False при статусе 4xx/5xx.
+    """
+
+    def __init__(self, status_code: int, url: str, headers, content: bytes):
+        self.status_code = status_code
+        self.url = url
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def __bool__(self):
+        return self.ok
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return ApiBase.decode(self)
+
+
+class AsyncApiBase:
+    # Общий для всех клиентов ограничитель запросов по хосту и токену
+    rate_limiter = rate_limiter
+    # Общее для всех клиентов объединение одинаковых запросов
+    single_flight = single_flight
+    # Общие для всех клиентов предохранители по хосту и методу API
+    circuit_breakers = circuit_breakers
+
+    def __init__(self, max_retries: int = 3, delay_seconds: int = 10, limit: int = 10, limit_per_host: int = 0,
+                 keep_alive: bool = True, timeout: tuple = (10, 120), retry_policy: RetryPolicy = None,
+                 cache_dir: str | None = None, coalesce_ttl: float = 60.0, dns_cache_ttl: int | None = 300):
+        """
+        :param delay_seconds: Максимальная задержка между повторами запроса
+        :param limit: Максимальное количество одновременных соединений
+        :param limit_per_host: Максимальное количество соединений на один хост, 0 - без ограничения
+        :param keep_alive: Держать соединения открытыми между запросами
+        :param timeout: Таймауты соединения и чтения ответа, секунды
+        :param retry_policy: Политика повторов, по умолчанию RetryPolicy(max_retries, delay_seconds)
+        :param cache_dir: Каталог кэша ответов с ETag / Last-Modified, None - без кэша. Тела ответов сохраняются
+                          на диск, включая ответы с токеном, поэтому кэш включается явно для клиента
+        :param coalesce_ttl: Сколько секунд повторно отдавать результат одинакового запроса, 0 - не объединять запросы
+        :param dns_cache_ttl: Сколько секунд хранить разрешенные адреса хостов, None - без кэша DNS
+        """
+        self.headers = {'Content-Type': 'application/json'}
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=max_retries, max_delay=delay_seconds)
+        self.timeout = timeout
+        self.http_cache = HttpCache(cache_dir) if cache_dir else None
+        self.coalesce_ttl = coalesce_ttl
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keep_alive = keep_alive
+        self.dns_cache_ttl = dns_cache_ttl
+        self._session = None
+
+    max_retries = ApiBase.max_retries
+    delay_seconds = ApiBase.delay_seconds
+    decode = staticmethod(ApiBase.decode)
+    is_available = ApiBase.is_available
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # Сессия создается при первом запросе, так как требует запущенного цикла событий
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             force_close=not self.keep_alive,
+                                             use_dns_cache=self.dns_cache_ttl is not None,
+                                             ttl_dns_cache=self.dns_cache_ttl)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.timeout[0], sock_read=self.timeout[1])
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def handle_request_errors(self, method: str, url: str, **kwargs) -> AsyncResponse | None:
+        policy = self.retry_policy
+        deadline_at = policy.start()
+        breaker = self.circuit_breakers.get(url)
+        for attempt in range(policy.max_retries):
+            if not breaker.allow():
+                logger.error(f'Метод недоступен после серии отказов, запрос пропущен '
+                             f'(повторная проверка через {breaker.retry_in:.0f} секунд). URL: {url}')
+                return None
+            response = None
+            try:
+                await self.rate_limiter.acquire_async(url, self.headers)
+                response = await self._request(method, url, **kwargs)
+                self.rate_limiter.update(url, self.headers, response)
+                breaker.record(response.status_code)
+                if response.status_code == 404:
+                    logger.warning(f"Warning: 404 Error encountered. URL: {response.url}")
+                    return response
+                if response.ok:
+                    return response
+                error = f'{response.status_code} Error for url: {response.url}'
+                logger.debug(response.text)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                breaker.record(None)
+                error = e
+            except aiohttp.ClientError as e:
+                # Ошибка не связана с доступностью API, пробный запрос предохранителя считается завершенным
+                breaker.record_success()
+                logger.error(f'Неудачный запрос, ошибка: {e}. Повтор не имеет смысла.')
+                return None
+            if not policy.is_retryable(response.status_code if response is not None else None):
+                logger.error(f'Неудачный запрос, ошибка: {error}. Повтор не имеет смысла.')
+                return None
+            if attempt == policy.max_retries - 1:
+                logger.error(
+                    f'Достигнуто максимальное количество попыток ({policy.max_retries}). '
+                    f'Прекращение повторных запросов.')
+                return None
+            if breaker.state == OPEN:
+                logger.error(f'Неудачный запрос, ошибка: {error}. Метод отключен после серии отказов.')
+                return None
+            delay_seconds = policy.get_delay(attempt, response)
+            if not policy.fits_deadline(deadline_at, delay_seconds):
+                logger.error(f'Неудачный запрос, ошибка: {error}. Исчерпан бюджет времени ({policy.deadline} секунд).')
+                return None
+            logger.error(f'Неудачный запрос, ошибка: {error}. Повтор через {delay_seconds:.1f} секунд.')
+            await asyncio.sleep(delay_seconds)
+        return None
+
+    async def cached_request(self, method: str, url: str, **kwargs) -> AsyncResponse | None:
+        key = self.http_cache.get_key(method, url, self.headers, kwargs.get('params'), kwargs.get('json'))
+        entry = self.http_cache.load(key)
+        headers = {**self.headers, **self.http_cache.conditional_headers(entry)}
+        response = await self.handle_request_errors(method, url, headers=headers, **kwargs)
+        if response is None:
+            return None
+        if response.status_code == 304 and not entry:
+            # Сохраненного тела нет (файл кэша удален), ответ 304 пустой - запрос повторяется без условных заголовков
+            logger.warning(f'Ответ 304 без сохраненного ответа, повтор без условных заголовков. URL: {url}')
+            response = await self.handle_request_errors(method, url, headers=self.headers, **kwargs)
+            if response is None or response.status_code == 304:
+                return None
+        if response.status_code == 304:
+            logger.debug(f'Ответ не изменился, используется кэш. URL: {url}')
+            self.http_cache.touch(key, entry)
+            return AsyncResponse(200, response.url, {'Content-Type': entry['content_type']}, entry['content'])
+        if response:
+            self.http_cache.store(key, response.url, response.headers, response.content)
+        return response
+
+    async def request(self, method: str, url: str, cache: bool = False, coalesce: bool = False,
+                      mutating: bool = False, **kwargs):
+        """
+        :param cache: Условный запрос с кэшем ETag / Last-Modified
+        :param coalesce: Объединять одинаковые запросы (только для чтения и без изменения во времени)
+        :param mutating: Запрос изменяет данные (PUT, DELETE, создающий POST):
+                         после выполнения сбрасываются сохраненные результаты объединенных запросов
+        """
+        if coalesce and self.coalesce_ttl:
+            # Ключ отличается от синхронного клиента: результат имеет другой тип (AsyncResponse)
+            key = 'async:' + HttpCache.get_key(method, url, self.headers, kwargs.get('params'), kwargs.get('json'))
+            return await self.single_flight.do_async(key, lambda: self.send(method, url, cache, **kwargs),
+                                                     self.coalesce_ttl)
+        response = await self.send(method, url, cache, **kwargs)
+        if mutating:
+            self.single_flight.clear()
+        return response
+
+    async def send(self, method: str, url: str, cache: bool = False, **kwargs):
+        if cache and self.http_cache:
+            return await self.cached_request(method, url, **kwargs)
+        return await self.handle_request_errors(method, url, **kwargs)
+
+    async def get(self, url, params=None, cache: bool = False, coalesce: bool = False):
+        """:param coalesce: True только для справочников: ответ повторно отдается всем вызовам в течение coalesce_ttl"""
+        return await self.request('GET', url, cache, coalesce, params=params)
+
+    async def post(self, url, data, cache: bool = False, coalesce: bool = False, mutating: bool = False):
+        """
+        :param coalesce: True для запросов чтения через POST (списки, расчет тарифов)
+        :param mutating: True для POST, создающих документы: сбрасывает объединенные ответы
+        """
+        return await self.request('POST', url, cache, coalesce, mutating, json=data)
+
+    async def put(self, url, data):
+        return await self.request('PUT', url, mutating=True, json=data)
+
+    async def delete(self, url):
+        return await self.request('DELETE', url, mutating=True)
+
+    async def _request(self, method: str, url: str, params=None, json=None, headers=None) -> AsyncResponse:
+        if params:
+            # aiohttp не принимает bool и None в параметрах запроса, приводим к виду requests
+            params = {key: str(value) if isinstance(value, bool) else value
+                      for key, value in params.items() if value is not None}
+        async with self.session.request(method, url, headers=headers or self.headers, params=params,
+                                        json=json) as response:
+            content = await response.read()
+            return AsyncResponse(response.status, str(response.url), response.headers, content)
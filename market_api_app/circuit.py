@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('Circuit')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Предохранитель одного метода API (хост + путь).
+    После failure_threshold неудачных попыток подряд запросы не выполняются reset_timeout секунд,
+    затем пропускается один пробный запрос: успех закрывает предохранитель, неудача открывает заново.
+    Неудачей считаются ошибки соединения, таймауты и ответы 5xx.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = CLOSED
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    @property
+    def retry_in(self) -> float:
+        """Сколько секунд осталось до пробного запроса"""
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            now = time.monotonic()
+            # Пробный запрос, остальные вызовы отклоняются до его результата.
+            # Если результат пробы так и не пришел (запрос отменен), через reset_timeout пропускается новая проба
+            if now - self.opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self.opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._state = OPEN
+                self.opened_at = time.monotonic()
+
+    def record(self, status_code: int | None):
+        """Учитывает результат попытки: None - ошибка соединения или таймаут"""
+        if status_code is None or status_code >= 500:
+            self.record_failure()
+        else:
+            self.record_success()
+
+
+class CircuitBreakers:
+    """Общий для процесса набор предохранителей по хосту и пути запроса"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(url: str) -> tuple:
+        parts = urlsplit(url)
+        return parts.hostname, parts.path
+
+    def get(self, url: str) -> CircuitBreaker:
+        key = self.get_key(url)
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def states(self, host: str | None = None) -> dict:
+        """Состояние предохранителей {(хост, путь): 'closed' | 'open' | 'half_open'}, host - только для хоста"""
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return {key: breaker.state for key, breaker in breakers if host is None or key[0] == host}
+
+    def is_open(self, url: str) -> bool:
+        """Открыт ли предохранитель метода url, а для url без пути - любой предохранитель хоста"""
+        host, path = self.get_key(url)
+        if path.strip('/'):
+            return self.get(url).state == OPEN
+        return any(state == OPEN for state in self.states(host).values())
+
+    def reset(self):
+        with self._lock:
+            self._breakers.clear()
+
+
+circuit_breakers = CircuitBreakers()
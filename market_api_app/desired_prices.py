@@ -1,15 +1,18 @@
 import pandas as pd
 from market_api_app import MoySklad, YaMarket, Ozon, WB, ExcelStyle, get_api_keys
-from market_api_app.utils import add_regions_sum_immutable, JSONStorage
+from market_api_app.utils import add_regions_sum_immutable, JSONStorage, get_current_datetime
 from market_api_app.utils_gs import get_table, get_column_values_by_index
 from market_api_app.utils_ms import get_stock_for_bundle, get_prime_cost, get_ms_products, get_ms_products_for_wb, \
     get_stocks_wh, get_cards_prices, get_stocks_wh_full
 from market_api_app.utils_ozon import get_oz_orders, get_oz_data_for_order, print_oz_constants, \
-                                       get_oz_data_for_article, get_logistic_msk_ekb
+                                       get_oz_data_for_article
+from market_api_app.ozon_tariffs import OzonTariffSnapshot, OZON_TARIFFS_MAX_AGE_HOURS
 from market_api_app.utils_wb import get_logistic_dict, get_price_dict, get_category_dict, get_wb_data_for_article, \
-    wb_get_orders, get_order_data, get_category_subject_id_dict
+    get_category_subject_id_dict, wb_get_orders_frame, get_orders_report_frame
 from market_api_app.utils_ya import get_category_ids, chunked_offers_list, get_dict_for_commission, \
     get_ya_data_for_article, get_ym_orders, get_ya_data_for_order, get_prices_dict
+from market_api_app.wb_orders import WbOrderStore
+from market_api_app.wb_stocks import WbSizesStocks
 
 '''
 Использовать в Colab в виде:
@@ -231,38 +234,18 @@ def get_ym_profitability(from_date: str, to_date: str, plan_margin: float = 28.0
     return path_xls_file
 
 
-def get_oz_desired_prices(plan_margin: float = 28.0, price_cost_name: str = "Цена продажи"):
+def get_oz_desired_prices(plan_margin: float = 28.0, price_cost_name: str = "Цена продажи",
+                          tariffs_max_age_hours: int = OZON_TARIFFS_MAX_AGE_HOURS):
     ms_token, oz_client_id, oz_token = get_api_keys(["MS_API_TOKEN", "OZ_CLIENT_ID", "OZ_API_TOKEN"])
 
     ms_client = MoySklad(ms_token)
     ms_products = get_ms_products(ms_client, project='Озон', price_cost_name=price_cost_name)
 
     oz_client = Ozon(client_id=oz_client_id, api_key=oz_token)
-    products = oz_client.get_products()
-
-    print("Ozon: Получение актуальных тарифов")
+    # Снимок тарифов общий для отчетов Ozon, каталог загружается не чаще раза в tariffs_max_age_hours
+    tariffs = OzonTariffSnapshot.load_or_fetch(oz_client, max_age_hours=tariffs_max_age_hours)
     print_oz_constants()
-    offers_commission_dict = {
-        prod['offer_id']: {
-            'acquiring': prod.get('acquiring', 0),
-            'fbs_deliv_to_customer_amount': prod.get('commissions', {}).get('fbs_deliv_to_customer_amount', 0.0),
-            # 'fbs_direct_flow_trans_max_amount': prod.get('commissions', {}).get('fbs_direct_flow_trans_max_amount', 0),
-            # Применение логистики кластера МСК -ЕКБ
-            'fbs_direct_flow_trans_max_amount': get_logistic_msk_ekb(float(prod.get('price', {}).get('price', '0.0000')), prod.get('volume_weight', 0.0)),
-            'fbs_direct_flow_trans_min_amount': prod.get('commissions', {}).get('fbs_direct_flow_trans_min_amount', 0),
-            'fbs_first_mile_max_amount': prod.get('commissions', {}).get('fbs_first_mile_max_amount', 0),
-            'fbs_first_mile_min_amount': prod.get('commissions', {}).get('fbs_first_mile_min_amount', 0),
-            'fbs_return_flow_amount': prod.get('commissions', {}).get('fbs_return_flow_amount', 0),
-            'fbs_return_flow_trans_max_amount': prod.get('commissions', {}).get('fbs_return_flow_trans_max_amount', 0),
-            'fbs_return_flow_trans_min_amount': prod.get('commissions', {}).get('fbs_return_flow_trans_min_amount', 0),
-            'sales_percent_fbs': prod.get('commissions', {}).get('sales_percent_fbs', 0),
-            'price': float(prod.get('price', {}).get('price', '0.0000')),
-            'marketing_price': float(prod.get('price', {}).get('marketing_price', '0.0000')),
-            'marketing_seller_price': float(prod.get('price', {}).get('marketing_seller_price', '0.0000')),
-            'volume_weight': prod.get('volume_weight', 0.0)
-        }
-        for prod in products
-    }
+    offers_commission_dict = tariffs.get_offers_commission_dict()
 
     oz_set = set(offers_commission_dict)
     ms_set = set(ms_products)
@@ -337,39 +320,18 @@ def get_oz_desired_prices(plan_margin: float = 28.0, price_cost_name: str = "Ц
     return path_xls_file
 
 
-def get_oz_profitability(from_date: str, to_date: str, plan_margin: float = 28.0, price_cost_name: str = "Цена продажи"):
+def get_oz_profitability(from_date: str, to_date: str, plan_margin: float = 28.0, price_cost_name: str = "Цена продажи",
+                         tariffs_max_age_hours: int = OZON_TARIFFS_MAX_AGE_HOURS):
     ms_token, oz_client_id, oz_token = get_api_keys(["MS_API_TOKEN", "OZ_CLIENT_ID", "OZ_API_TOKEN"])
 
     ms_client = MoySklad(ms_token)
     ms_products = get_ms_products(ms_client, project='Озон', price_cost_name=price_cost_name)
 
     oz_client = Ozon(client_id=oz_client_id, api_key=oz_token)
-    products = oz_client.get_products()
-
-    print("Ozon: Получение актуальных тарифов")
+    # Снимок тарифов общий для отчетов Ozon, каталог загружается не чаще раза в tariffs_max_age_hours
+    tariffs = OzonTariffSnapshot.load_or_fetch(oz_client, max_age_hours=tariffs_max_age_hours)
     print_oz_constants()
-    offers_commission_dict = {
-        prod['offer_id']: {
-            'acquiring': prod.get('acquiring', 0),
-            'fbs_deliv_to_customer_amount': prod.get('commissions', {}).get('fbs_deliv_to_customer_amount', 0.0),
-            # 'fbs_direct_flow_trans_max_amount': prod.get('commissions', {}).get('fbs_direct_flow_trans_max_amount', 0),
-            # Применение логистики кластера МСК -ЕКБ
-            'fbs_direct_flow_trans_max_amount': get_logistic_msk_ekb(
-                float(prod.get('price', {}).get('price', '0.0000')), prod.get('volume_weight', 0.0)),
-            'fbs_direct_flow_trans_min_amount': prod.get('commissions', {}).get('fbs_direct_flow_trans_min_amount', 0),
-            'fbs_first_mile_max_amount': prod.get('commissions', {}).get('fbs_first_mile_max_amount', 0),
-            'fbs_first_mile_min_amount': prod.get('commissions', {}).get('fbs_first_mile_min_amount', 0),
-            'fbs_return_flow_amount': prod.get('commissions', {}).get('fbs_return_flow_amount', 0),
-            'fbs_return_flow_trans_max_amount': prod.get('commissions', {}).get('fbs_return_flow_trans_max_amount', 0),
-            'fbs_return_flow_trans_min_amount': prod.get('commissions', {}).get('fbs_return_flow_trans_min_amount', 0),
-            'sales_percent_fbs': prod.get('commissions', {}).get('sales_percent_fbs', 0),
-            'price': float(prod.get('price', {}).get('price', '0.0000')),
-            'marketing_price': float(prod.get('price', {}).get('marketing_price', '0.0000')),
-            'marketing_seller_price': float(prod.get('price', {}).get('marketing_seller_price', '0.0000')),
-            'volume_weight': prod.get('volume_weight', 0.0)
-        }
-        for prod in products
-    }
+    offers_commission_dict = tariffs.get_offers_commission_dict()
 
     oz_set = set(offers_commission_dict)
     ms_set = set(ms_products)
@@ -463,11 +425,18 @@ def get_null_nm_id(order_nm_id):
 
 def get_wb_profitability(from_date: str, to_date: str, plan_margin: float = 28.0, acquiring: float = 2.0,
                          one_fbs: bool = False, save_to_gs: bool = False, save_to_tab: bool = False,
-                         file_settings: str = None, table_key: str = None, sheet_out: str = None):
+                         file_settings: str = None, table_key: str = None, sheet_out: str = None,
+                         orders_db: str = None):
+    """
+    :param orders_db: Файл SQLite для локального хранения заказов WB (WbOrderStore), None - запрос по дням
+    """
     ms_token, wb_token = get_api_keys(["MS_API_TOKEN", "WB_API_TOKEN"])
     wb_client = WB(api_key=wb_token)
-    orders_fbs, orders_fbo, nm_ids_fbs, nm_ids_fbo = wb_get_orders(wb_client, from_date, to_date)
-    nm_ids_list = list(nm_ids_fbo) if one_fbs else list(nm_ids_fbs | nm_ids_fbo)
+    orders_store = WbOrderStore(orders_db) if orders_db else None
+    orders = wb_get_orders_frame(wb_client, from_date, to_date, orders_store)
+    # Отмены в отчет не входят, при one_fbs - только FBO. Порядок строк: сначала FBO, затем FBS
+    orders = orders[~orders['isCancel'] & ~(one_fbs & orders['is_fbs'])].sort_values('is_fbs', kind='stable')
+    nm_ids_list = orders['nmId'].unique().tolist()
 
     ms_client = MoySklad(ms_token)
     ms_products_with_stocks = get_ms_products_for_wb(ms_client, one_fbs, nm_ids_list)
@@ -489,28 +458,7 @@ def get_wb_profitability(from_date: str, to_date: str, plan_margin: float = 28.0
         'wb_prices_dict': wb_prices_dict
     }
 
-    if one_fbs:
-        orders_fbs = []
-
-    data_for_report = []
-    not_in_ms = []
-    for orders, is_fbs in [(orders_fbo, False), (orders_fbs, True)]:
-        for order in orders:
-            # Для переопределения значения по умолчанию можно использовать get_null_nm_id(order.get('nmId'))
-            product_dict = ms_products_with_stocks.get(order.get('nmId'), {})
-            if product_dict and order.get('nmId') in nm_ids_list:
-                data_for_report.append(
-                    get_order_data(
-                        order,
-                        product_dict,
-                        base_dict,
-                        plan_margin=plan_margin,
-                        acquiring=acquiring,
-                        fbs=is_fbs
-                    )
-                )
-            else:
-                not_in_ms.append(order.get('nmId'))
+    df, not_in_ms = get_orders_report_frame(orders, ms_products_with_stocks, base_dict, plan_margin, acquiring)
 
     if not_in_ms:
         print('Количество заказов не вошедших в отчет: ', len(not_in_ms))
@@ -521,7 +469,6 @@ def get_wb_profitability(from_date: str, to_date: str, plan_margin: float = 28.0
     print('Формирую отчет "Рентабельность заказов WB"')
     pd.set_option("display.max_columns", None)
     pd.set_option("display.max_rows", None)
-    df = pd.DataFrame(data_for_report)
     df_total = (
         df.agg(
             {
@@ -915,30 +862,25 @@ def update_stocks_in_tabs_v2(file_settings: str, table_key: str, sheet_in: str,
     print(f"Данные успешно сохранены на лист в таблице '{wb_table}'.")
 
 
-def update_stocks_in_tabs_v3(file_settings: str, table_key: str, sheet_in: str, sheet_out: str):
-    # wb_table = get_table(file_settings, table_key)
-    ms_token, wb_token = get_api_keys(["MS_API_TOKEN", "WB_API_TOKEN"])
-    ms_client = MoySklad(api_key=ms_token)
+def update_stocks_in_tabs_v3(file_settings: str, table_key: str, sheet_in: str, sheet_out: str,
+                             from_date: str | None = None, to_date: str | None = None,
+                             checkpoint_path: str | None = 'wb_sizes_stocks.jsonl'):
+    """from_date и to_date в формате 'YYYY-MM-DD', по умолчанию - текущая дата"""
+    to_date = to_date or get_current_datetime('%Y-%m-%d')
+    from_date = from_date or to_date
+    wb_table = get_table(file_settings, table_key)
+    wb_token = get_api_keys(["WB_API_TOKEN"])[0]
     wb_client = WB(api_key=wb_token)
     wb_prices = get_price_dict(wb_client)
     nm_ids = list(wb_prices.keys())
 
-    for nd_id in nm_ids:
-        offices_stocks = wb_client.get_stocks_for_nm_id(nm_id=nd_id, from_date='2025-12-01', to_date='2025-12-01')
-        stock_dict = {}
-        for office in offices_stocks:
-            office_name = 'FBS' if office.get('regionName', '') == 'Маркетплейс' else office.get('officeName', '')
-            # office_id = office.get('officeID', 0)
-            # stock_count = office.get('stockCount', 0)
-            #
-            # office.get('regionName', 'FBO') : office.get('stockCount', 0)
-
-            stock_dict[office_name] = office.get('metrics', {}).get('stockCount', 0)
-
-        wb_prices[nd_id]['stocks'] = stock_dict
-        print(wb_prices[nd_id])
+    stocks = WbSizesStocks(wb_client, checkpoint_path=checkpoint_path).fetch(nm_ids, from_date, to_date)
+    data = WbSizesStocks.to_matrix(stocks)
 
-    print(wb_prices)
+    sheet = wb_table.worksheet(sheet_out)
+    sheet.clear()
+    sheet.update(range_name="A1", values=data)
+    print(f"Данные успешно сохранены на лист в таблице '{wb_table}'.")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,100 @@
+import dataclasses
+import json
+import logging
+import types
+from functools import lru_cache
+from typing import Any, Union, get_args, get_origin, get_type_hints
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('JSON')
+
+
+def loads(content: bytes | str):
+    """Разбор JSON в dict/list: orjson, если установлен, иначе msgspec или стандартный json"""
+    if orjson is not None:
+        return orjson.loads(content)
+    if msgspec is not None:
+        return msgspec.json.decode(content)
+    return json.loads(content)
+
+
+@lru_cache(maxsize=None)
+def _get_decoder(schema):
+    # strict=False: числа, переданные строкой ("1234.0000"), приводятся к объявленному типу
+    return msgspec.json.Decoder(schema, strict=False)
+
+
+def decode(content: bytes | str, schema):
+    """
+    Разбор JSON в объявленную структуру schema (dataclass из market_api_app.schemas).
+    С msgspec декодируются только объявленные поля, без промежуточных dict.
+    Без msgspec структура собирается из результата loads().
+    """
+    if msgspec is not None:
+        return _get_decoder(schema).decode(content)
+    return from_dict(schema, loads(content))
+
+
+@lru_cache(maxsize=None)
+def _get_fields(schema) -> tuple:
+    hints = get_type_hints(schema)
+    return tuple((field.name, hints[field.name]) for field in dataclasses.fields(schema))
+
+
+def _unwrap_optional(schema):
+    """X | None -> X, остальные типы без изменений"""
+    if get_origin(schema) in (Union, types.UnionType):
+        args = [arg for arg in get_args(schema) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return schema
+
+
+def _coerce_scalar(schema, value):
+    """Приведение как у msgspec с strict=False: числа строкой ("1234.0000") допускаются, дробное в int - ошибка"""
+    if schema is str:
+        if not isinstance(value, str):
+            raise ValueError(f'Expected `str`, got `{type(value).__name__}`')
+        return value
+    number = float(value)
+    if schema is int:
+        if not number.is_integer():
+            raise ValueError(f'Expected `int`, got `{value!r}`')
+        return int(number)
+    return number
+
+
+def from_dict(schema, value):
+    """
+    Сборка структуры schema из уже разобранного JSON, лишние поля отбрасываются.
+    Результат совпадает с decode() через msgspec: null допускается только в полях X | None и передается
+    в конструктор структуры, несовместимые значения вызывают ValueError.
+    """
+    if value is None:
+        if schema is Any or type(None) in get_args(schema):
+            return None
+        raise ValueError(f'Expected `{getattr(schema, "__name__", schema)}`, got `null`')
+    schema = _unwrap_optional(schema)
+    if dataclasses.is_dataclass(schema):
+        if not isinstance(value, dict):
+            raise ValueError(f'Expected `object`, got `{type(value).__name__}`')
+        return schema(**{name: from_dict(field_type, value[name])
+                         for name, field_type in _get_fields(schema) if name in value})
+    if get_origin(schema) is list:
+        item_schema, = get_args(schema)
+        if not isinstance(value, list):
+            raise ValueError(f'Expected `array`, got `{type(value).__name__}`')
+        return [from_dict(item_schema, item) for item in value]
+    if schema in (int, float, str):
+        return _coerce_scalar(schema, value)
+    return value
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('HTTP Cache')
+
+
+class HttpCache:
+    """
+    Дисковый кэш ответов с валидаторами ETag / Last-Modified.
+    Для каждого запроса хранится тело ответа (<key>.body) и метаданные (<key>.json).
+    Повторный запрос отправляется с If-None-Match / If-Modified-Since, при ответе 304 используется сохраненное тело.
+    """
+
+    def __init__(self, directory: str = '.http_cache'):
+        self.directory = directory
+
+    @staticmethod
+    def get_key(method: str, url: str, headers: dict, params=None, json_data=None) -> str:
+        # Заголовки входят в ключ, чтобы ответы разных кабинетов не смешивались
+        raw = json.dumps([method, url, params, json_data, sorted(headers.items())], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, f'{key}.{suffix}')
+
+    def load(self, key: str) -> dict | None:
+        try:
+            with open(self._path(key, 'json'), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(self._path(key, 'body'), 'rb') as f:
+                entry['content'] = f.read()
+            return entry
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def store(self, key: str, url: str, headers, content: bytes) -> bool:
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return False
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_type': headers.get('Content-Type', 'application/json'),
+            'stored_at': time.time(),
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(key, 'body'), 'wb') as f:
+                f.write(content)
+            with open(self._path(key, 'json'), 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            return True
+        except OSError as e:
+            logger.warning(f'Не удалось сохранить ответ в кэш: {e}')
+            return False
+
+    def touch(self, key: str, entry: dict):
+        """Обновляет время проверки записи после ответа 304"""
+        meta = {k: v for k, v in entry.items() if k != 'content'}
+        meta['stored_at'] = time.time()
+        try:
+            with open(self._path(key, 'json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f'Не удалось обновить запись кэша: {e}')
+
+    @staticmethod
+    def conditional_headers(entry: dict | None) -> dict:
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
@@ -1,53 +1,113 @@
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from market_api_app.base import ApiBase
+from market_api_app.schemas import MsBundlesPage
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('MoySklad')
 
+MAX_PARALLEL_REQUESTS = 5  # Не более 5 параллельных запросов от одного пользователя по ограничениям МойСклад
+
 
 class MoySklad(ApiBase):
-    def __init__(self, api_key: str):
-        super().__init__()
+    def __init__(self, api_key: str, **kwargs):
+        super().__init__(**kwargs)
         self.headers = {'Accept-Encoding': 'gzip', 'Authorization': api_key, 'Content-Type': 'application/json'}
         self.host = 'https://api.moysklad.ru/api/remap/1.2/'
 
-    def fetch_data(self, url, params):
-        items = []
+    def fetch_data(self, url, params, parallel: bool = False, max_workers: int = MAX_PARALLEL_REQUESTS, schema=None):
+        return [row for rows in self.iter_data(url, params, parallel, max_workers, schema) for row in rows]
+
+    def iter_data(self, url, params, parallel: bool = False, max_workers: int = MAX_PARALLEL_REQUESTS, schema=None):
+        """
+        Постраничная выборка: возвращает строки каждой страницы по мере получения.
+        :param schema: Структура страницы из market_api_app.schemas (rows, meta.size), None - строки в виде dict
+        """
+        if parallel:
+            yield from self.iter_data_parallel(url, params, max_workers, schema)
+            return
         while True:
             result = self.get(url, params)
             if result:
-                response_json = result.json()
-                items += response_json.get('rows', [])
+                rows, size = self.decode_page(result, schema)
+                yield rows
                 params['offset'] += params['limit']
-                if response_json.get('meta', {}).get('size', 0) < params['offset']:
+                if size < params['offset']:
                     break
             else:
                 break
-        return items
+
+    def fetch_data_parallel(self, url, params, max_workers: int = MAX_PARALLEL_REQUESTS, schema=None):
+        return [row for rows in self.iter_data_parallel(url, params, max_workers, schema) for row in rows]
+
+    def iter_data_parallel(self, url, params, max_workers: int = MAX_PARALLEL_REQUESTS, schema=None):
+        """
+        Первая страница запрашивается последовательно для получения meta.size,
+        остальные смещения - параллельно, не более MAX_PARALLEL_REQUESTS запросов одновременно.
+        Страницы возвращаются в порядке смещений, вперед запрашивается не больше max_workers страниц.
+        Если страница не получена и после повторов, выборка прерывается исключением, чтобы отчеты
+        не строились по неполным данным.
+        """
+        result = self.get(url, params)
+        if not result:
+            return
+        rows, size = self.decode_page(result, schema)
+        yield rows
+        offsets = iter(range(params['offset'] + params['limit'], size, params['limit']))
+
+        def fetch_page(offset):
+            page_result = self.get(url, {**params, 'offset': offset})
+            if not page_result:
+                raise RuntimeError(f'Не удалось получить страницу со смещением {offset}, данные неполные. URL: {url}')
+            return self.decode_page(page_result, schema)[0]
+
+        max_workers = min(max_workers, MAX_PARALLEL_REQUESTS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = deque(executor.submit(fetch_page, offset) for offset in islice(offsets, max_workers))
+            while futures:
+                rows = futures.popleft().result()
+                offset = next(offsets, None)
+                if offset is not None:
+                    futures.append(executor.submit(fetch_page, offset))
+                yield rows
+
+    def decode_page(self, result, schema=None) -> tuple[list, int]:
+        """Строки страницы и общее количество записей meta.size"""
+        if schema is None:
+            response_json = self.decode(result)
+            return response_json.get('rows', []), response_json.get('meta', {}).get('size', 0)
+        page = self.decode(result, schema)
+        return page.rows, page.meta.size
 
     def get_products_list(self):
         url = f'{self.host}entity/product'
         params = {'limit': 1000, 'offset': 0}
-        return self.fetch_data(url, params)
+        return self.fetch_data(url, params, parallel=True)
 
     def update_product(self, product):
         url = f'{self.host}entity/product/{product.get("id")}'
 
         result = self.put(url, data=product)
-        response_json = result.json() if result else []
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось обновить номенклатуру.')
         return response_json
 
-    def get_bundles(self):
+    def get_bundles(self, typed: bool = False):
+        return [row for rows in self.iter_bundles(typed) for row in rows]
+
+    def iter_bundles(self, typed: bool = False):
+        """:param typed: Строки в виде MsBundle (только используемые поля) вместо dict"""
         url = f'{self.host}entity/bundle?expand=components.rows.assortment'
         params = {'limit': 100, 'offset': 0}
-        return self.fetch_data(url, params)
+        return self.iter_data(url, params, parallel=True, schema=MsBundlesPage if typed else None)
 
     def update_bundle(self, bundle):
         url = f'{self.host}entity/bundle/{bundle.get("id")}'
         result = self.put(url, data=bundle)
-        response_json = result.json() if result else []
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось обновить товар.')
         return response_json
@@ -97,7 +157,7 @@ class MoySklad(ApiBase):
     def get_stock_all(self):
         url = f'{self.host}report/stock/all'
         params = {'limit': 1000, 'offset': 0}
-        stocks_list = self.fetch_data(url, params)
+        stocks_list = self.fetch_data(url, params, parallel=True)
         logger.info(f'Получен остаток по номенклатуре: {len(stocks_list)}')
         return stocks_list
 
@@ -106,7 +166,7 @@ class MoySklad(ApiBase):
         # 'include': 'zeroLines' - показать товары с нулевым доступным остатком
         params = {'stockType': 'quantity', 'include': 'zeroLines'}  # по умолчанию params = {'stockType': 'quantity'}
         result = self.get(url, params)
-        response_json = result.json() if result else []
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось получить данные о наличии.')
         return response_json
@@ -116,7 +176,7 @@ class MoySklad(ApiBase):
         # 'include': 'zeroLines' - показать товары с нулевым доступным остатком
         params = {'stockType': 'quantity', 'include': 'zeroLines'}  # по умолчанию params = {'stockType': 'quantity'}
         result = self.get(url, params)
-        response_json = result.json() if result else []
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось получить данные о наличии.')
         return response_json
@@ -126,15 +186,18 @@ class MoySklad(ApiBase):
         # from_date_f = f'{from_date} 00:00:00.000'
         # to_date_f = f'{to_date} 23:59:00.000'
         # filter_str = f'?filter=moment>{from_date};moment<{to_date};&order=name,desc&expand=positions.assortment,state'
+        return [row for rows in self.iter_orders(filter_str) for row in rows]
+
+    def iter_orders(self, filter_str):
         url = f'{self.host}entity/customerorder{filter_str}'
         params = {'limit': 100, 'offset': 0}
-        return self.fetch_data(url, params)
+        return self.iter_data(url, params, parallel=True)
 
     def get_registration(self):
         url = f'{self.host}entity/enter'
         params = {'limit': 1000, 'offset': 0}
         result = self.get(url, params)
-        response_json = result.json() if result else []
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось получить данные о оприходовании.')
         return response_json
@@ -172,8 +235,8 @@ class MoySklad(ApiBase):
             }
         }
 
-        result = self.post(url, data=data)
-        response_json = result.json() if result else []
+        result = self.post(url, data=data, mutating=True)
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось создать Оприходование товара.')
         return response_json
@@ -182,7 +245,7 @@ class MoySklad(ApiBase):
         url = f'{self.host}entity/enter/{registration_id}/positions'
 
         result = self.get(url)
-        response_json = result.json() if result else []
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось получить позиции Оприходования.')
         return response_json
@@ -207,8 +270,8 @@ class MoySklad(ApiBase):
         """
 
         data = positions
-        result = self.post(url, data=data)
-        response_json = result.json() if result else []
+        result = self.post(url, data=data, mutating=True)
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось добавить позиции документа.')
         return response_json
@@ -246,8 +309,8 @@ class MoySklad(ApiBase):
             }
         }
 
-        result = self.post(url, data=data)
-        response_json = result.json() if result else []
+        result = self.post(url, data=data, mutating=True)
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось создать Списание товара.')
         return response_json
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from market_api_app.base_async import AsyncApiBase
+from market_api_app.moysklad import MoySklad, MAX_PARALLEL_REQUESTS
+from market_api_app.schemas import MsBundlesPage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('MoySklad ASYNC')
+
+
+class AsyncMoySklad(AsyncApiBase):
+    def __init__(self, api_key: str, **kwargs):
+        super().__init__(**kwargs)
+        self.headers = {'Accept-Encoding': 'gzip', 'Authorization': api_key, 'Content-Type': 'application/json'}
+        self.host = 'https://api.moysklad.ru/api/remap/1.2/'
+
+    decode_page = MoySklad.decode_page
+
+    async def fetch_data(self, url, params, parallel: bool = False, max_workers: int = MAX_PARALLEL_REQUESTS,
+                         schema=None):
+        if parallel:
+            return await self.fetch_data_parallel(url, params, max_workers, schema)
+        items = []
+        while True:
+            result = await self.get(url, params)
+            if result:
+                rows, size = self.decode_page(result, schema)
+                items += rows
+                params['offset'] += params['limit']
+                if size < params['offset']:
+                    break
+            else:
+                break
+        return items
+
+    async def fetch_data_parallel(self, url, params, max_workers: int = MAX_PARALLEL_REQUESTS, schema=None):
+        result = await self.get(url, params)
+        if not result:
+            return []
+        items, size = self.decode_page(result, schema)
+        semaphore = asyncio.Semaphore(min(max_workers, MAX_PARALLEL_REQUESTS))
+
+        async def fetch_page(offset):
+            async with semaphore:
+                page_result = await self.get(url, {**params, 'offset': offset})
+            if not page_result:
+                # Неполные остатки и цены хуже ошибки: отчет не строится
+                raise RuntimeError(f'Не удалось получить страницу со смещением {offset}, данные неполные. URL: {url}')
+            return self.decode_page(page_result, schema)[0]
+
+        pages = await asyncio.gather(*(fetch_page(offset) for offset in
+                                       range(params['offset'] + params['limit'], size, params['limit'])))
+        for rows in pages:
+            items += rows
+        return items
+
+    async def get_products_list(self):
+        url = f'{self.host}entity/product'
+        params = {'limit': 1000, 'offset': 0}
+        return await self.fetch_data(url, params, parallel=True)
+
+    async def update_product(self, product):
+        url = f'{self.host}entity/product/{product.get("id")}'
+        result = await self.put(url, data=product)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось обновить номенклатуру.')
+        return response_json
+
+    async def get_bundles(self, typed: bool = False):
+        url = f'{self.host}entity/bundle?expand=components.rows.assortment'
+        params = {'limit': 100, 'offset': 0}
+        return await self.fetch_data(url, params, parallel=True, schema=MsBundlesPage if typed else None)
+
+    async def update_bundle(self, bundle):
+        url = f'{self.host}entity/bundle/{bundle.get("id")}'
+        result = await self.put(url, data=bundle)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось обновить товар.')
+        return response_json
+
+    async def get_stock_all(self):
+        url = f'{self.host}report/stock/all'
+        params = {'limit': 1000, 'offset': 0}
+        stocks_list = await self.fetch_data(url, params, parallel=True)
+        logger.info(f'Получен остаток по номенклатуре: {len(stocks_list)}')
+        return stocks_list
+
+    async def get_stock(self):
+        url = f'{self.host}report/stock/all/current'
+        params = {'stockType': 'quantity', 'include': 'zeroLines'}
+        result = await self.get(url, params)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось получить данные о наличии.')
+        return response_json
+
+    async def get_stock_by_store(self):
+        url = f'{self.host}report/stock/bystore/current'
+        params = {'stockType': 'quantity', 'include': 'zeroLines'}
+        result = await self.get(url, params)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось получить данные о наличии.')
+        return response_json
+
+    async def get_orders(self, filter_str):
+        url = f'{self.host}entity/customerorder{filter_str}'
+        params = {'limit': 100, 'offset': 0}
+        return await self.fetch_data(url, params, parallel=True)
+
+    async def get_positions_for_registration(self, registration_id: str):
+        url = f'{self.host}entity/enter/{registration_id}/positions'
+        result = await self.get(url)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось получить позиции Оприходования.')
+        return response_json
+
+    async def create_positions_for_doc(self, doc_id: str, positions: list, doc_type='enter'):
+        url = f'{self.host}entity/{doc_type}/{doc_id}/positions'
+        result = await self.post(url, data=positions, mutating=True)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось добавить позиции документа.')
+        return response_json
@@ -1,14 +1,27 @@
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from functools import partial
+from itertools import chain
 from market_api_app.utils import date_to_utc
 from market_api_app.base import ApiBase
+from market_api_app.schemas import OzonPricesResponse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('Ozon')
 
+MAX_PARALLEL_PRODUCT_REQUESTS = 3  # Страниц каталога, для которых тарифы / информация запрашиваются одновременно
+MAX_PARALLEL_ORDER_REQUESTS = 3  # Окон периода, заказы по которым запрашиваются одновременно
+ORDERS_PAGE_LIMIT = 1000  # Максимум отправлений в ответе v3/posting/fbs/list
+ORDERS_WINDOW_DAYS = 7
+PRICES_LIMIT = 1000  # Максимум товаров на странице v5/product/info/prices
+PRODUCT_INFO_LIMIT = 1000  # Максимум идентификаторов в запросе v3/product/info/list
+
 
 class Ozon(ApiBase):
-    def __init__(self, client_id: str, api_key: str, max_retries: int = 3, delay_seconds: int = 15):
-        super().__init__(max_retries=max_retries, delay_seconds=delay_seconds)
+    def __init__(self, client_id: str, api_key: str, max_retries: int = 3, delay_seconds: int = 15, **kwargs):
+        super().__init__(max_retries=max_retries, delay_seconds=delay_seconds, **kwargs)
         self.headers = {
             "Api-Key": api_key,
             "Client-Id": client_id,
@@ -20,41 +33,114 @@ class Ozon(ApiBase):
         # logger.info(f"Получение детальной информации по товарам")
         url = self.host + "v2/product/info/list"
         data = {"product_id": product_id}
-        result = self.post(url, data)
-        result_json = result.json() if result else {}
+        result = self.post(url, data, coalesce=True)
+        result_json = self.decode(result) if result else {}
         if not result:
             logger.error('Не удалось получить информацию по товарам.')
         return result_json.get("result", {}).get("items", [])
 
-    def get_products_info_v3(self, product_id: list):
+    def get_products_info_v3(self, product_id: list = None, offer_id: list = None):
+        """Не более PRODUCT_INFO_LIMIT товаров в запросе, для больших списков - OzonProductLookup"""
         # logger.info(f"Получение детальной информации по товарам")
         url = self.host + "v3/product/info/list"
-        data = {"product_id": product_id}
-        result = self.post(url, data)
-        result_json = result.json() if result else {}
+        data = {"product_id": product_id or []}
+        if offer_id:
+            data["offer_id"] = offer_id
+        result = self.post(url, data, coalesce=True)
+        result_json = self.decode(result) if result else {}
         if not result:
             logger.error('Не удалось получить информацию по товарам.')
         return result_json.get("items", [])
 
-    def get_prices(self, product_id: list):
+    def get_prices(self, product_id: list = None, typed: bool = False, offer_id: list = None, strict: bool = False):
+        """
+        Тарифы и цены товаров, все страницы по cursor.
+        :param product_id: Список product_id, None - без фильтра (весь каталог), пустой список - пустой результат
+        :param typed: Товары в виде OzonPriceItem (только используемые поля) вместо dict
+        :param strict: RuntimeError, если страница не получена, иначе возвращаются уже полученные товары
+        """
+        if not product_id and not offer_id and (product_id is not None or offer_id is not None):
+            # Пустой список без фильтра вернул бы весь каталог
+            return []
         logger.info(f"Получение данных по тарифам")
         url = self.host + "v5/product/info/prices"
         data = {
             "cursor": "",
             "filter": {
-                "product_id": product_id,
+                "product_id": product_id or [],
                 "visibility": "ALL"
             },
-            "limit": 1000
+            "limit": PRICES_LIMIT
         }
-        result = self.post(url, data)
-        prices_json = result.json() if result else {}
-        if not result:
-            logger.error('Не удалось получить информацию по тарифам.')
-        return prices_json.get("items", [])
+        if offer_id:
+            data["filter"]["offer_id"] = offer_id
+        items = []
+        while True:
+            result = self.post(url, data, coalesce=True)
+            if not result:
+                if strict:
+                    raise RuntimeError('Не удалось получить информацию по тарифам, данные неполные.')
+                logger.error('Не удалось получить информацию по тарифам.')
+                return items
+            if typed:
+                response = self.decode(result, OzonPricesResponse)
+                page, cursor = response.items, response.cursor
+            else:
+                response = self.decode(result)
+                page, cursor = response.get("items", []), response.get("cursor", "")
+            items += page
+            if not cursor or len(page) < PRICES_LIMIT:
+                return items
+            data = {**data, "cursor": cursor}
+
+    def get_products(self, typed: bool = False):
+        return [offer for offers in self.iter_products(typed) for offer in offers]
 
-    def get_products(self):
+    def iter_products(self, typed: bool = False, strict: bool = False):
+        """:param strict: RuntimeError, если страница списка или тарифов не получена, вместо неполного каталога"""
         logger.info(f"Получение данных по товарах")
+        return self._iter_products(partial(self.get_prices, typed=typed, strict=strict), strict=strict)
+
+    def get_products_v2(self):
+        return [offer for offers in self.iter_products_v2() for offer in offers]
+
+    def iter_products_v2(self):
+        logger.info(f"Получение данных по товарах")
+        return self._iter_products(self.get_products_info_v3)
+
+    def _iter_products(self, get_info, prefetch: int = MAX_PARALLEL_PRODUCT_REQUESTS, strict: bool = False):
+        """
+        Постранично обходит v3/product/list и для каждой страницы возвращает результат get_info(product_id).
+        Курсор списка идет вперед, пока запросы get_info по уже полученным страницам выполняются в потоках
+        (не более prefetch страниц одновременно). Результаты возвращаются в порядке страниц
+        """
+        with ThreadPoolExecutor(max_workers=prefetch) as executor:
+            futures = deque()
+            received = 0
+            try:
+                # None после последней страницы - сигнал дождаться всех оставшихся запросов
+                for page in chain(self._iter_product_ids(strict), [None]):
+                    if page is not None:
+                        products_ids, total_full = page
+                        # Страница только из архивных товаров: пустой фильтр product_id означает весь каталог
+                        if not products_ids:
+                            continue
+                        futures.append((executor.submit(get_info, product_id=products_ids), total_full))
+                    while futures and (page is None or len(futures) >= prefetch):
+                        future, total_full = futures.popleft()
+                        products_info = future.result()
+                        received += len(products_info)
+                        logger.info(f"Всего товаров: {total_full}, осталось: {total_full - received}")
+                        yield products_info
+            finally:
+                for future, _ in futures:
+                    future.cancel()
+
+    def _iter_product_ids(self, strict: bool = False):
+        """
+        Постранично обходит v3/product/list: (product_id неархивных товаров страницы, всего товаров)
+        :param strict: RuntimeError, если страница не получена, иначе обход заканчивается
+        """
         url = self.host + "v3/product/list"
         limit = 1000
         data = {
@@ -67,65 +153,74 @@ class Ozon(ApiBase):
             "limit": limit
         }
 
-        offers_list = []
         total = limit
         while True:
-            result = self.post(url, data)
-            result_json = result.json() if result else {}
+            result = self.post(url, data, coalesce=True)
+            result_json = self.decode(result) if result else {}
             if result_json and result_json.get("result"):
                 products_ = result_json.get("result", {}).get("items", [])
-                products_ids = [product['product_id'] for product in products_ if not product['archived']]
-                products_info = self.get_prices(product_id=products_ids)
-                offers_list += products_info
+                yield [product['product_id'] for product in products_ if not product['archived']], \
+                    result_json.get("result", {}).get("total", 0)
                 if result_json.get("result", {}).get("total", 0) < total:
                     break
                 data["last_id"] = result_json.get("result", {}).get("last_id", "")
                 total += limit
             else:
+                if strict:
+                    raise RuntimeError('Не удалось получить данные о товарах, список неполный.')
                 logger.error("Не удалось получить данные о товарах.")
                 break
-        return offers_list
 
-    def get_products_v2(self):
-        logger.info(f"Получение данных по товарах")
-        url = self.host + "v3/product/list"
-        limit = 1000
-        data = {
-            "filter": {
-                "offer_id": [],
-                "product_id": [],
-                "visibility": "ALL"
-            },
-            "last_id": "",
-            "limit": limit
-        }
+    def get_orders(self, from_date, to_date, window_days: int = ORDERS_WINDOW_DAYS,
+                   max_workers: int = MAX_PARALLEL_ORDER_REQUESTS) -> list:
+        """Отправления FBS за период, даты в формате DD-MM-YYYY (см. iter_orders)"""
+        return [posting for postings in self.iter_orders(from_date, to_date, window_days, max_workers)
+                for posting in postings]
 
-        offers_list = []
-        total = limit
+    def iter_orders(self, from_date, to_date, window_days: int = ORDERS_WINDOW_DAYS,
+                    max_workers: int = MAX_PARALLEL_ORDER_REQUESTS):
+        """
+        Отправления FBS частями по мере получения. Период делится на окна по window_days дней,
+        окна запрашиваются одновременно (не более max_workers), внутри окна - постранично до has_next=False.
+        Отправление, попавшее в несколько страниц или окон, возвращается один раз.
+        RuntimeError - страница окна не получена: неполный список отправлений не возвращается
+        """
+        logger.info(f"Получение информации о заказах")
+        windows = split_dates(from_date, to_date, window_days)
+        seen = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self.get_window_orders, since, to) for since, to in windows]
+            try:
+                for future in as_completed(futures):
+                    postings = [posting for posting in future.result()
+                                if posting.get('posting_number') not in seen]
+                    seen.update(posting.get('posting_number') for posting in postings)
+                    if postings:
+                        yield postings
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def get_window_orders(self, since: str, to: str) -> list:
+        """
+        Все страницы v3/posting/fbs/list для одного окна, since и to в формате UTC.
+        RuntimeError - страница не получена
+        """
+        postings = []
+        offset = 0
         while True:
-            result = self.post(url, data)
-            result_json = result.json() if result else {}
-            if result_json and result_json.get("result"):
-                products_ = result_json.get("result", {}).get("items", [])
-                products_ids = [product['product_id'] for product in products_ if not product['archived']]
-                products_info = self.get_products_info_v3(product_id=products_ids)
-                offers_list += products_info
-                total_full = result_json.get("result", {}).get("total", 0)
-                logger.info(f"Всего товаров: {total_full}, осталось: {total_full - len(offers_list)}")
-                if total_full < total:
-                    break
-                data["last_id"] = result_json.get("result", {}).get("last_id", "")
-                total += limit
-            else:
-                logger.error("Не удалось получить данные о товарах.")
+            page = self.get_orders_page(since, to, offset)
+            if page is None:
+                raise RuntimeError(f'Не удалось получить информацию по заказам за {since} - {to}, смещение {offset}.')
+            postings += page.get("postings", [])
+            if not page.get("has_next") or not page.get("postings"):
                 break
-        return offers_list
+            offset += ORDERS_PAGE_LIMIT
+        return postings
 
-    def get_orders(self, from_date, to_date):
-        logger.info(f"Получение информации о заказах")
+    def get_orders_page(self, since: str, to: str, offset: int = 0, limit: int = ORDERS_PAGE_LIMIT) -> dict | None:
+        """Одна страница v3/posting/fbs/list: {"postings": [...], "has_next": bool}, None - запрос не выполнен"""
         url = self.host + "v3/posting/fbs/list"
-        since = date_to_utc(from_date)
-        to = date_to_utc(to_date, start_of_day=False)
         data = {
             "dir": "ASC",
             "filter": {
@@ -133,8 +228,8 @@ class Ozon(ApiBase):
                 "since": since,
                 "to": to
             },
-            "limit": 1000,
-            "offset": 0,
+            "limit": limit,
+            "offset": offset,
             "with": {
                 "analytics_data": False,
                 "barcodes": False,
@@ -143,7 +238,19 @@ class Ozon(ApiBase):
             }
         }
         result = self.post(url, data)
-        result_json = result.json() if result else {}
         if not result:
-            logger.error('Не удалось получить информацию по заказам.')
-        return result_json.get("result", {}).get("postings", [])
+            return None
+        return self.decode(result).get("result", {})
+
+
+def split_dates(from_date: str, to_date: str, window_days: int) -> list:
+    """Делит период в формате DD-MM-YYYY на окна по window_days дней: [(since, to)] в формате UTC"""
+    start = datetime.strptime(from_date, '%d-%m-%Y')
+    end = datetime.strptime(to_date, '%d-%m-%Y')
+    windows = []
+    while start <= end:
+        window_end = min(start + timedelta(days=window_days - 1), end)
+        windows.append((date_to_utc(start.strftime('%d-%m-%Y')),
+                        date_to_utc(window_end.strftime('%d-%m-%Y'), start_of_day=False)))
+        start = window_end + timedelta(days=1)
+    return windows
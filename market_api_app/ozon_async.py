@@ -0,0 +1,170 @@
+import asyncio
+import logging
+from collections import deque
+from functools import partial
+from market_api_app.base_async import AsyncApiBase
+from market_api_app.ozon import MAX_PARALLEL_PRODUCT_REQUESTS, ORDERS_PAGE_LIMIT, ORDERS_WINDOW_DAYS, PRICES_LIMIT, \
+    split_dates
+from market_api_app.schemas import OzonPricesResponse
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('Ozon ASYNC')
+
+
+class AsyncOzon(AsyncApiBase):
+    def __init__(self, client_id: str, api_key: str, max_retries: int = 3, delay_seconds: int = 15, **kwargs):
+        super().__init__(max_retries=max_retries, delay_seconds=delay_seconds, **kwargs)
+        self.headers = {
+            "Api-Key": api_key,
+            "Client-Id": client_id,
+            "Content-Type": "application/json",
+        }
+        self.host = "https://api-seller.ozon.ru/"
+
+    async def get_products_info(self, product_id: list):
+        url = self.host + "v2/product/info/list"
+        data = {"product_id": product_id}
+        result = await self.post(url, data, coalesce=True)
+        result_json = result.json() if result else {}
+        if not result:
+            logger.error('Не удалось получить информацию по товарам.')
+        return result_json.get("result", {}).get("items", [])
+
+    async def get_products_info_v3(self, product_id: list):
+        url = self.host + "v3/product/info/list"
+        data = {"product_id": product_id}
+        result = await self.post(url, data, coalesce=True)
+        result_json = result.json() if result else {}
+        if not result:
+            logger.error('Не удалось получить информацию по товарам.')
+        return result_json.get("items", [])
+
+    async def get_prices(self, product_id: list = None, typed: bool = False, offer_id: list = None):
+        """Асинхронный вариант Ozon.get_prices: все страницы по cursor"""
+        if not product_id and not offer_id and (product_id is not None or offer_id is not None):
+            # Пустой список без фильтра вернул бы весь каталог
+            return []
+        logger.info(f"Получение данных по тарифам")
+        url = self.host + "v5/product/info/prices"
+        data = {
+            "cursor": "",
+            "filter": {
+                "product_id": product_id or [],
+                "visibility": "ALL"
+            },
+            "limit": PRICES_LIMIT
+        }
+        if offer_id:
+            data["filter"]["offer_id"] = offer_id
+        items = []
+        while True:
+            result = await self.post(url, data, coalesce=True)
+            if not result:
+                logger.error('Не удалось получить информацию по тарифам.')
+                return items
+            if typed:
+                response = self.decode(result, OzonPricesResponse)
+                page, cursor = response.items, response.cursor
+            else:
+                response = result.json()
+                page, cursor = response.get("items", []), response.get("cursor", "")
+            items += page
+            if not cursor or len(page) < PRICES_LIMIT:
+                return items
+            data = {**data, "cursor": cursor}
+
+    async def _get_products(self, get_info, prefetch: int = MAX_PARALLEL_PRODUCT_REQUESTS):
+        """Асинхронный вариант Ozon._iter_products: запросы get_info по страницам идут параллельно с курсором списка"""
+        url = self.host + "v3/product/list"
+        limit = 1000
+        data = {
+            "filter": {
+                "offer_id": [],
+                "product_id": [],
+                "visibility": "ALL"
+            },
+            "last_id": "",
+            "limit": limit
+        }
+
+        offers_list = []
+        tasks = deque()
+        total = limit
+        try:
+            while True:
+                result = await self.post(url, data, coalesce=True)
+                result_json = result.json() if result else {}
+                if result_json and result_json.get("result"):
+                    products_ = result_json.get("result", {}).get("items", [])
+                    products_ids = [product['product_id'] for product in products_ if not product['archived']]
+                    # Страница только из архивных товаров: пустой фильтр product_id означает весь каталог
+                    if products_ids:
+                        tasks.append(asyncio.ensure_future(get_info(product_id=products_ids)))
+                    if len(tasks) >= prefetch:
+                        offers_list += await tasks.popleft()
+                    if result_json.get("result", {}).get("total", 0) < total:
+                        break
+                    data["last_id"] = result_json.get("result", {}).get("last_id", "")
+                    total += limit
+                else:
+                    logger.error("Не удалось получить данные о товарах.")
+                    break
+            while tasks:
+                offers_list += await tasks.popleft()
+        finally:
+            for task in tasks:
+                task.cancel()
+        return offers_list
+
+    async def get_products(self, typed: bool = False):
+        logger.info(f"Получение данных по товарах")
+        return await self._get_products(partial(self.get_prices, typed=typed))
+
+    async def get_products_v2(self):
+        logger.info(f"Получение данных по товарах")
+        return await self._get_products(self.get_products_info_v3)
+
+    async def get_orders(self, from_date, to_date, window_days: int = ORDERS_WINDOW_DAYS):
+        """
+        Асинхронный вариант Ozon.get_orders: окна периода запрашиваются одновременно, каждое постранично.
+        RuntimeError - страница окна не получена
+        """
+        logger.info(f"Получение информации о заказах")
+        windows = await asyncio.gather(*(self.get_window_orders(since, to)
+                                         for since, to in split_dates(from_date, to_date, window_days)))
+        postings = {}
+        for window in windows:
+            for posting in window:
+                postings.setdefault(posting.get('posting_number'), posting)
+        return list(postings.values())
+
+    async def get_window_orders(self, since: str, to: str) -> list:
+        url = self.host + "v3/posting/fbs/list"
+        data = {
+            "dir": "ASC",
+            "filter": {
+                "is_quantum": False,
+                "since": since,
+                "to": to
+            },
+            "limit": ORDERS_PAGE_LIMIT,
+            "offset": 0,
+            "with": {
+                "analytics_data": False,
+                "barcodes": False,
+                "financial_data": True,
+                "translit": False
+            }
+        }
+        postings = []
+        while True:
+            result = await self.post(url, data)
+            if not result:
+                raise RuntimeError(f'Не удалось получить информацию по заказам за {since} - {to}, '
+                                   f'смещение {data["offset"]}.')
+            page = result.json().get("result", {})
+            postings += page.get("postings", [])
+            if not page.get("has_next") or not page.get("postings"):
+                break
+            data = {**data, "offset": data["offset"] + ORDERS_PAGE_LIMIT}
+        return postings
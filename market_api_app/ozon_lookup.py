@@ -0,0 +1,55 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from market_api_app.ozon import Ozon, MAX_PARALLEL_PRODUCT_REQUESTS, PRICES_LIMIT, PRODUCT_INFO_LIMIT
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('Ozon Lookup')
+
+
+def get_item_value(item, field: str):
+    return item.get(field) if isinstance(item, dict) else getattr(item, field)
+
+
+class OzonProductLookup:
+    """
+    Данные по произвольному набору товаров Ozon без обхода всего каталога.
+    Списки product_id / offer_id делятся на части по максимуму метода, части запрашиваются одновременно
+    (не более max_workers), темп задает общий ограничитель запросов. Результат - словарь по product_id или offer_id.
+    """
+
+    def __init__(self, oz_client: Ozon, max_workers: int = MAX_PARALLEL_PRODUCT_REQUESTS):
+        self.oz_client = oz_client
+        self.max_workers = max_workers
+
+    def _lookup(self, fetch, ids: list, id_field: str, limit: int, key_field: str) -> dict:
+        ids = list(dict.fromkeys(ids))
+        batches = [ids[i:i + limit] for i in range(0, len(ids), limit)]
+        result = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for items in executor.map(lambda batch: fetch(**{id_field: batch}), batches):
+                for item in items:
+                    result[get_item_value(item, key_field)] = item
+        if len(result) < len(ids):
+            logger.warning(f'Не найдено товаров: {len(ids) - len(result)} из {len(ids)}')
+        return result
+
+    def prices(self, product_ids: list = None, offer_ids: list = None, typed: bool = False) -> dict:
+        """
+        Тарифы v5/product/info/prices: {product_id: товар} по product_ids или {offer_id: товар} по offer_ids
+        :param typed: Товары в виде OzonPriceItem
+        """
+        def fetch(**kwargs):
+            return self.oz_client.get_prices(typed=typed, **kwargs)
+
+        if offer_ids is not None:
+            return self._lookup(fetch, offer_ids, 'offer_id', PRICES_LIMIT, 'offer_id')
+        return self._lookup(fetch, product_ids or [], 'product_id', PRICES_LIMIT, 'product_id')
+
+    def info(self, product_ids: list = None, offer_ids: list = None) -> dict:
+        """Информация v3/product/info/list: {product_id: товар} по product_ids или {offer_id: товар} по offer_ids"""
+        if offer_ids is not None:
+            return self._lookup(self.oz_client.get_products_info_v3, offer_ids, 'offer_id', PRODUCT_INFO_LIMIT,
+                                'offer_id')
+        # В ответе v3/product/info/list product_id называется id
+        return self._lookup(self.oz_client.get_products_info_v3, product_ids or [], 'product_id', PRODUCT_INFO_LIMIT,
+                            'id')
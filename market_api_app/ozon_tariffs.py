@@ -0,0 +1,135 @@
+import logging
+import math
+import time
+import numpy as np
+from market_api_app.ozon import Ozon
+from market_api_app.utils import JSONStorage
+from market_api_app.utils_ozon import get_logistic_msk_ekb_bulk
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('Ozon Tariffs')
+
+OZON_TARIFFS_MAX_AGE_HOURS = 12
+
+# Колонки снимка: (имя, путь к значению в OzonPriceItem)
+PRICE_ITEM_COLUMNS = (
+    ('acquiring', ('acquiring',)),
+    ('fbs_deliv_to_customer_amount', ('commissions', 'fbs_deliv_to_customer_amount')),
+    ('fbs_direct_flow_trans_min_amount', ('commissions', 'fbs_direct_flow_trans_min_amount')),
+    ('fbs_first_mile_max_amount', ('commissions', 'fbs_first_mile_max_amount')),
+    ('fbs_first_mile_min_amount', ('commissions', 'fbs_first_mile_min_amount')),
+    ('fbs_return_flow_amount', ('commissions', 'fbs_return_flow_amount')),
+    ('fbs_return_flow_trans_max_amount', ('commissions', 'fbs_return_flow_trans_max_amount')),
+    ('fbs_return_flow_trans_min_amount', ('commissions', 'fbs_return_flow_trans_min_amount')),
+    ('sales_percent_fbs', ('commissions', 'sales_percent_fbs')),
+    ('price', ('price', 'price')),
+    ('marketing_price', ('price', 'marketing_price')),
+    ('marketing_seller_price', ('price', 'marketing_seller_price')),
+    ('volume_weight', ('volume_weight',)),
+)
+# Логистика кластера МСК - ЕКБ вместо fbs_direct_flow_trans_max_amount из ответа, считается по price и volume_weight
+LOGISTICS_COLUMN = 'fbs_direct_flow_trans_max_amount'
+
+
+class OzonTariffSnapshot:
+    """
+    Снимок тарифов и цен каталога Ozon (v5/product/info/prices) в колоночном виде: offer_id и массив на каждое поле.
+    Строится один раз из потока страниц Ozon.iter_products(typed=True), сохраняется на диск и в течение
+    max_age_hours используется всеми отчетами Ozon без повторной загрузки каталога.
+    Сохраняется только полностью полученный каталог: при сбое загрузки используется предыдущий снимок.
+    """
+
+    def __init__(self, offer_ids: list, columns: dict, created_at: float | None = None):
+        self.offer_ids = offer_ids
+        self.columns = columns
+        self.created_at = created_at or time.time()
+        self.index = {offer_id: i for i, offer_id in enumerate(offer_ids)}
+
+    @classmethod
+    def from_pages(cls, pages) -> 'OzonTariffSnapshot':
+        """Снимок из страниц списков OzonPriceItem, страницы разбираются по мере получения"""
+        offer_ids = []
+        values = {name: [] for name, _ in PRICE_ITEM_COLUMNS}
+        for products in pages:
+            for prod in products:
+                offer_ids.append(prod.offer_id)
+                for name, path in PRICE_ITEM_COLUMNS:
+                    value = prod
+                    for attr in path:
+                        value = getattr(value, attr)
+                    values[name].append(value)
+        columns = {name: np.asarray(column, dtype=float) for name, column in values.items()}
+        columns[LOGISTICS_COLUMN] = get_logistic_msk_ekb_bulk(columns['price'], columns['volume_weight'])
+        return cls(offer_ids, columns)
+
+    @classmethod
+    def fetch(cls, oz_client: Ozon) -> 'OzonTariffSnapshot':
+        """Снимок всего каталога, RuntimeError - каталог получен не полностью"""
+        logger.info('Получение актуальных тарифов')
+        snapshot = cls.from_pages(oz_client.iter_products(typed=True, strict=True))
+        if not snapshot:
+            raise RuntimeError('Каталог пуст, тарифы не получены.')
+        return snapshot
+
+    @classmethod
+    def load_or_fetch(cls, oz_client: Ozon, filename: str | None = None,
+                      max_age_hours: int = OZON_TARIFFS_MAX_AGE_HOURS) -> 'OzonTariffSnapshot':
+        """
+        Сохраненный снимок, если он не старше max_age_hours, иначе загрузка каталога и сохранение.
+        :param filename: Файл снимка, по умолчанию свой для каждого Client-Id
+        """
+        filename = filename or f"oz_tariffs_{oz_client.headers.get('Client-Id', '')}.json"
+        storage = JSONStorage(filename=filename, max_age_hours=max_age_hours)
+        data = storage.read_data()
+        if data:
+            snapshot = cls.from_dict(data)
+            logger.info(f'Тарифы из {filename}, возраст {snapshot.age_hours:.1f} ч')
+            return snapshot
+        try:
+            snapshot = cls.fetch(oz_client)
+        except RuntimeError as e:
+            # Неполный каталог не сохраняется: отчеты строятся по предыдущему снимку, пока он есть
+            data = JSONStorage(filename=filename, max_age_hours=math.inf).read_data()
+            if not data:
+                raise
+            snapshot = cls.from_dict(data)
+            logger.warning(f'{e} Используются тарифы из {filename}, возраст {snapshot.age_hours:.1f} ч')
+            return snapshot
+        storage.write_data(snapshot.to_dict())
+        return snapshot
+
+    @property
+    def age_hours(self) -> float:
+        return (time.time() - self.created_at) / 3600
+
+    def __len__(self) -> int:
+        return len(self.offer_ids)
+
+    def __contains__(self, offer_id) -> bool:
+        return offer_id in self.index
+
+    def to_dict(self) -> dict:
+        return {
+            'created_at': self.created_at,
+            'offer_ids': self.offer_ids,
+            'columns': {name: column.tolist() for name, column in self.columns.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'OzonTariffSnapshot':
+        columns = {name: np.asarray(column, dtype=float) for name, column in data['columns'].items()}
+        return cls(data['offer_ids'], columns, data.get('created_at'))
+
+    def get_offer(self, offer_id: str) -> dict:
+        """Тарифы и цены одного товара {поле: значение}"""
+        i = self.index[offer_id]
+        return {name: column[i].item() for name, column in self.columns.items()}
+
+    def get_offers_commission_dict(self, offer_ids=None) -> dict:
+        """Тарифы и цены {offer_id: {поле: значение}} для offer_ids, None - для всего каталога"""
+        offer_ids = self.offer_ids if offer_ids is None else [offer_id for offer_id in offer_ids
+                                                              if offer_id in self.index]
+        rows = [self.index[offer_id] for offer_id in offer_ids]
+        columns = {name: column[rows].tolist() for name, column in self.columns.items()}
+        return {offer_id: {name: column[i] for name, column in columns.items()}
+                for i, offer_id in enumerate(offer_ids)}
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('RateLimit')
+
+'''
+Стартовые лимиты по хостам (запросов в секунду, размер всплеска) до получения заголовков от API.
+Дальше лимиты уточняются по заголовкам ответов:
+    * WB - X-Ratelimit-Limit, X-Ratelimit-Remaining, X-Ratelimit-Reset, X-Ratelimit-Retry (секунды)
+    * МойСклад - X-RateLimit-Limit, X-RateLimit-Remaining, X-Lognex-Retry-TimeInterval, X-Lognex-Reset,
+      X-Lognex-Retry-After (миллисекунды)
+    * Остальные - Retry-After (секунды)
+'''
+DEFAULT_LIMITS = {
+    'statistics-api.wildberries.ru': (1 / 20, 1),
+    'discounts-prices-api.wildberries.ru': (10 / 6, 5),
+    'marketplace-api.wildberries.ru': (5.0, 20),
+    'api.moysklad.ru': (15.0, 45),
+}
+
+TOKEN_HEADERS = ('Authorization', 'Api-Key', 'Client-Id')
+
+
+def _header_number(headers, name: str, scale: float = 1.0) -> float | None:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value) * scale
+    except ValueError:
+        return None
+
+
+def _first(*values):
+    return next((value for value in values if value is not None), None)
+
+
+class TokenBucket:
+    """
+    Корзина токенов одного хоста и токена доступа. rate=None - квота неизвестна, запросы не сдерживаются,
+    пока API не сообщит лимиты в заголовках.
+    """
+
+    def __init__(self, rate: float | None = None, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Резервирует токен и возвращает время ожидания в секундах до отправки запроса"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(self.blocked_until - now, 0.0)
+            if self.rate:
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def update(self, headers, status_code: int):
+        limit = _header_number(headers, 'X-RateLimit-Limit')
+        remaining = _header_number(headers, 'X-RateLimit-Remaining')
+        interval = _header_number(headers, 'X-Lognex-Retry-TimeInterval', 0.001)
+        reset = _first(_header_number(headers, 'X-Ratelimit-Reset'),
+                       _header_number(headers, 'X-Lognex-Reset', 0.001))
+        retry = _first(_header_number(headers, 'X-Ratelimit-Retry'),
+                       _header_number(headers, 'X-Lognex-Retry-After', 0.001),
+                       _header_number(headers, 'Retry-After'))
+
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if limit:
+                self.capacity = limit
+                if interval:
+                    self.rate = limit / interval
+                elif reset and remaining is not None and remaining < limit:
+                    self.rate = (limit - remaining) / reset
+            if remaining is not None:
+                self.tokens = min(self.tokens, remaining)
+                if remaining <= 0 and reset:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+            if status_code == 429:
+                self.tokens = min(self.tokens, 0.0)
+                self.blocked_until = max(self.blocked_until, now + (retry or 1.0))
+
+
+class RateLimiter:
+    """Общий для процесса ограничитель запросов с корзиной на каждую пару хост + токен доступа"""
+
+    def __init__(self, defaults: dict | None = None):
+        self.defaults = dict(DEFAULT_LIMITS if defaults is None else defaults)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(url: str, headers: dict) -> tuple:
+        token = ''.join(str(headers.get(name, '')) for name in TOKEN_HEADERS)
+        return urlsplit(url).hostname, hashlib.sha1(token.encode()).hexdigest()[:12]
+
+    def get_bucket(self, url: str, headers: dict) -> TokenBucket:
+        key = self.get_key(url, headers)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                rate, capacity = self.defaults.get(key[0], (None, 1.0))
+                bucket = self._buckets[key] = TokenBucket(rate, capacity)
+            return bucket
+
+    def configure(self, host: str, rate: float, capacity: float):
+        """Задает лимит хоста для новых корзин и пересчитывает уже созданные"""
+        with self._lock:
+            self.defaults[host] = (rate, capacity)
+            for (bucket_host, _), bucket in self._buckets.items():
+                if bucket_host == host:
+                    bucket.rate, bucket.capacity = rate, capacity
+
+    def acquire(self, url: str, headers: dict):
+        wait = self.get_bucket(url, headers).reserve()
+        if wait > 0:
+            logger.debug(f'Ограничение запросов {urlsplit(url).hostname}: ожидание {wait:.1f} секунд.')
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str, headers: dict):
+        wait = self.get_bucket(url, headers).reserve()
+        if wait > 0:
+            logger.debug(f'Ограничение запросов {urlsplit(url).hostname}: ожидание {wait:.1f} секунд.')
+            await asyncio.sleep(wait)
+
+    def update(self, url: str, headers: dict, response):
+        if response is not None:
+            self.get_bucket(url, headers).update(response.headers, response.status_code)
+
+
+rate_limiter = RateLimiter()
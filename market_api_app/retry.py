@@ -0,0 +1,62 @@
+import random
+import time
+
+RETRY_AFTER_HEADERS = (
+    ('Retry-After', 1.0),
+    ('X-Ratelimit-Retry', 1.0),  # WB
+    ('X-Lognex-Retry-After', 0.001),  # МойСклад, миллисекунды
+)
+
+
+def get_retry_after(headers) -> float | None:
+    """Время в секундах до повтора запроса, которое сообщил сервер"""
+    for name, scale in RETRY_AFTER_HEADERS:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(float(value) * scale, 0.0)
+        except ValueError:
+            continue
+    return None
+
+
+class RetryPolicy:
+    """
+    Политика повторных запросов:
+        * 429 - повтор через Retry-After (X-Ratelimit-Retry, X-Lognex-Retry-After), без заголовка - через max_delay;
+        * 5xx, таймауты и ошибки соединения - экспоненциальная задержка со случайным разбросом (jitter);
+        * остальные 4xx - без повтора, запрос не может завершиться успешно;
+        * deadline - общий бюджет времени на вызов с учетом всех попыток, None - без ограничения.
+    """
+    retry_statuses = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, max_retries: int = 3, max_delay: float = 10.0, base_delay: float = 1.0, jitter: float = 0.5,
+                 deadline: float | None = 120.0):
+        self.max_retries = max_retries
+        self.max_delay = max_delay
+        self.base_delay = base_delay
+        self.jitter = jitter
+        self.deadline = deadline
+
+    def is_retryable(self, status_code: int | None) -> bool:
+        # status_code=None - таймаут или ошибка соединения, ответа нет
+        return status_code is None or status_code in self.retry_statuses
+
+    def get_delay(self, attempt: int, response=None) -> float:
+        if response is not None:
+            retry_after = get_retry_after(response.headers)
+            if retry_after is not None:
+                return retry_after
+            if response.status_code == 429:
+                return self.max_delay
+        backoff = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return backoff * (1 - self.jitter * random.random())
+
+    def start(self) -> float | None:
+        """Момент окончания бюджета времени для нового вызова"""
+        return time.monotonic() + self.deadline if self.deadline is not None else None
+
+    @staticmethod
+    def fits_deadline(deadline_at: float | None, delay: float) -> bool:
+        return deadline_at is None or time.monotonic() + delay < deadline_at
@@ -0,0 +1,181 @@
+"""
+Типизированные структуры ответов для объемных выборок.
+Объявлены только поля, которые используются в расчетах: остальное содержимое ответа не декодируется
+(см. market_api_app.fastjson.decode). Имена полей совпадают с ключами API.
+Поля допускают null: значение заменяется значением по умолчанию (NullDefaults).
+"""
+from dataclasses import dataclass, field, fields, MISSING
+from typing import Any
+
+
+class NullDefaults:
+    """
+    null в поле со значением по умолчанию заменяется этим значением.
+    Конструктор вызывается и при декодировании msgspec, и при сборке без него (fastjson.from_dict),
+    поэтому результат не зависит от установленных библиотек.
+    """
+    __slots__ = ()
+
+    def __post_init__(self):
+        for item in fields(self):
+            if getattr(self, item.name) is not None:
+                continue
+            if item.default_factory is not MISSING:
+                setattr(self, item.name, item.default_factory())
+            elif item.default not in (None, MISSING):
+                setattr(self, item.name, item.default)
+
+
+# Ozon: v5/product/info/prices
+
+@dataclass(slots=True)
+class OzonPrice(NullDefaults):
+    price: float | None = 0.0
+    marketing_price: float | None = 0.0
+    marketing_seller_price: float | None = 0.0
+
+
+@dataclass(slots=True)
+class OzonCommissions(NullDefaults):
+    sales_percent_fbs: float | None = 0.0
+    fbs_deliv_to_customer_amount: float | None = 0.0
+    fbs_direct_flow_trans_min_amount: float | None = 0.0
+    fbs_direct_flow_trans_max_amount: float | None = 0.0
+    fbs_first_mile_min_amount: float | None = 0.0
+    fbs_first_mile_max_amount: float | None = 0.0
+    fbs_return_flow_amount: float | None = 0.0
+    fbs_return_flow_trans_min_amount: float | None = 0.0
+    fbs_return_flow_trans_max_amount: float | None = 0.0
+
+
+@dataclass(slots=True)
+class OzonPriceItem(NullDefaults):
+    product_id: int | None = 0
+    offer_id: str | None = ''
+    acquiring: float | None = 0.0
+    volume_weight: float | None = 0.0
+    price: OzonPrice | None = field(default_factory=OzonPrice)
+    commissions: OzonCommissions | None = field(default_factory=OzonCommissions)
+
+
+@dataclass(slots=True)
+class OzonPricesResponse(NullDefaults):
+    items: list[OzonPriceItem] | None = field(default_factory=list)
+    cursor: str | None = ''
+    total: int | None = 0
+
+
+# Яндекс Маркет: v2/tariffs/calculate
+
+@dataclass(slots=True)
+class YmTariffParameter(NullDefaults):
+    name: str | None = ''
+    value: str | float | None = None
+
+
+@dataclass(slots=True)
+class YmTariff(NullDefaults):
+    type: str | None = ''
+    amount: float | None = 0.0
+    parameters: list[YmTariffParameter] | None = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class YmTariffOffer(NullDefaults):
+    tariffs: list[YmTariff] | None = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class YmTariffsResult(NullDefaults):
+    offers: list[YmTariffOffer] | None = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class YmTariffsResponse(NullDefaults):
+    status: str | None = ''
+    result: YmTariffsResult | None = field(default_factory=YmTariffsResult)
+
+
+# МойСклад: entity/bundle?expand=components.rows.assortment
+
+@dataclass(slots=True)
+class MsMeta(NullDefaults):
+    href: str | None = ''
+    size: int | None = 0
+
+
+@dataclass(slots=True)
+class MsAssortment(NullDefaults):
+    meta: MsMeta | None = field(default_factory=MsMeta)
+
+
+@dataclass(slots=True)
+class MsComponent(NullDefaults):
+    quantity: float | None = 0.0
+    assortment: MsAssortment | None = field(default_factory=MsAssortment)
+
+
+@dataclass(slots=True)
+class MsComponents(NullDefaults):
+    rows: list[MsComponent] | None = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class MsPriceType(NullDefaults):
+    name: str | None = ''
+
+
+@dataclass(slots=True)
+class MsSalePrice(NullDefaults):
+    value: float | None = 0.0
+    priceType: MsPriceType | None = field(default_factory=MsPriceType)
+
+
+@dataclass(slots=True)
+class MsAttribute(NullDefaults):
+    name: str | None = ''
+    value: Any = None
+
+
+@dataclass(slots=True)
+class MsBundle(NullDefaults):
+    id: str | None = ''
+    code: str | None = ''
+    article: str | None = ''
+    name: str | None = ''
+    pathName: str | None = ''
+    salePrices: list[MsSalePrice] | None = field(default_factory=list)
+    attributes: list[MsAttribute] | None = field(default_factory=list)
+    components: MsComponents | None = field(default_factory=MsComponents)
+
+
+@dataclass(slots=True)
+class MsBundlesPage(NullDefaults):
+    rows: list[MsBundle] | None = field(default_factory=list)
+    meta: MsMeta | None = field(default_factory=MsMeta)
+
+
+# Wildberries: api/v2/list/goods/filter
+
+@dataclass(slots=True)
+class WbGoodsSize(NullDefaults):
+    price: float | None = 0.0
+    discountedPrice: float | None = 0.0
+
+
+@dataclass(slots=True)
+class WbGoods(NullDefaults):
+    nmID: int | None = 0
+    vendorCode: str | None = ''
+    discount: int | None = 0
+    sizes: list[WbGoodsSize] | None = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class WbGoodsData(NullDefaults):
+    listGoods: list[WbGoods] | None = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class WbGoodsResponse(NullDefaults):
+    data: WbGoodsData | None = field(default_factory=WbGoodsData)
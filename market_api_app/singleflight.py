@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('SingleFlight')
+
+
+class SingleFlight:
+    """
+    Общее для процесса объединение одинаковых запросов.
+    Пока запрос выполняется, вызовы с тем же ключом ждут его результата вместо отдельного обращения к API.
+    Успешный результат отдается повторно еще ttl секунд, неудачный (None, ответ 4xx/5xx) и исключения не сохраняются.
+    Результат общий для всех получивших его вызовов, изменять его нельзя.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+
+    def _purge(self, calls: dict, now: float):
+        expired = [key for key, (future, expires_at) in calls.items() if future.done() and expires_at <= now]
+        for key in expired:
+            del calls[key]
+
+    def do(self, key, func, ttl: float):
+        with self._lock:
+            now = time.monotonic()
+            call = self._calls.get(key)
+            if call is not None and (not call[0].done() or call[1] > now):
+                future, owner = call[0], False
+            else:
+                self._purge(self._calls, now)
+                future, owner = Future(), True
+                self._calls[key] = (future, math.inf)
+        if not owner:
+            logger.debug(f'Запрос уже выполняется или выполнен недавно, используется общий результат. Ключ: {key}')
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                if self._calls.get(key, (None,))[0] is future:
+                    del self._calls[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if self._calls.get(key, (None,))[0] is future:
+                if result:
+                    self._calls[key] = (future, time.monotonic() + ttl)
+                else:
+                    del self._calls[key]
+        future.set_result(result)
+        return result
+
+    async def do_async(self, key, func, ttl: float):
+        """Вариант do для корутин: func() возвращает корутину, ожидание общего результата не блокирует цикл событий"""
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        call = self._async_calls.get(key)
+        # Незавершенный результат другого цикла событий дождаться нельзя
+        if call is not None and (call[0].done() and call[1] > now or not call[0].done() and call[0].get_loop() is loop):
+            logger.debug(f'Запрос уже выполняется или выполнен недавно, используется общий результат. Ключ: {key}')
+            return await asyncio.shield(call[0])
+        self._purge(self._async_calls, now)
+        future = loop.create_future()
+        self._async_calls[key] = (future, math.inf)
+        try:
+            result = await func()
+        except BaseException as e:
+            if self._async_calls.get(key, (None,))[0] is future:
+                del self._async_calls[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Исключение получают ожидающие вызовы, сам future считается обработанным
+                future.exception()
+            raise
+        if self._async_calls.get(key, (None,))[0] is future:
+            if result:
+                self._async_calls[key] = (future, time.monotonic() + ttl)
+            else:
+                del self._async_calls[key]
+        future.set_result(result)
+        return result
+
+    def clear(self):
+        """Сбрасывает завершенные результаты, например после изменения данных запросами PUT / POST / DELETE"""
+        with self._lock:
+            for calls in (self._calls, self._async_calls):
+                for key in [key for key, (future, _) in calls.items() if future.done()]:
+                    del calls[key]
+
+
+single_flight = SingleFlight()
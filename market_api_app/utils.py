@@ -1,6 +1,8 @@
+import asyncio
 import os
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from types import ModuleType
 from typing import Union, Dict, List, Any, Optional
@@ -86,6 +88,19 @@ def get_current_datetime(str_format: str = '%Y-%m-%d %H:%M:%S') -> str:
     return datetime.now().strftime(str_format)
 
 
+def run_sync(coroutine):
+    """
+    Выполняет корутину из синхронного кода. Если цикл событий уже запущен (Colab, Jupyter),
+    корутина выполняется в отдельном потоке со своим циклом
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
 def dict_to_json_file(data: dict, file_path: str):
     """Принимает словарь и записывает его в файл json.
 
@@ -2,12 +2,20 @@ import logging
 import re
 from typing import Literal
 
-from market_api_app import MoySklad
-from market_api_app.utils import get_current_datetime
+from market_api_app import MoySklad, fastjson
+from market_api_app.schemas import MsBundle, MsSalePrice, MsAttribute
+from market_api_app.retry import RetryPolicy
+from market_api_app.utils import get_current_datetime, run_sync
+from market_api_app.wb_cards import AsyncWbCards, DEST_LIST, CARD_HEADERS, aggregate_stocks
+from market_api_app.wb_warehouses import WbWarehouseDirectory
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('MS Utils')
 
+_warehouse_directory = None
+# Повторы запросов карточек: своя политика, настройки клиента для остальных запросов не меняются
+CARDS_RETRY_POLICY = RetryPolicy(max_delay=20)
+
 
 def get_product_id_from_url(url: str) -> str | None:
     pattern = r'/product/([0-9a-fA-F-]+)'
@@ -18,13 +26,15 @@ def get_product_id_from_url(url: str) -> str | None:
         return None
 
 
-def get_stock_for_bundle(stocks_dict: dict, product: dict) -> float:
-    product_bundles = product['components']['rows']
+def get_stock_for_bundle(stocks_dict: dict, product: dict | MsBundle) -> float:
+    """:param product: Комплект из ответа МойСклад (dict) или MsBundle"""
+    if isinstance(product, dict):
+        product = fastjson.from_dict(MsBundle, product)
     product_stock = 0.0
-    for bundle in product_bundles:
-        bundle_id = get_product_id_from_url(bundle['assortment']['meta']['href'])
+    for bundle in product.components.rows:
+        bundle_id = get_product_id_from_url(bundle.assortment.meta.href)
         if bundle_id in stocks_dict:
-            p_stock = stocks_dict[bundle_id] // bundle['quantity']
+            p_stock = stocks_dict[bundle_id] // bundle.quantity
             if p_stock > product_stock:
                 product_stock = p_stock
     return product_stock
@@ -39,14 +49,10 @@ def get_ms_stocks_dict(ms_client: MoySklad, products: list) -> dict:
 
 
 def get_prime_cost(prices_list: list, price_name: str = "Цена продажи") -> float:
-    return next(
-        (
-            price.get("value", 0.0) / 100
-            for price in prices_list
-            if price["priceType"]["name"] == price_name
-        ),
-        0.0,
-    )
+    """:param prices_list: salePrices в виде dict или MsSalePrice"""
+    prices_list = [fastjson.from_dict(MsSalePrice, price) if isinstance(price, dict) else price
+                   for price in prices_list]
+    return next((price.value / 100 for price in prices_list if price.priceType.name == price_name), 0.0)
 
 
 def get_ms_orders(client: MoySklad, from_date: str, to_date: str, project: str = 'Яндекс Маркет') -> list:
@@ -54,8 +60,7 @@ def get_ms_orders(client: MoySklad, from_date: str, to_date: str, project: str =
     # project = 'Ozon' или 'Яндекс Маркет'
     filter_ = f'?filter=moment>{from_date};moment<{to_date};&order=name,desc&expand=positions.assortment,state,project'
     print('Мой склад: Получение заказов')
-    ms_orders = client.get_orders(filter_)
-
+    # Заказы с раскрытыми позициями разбираются постранично, без накопления полного ответа
     return [
         {
             'order_number': order.get('name', ''),
@@ -64,6 +69,7 @@ def get_ms_orders(client: MoySklad, from_date: str, to_date: str, project: str =
             'price': position.get('price', 0.0) / 100,
             'quantity': position.get('quantity', 0.0)
         }
+        for ms_orders in client.iter_orders(filter_)
         for order in ms_orders
         if order.get('state', {}).get('name', '') not in ['Отменен'] and order.get('project', {}).get('name',
                                                                                                       '') == project
@@ -72,7 +78,10 @@ def get_ms_orders(client: MoySklad, from_date: str, to_date: str, project: str =
 
 
 def get_attributes_dict(attributes_list: list) -> dict:
-    return {attribute['name']: attribute['value'] for attribute in attributes_list}
+    """:param attributes_list: attributes в виде dict или MsAttribute"""
+    attributes_list = [fastjson.from_dict(MsAttribute, attribute) if isinstance(attribute, dict) else attribute
+                       for attribute in attributes_list]
+    return {attribute.name: attribute.value for attribute in attributes_list}
 
 
 def get_volume(attributes_dict: dict) -> float:
@@ -84,11 +93,11 @@ def get_ms_products(client: MoySklad, project: str = 'ЯндексМаркет',
     """
     Получение товаров по project - значения 'ЯндексМаркет', 'Озон', 'WB'
     """
-    ms_products = client.get_bundles()
     print('Мой склад: Получение товаров')
     # Отбираем только по проекту
     products_for_project = [
-        product for product in ms_products if project in product.get('pathName', '')
+        product for ms_products in client.iter_bundles(typed=True) for product in ms_products
+        if project in product.pathName
     ]
     print("Мой склад: Получение остатка по товарам")
     stocks = client.get_stock()
@@ -103,17 +112,19 @@ def get_ms_products(client: MoySklad, project: str = 'ЯндексМаркет',
         price_name = price_cost_name
 
     return {
-        product[product_key]: {
+        getattr(product, product_key): {
             "STOCK": get_stock_for_bundle(ms_stocks, product),
-            "PRIME_COST": get_prime_cost(product.get("salePrices", []), price_name),
-            "NAME": product["name"],
-            "ATTRIBUTES": get_attributes_dict(product.get('attributes', []))
+            "PRIME_COST": get_prime_cost(product.salePrices, price_name),
+            "NAME": product.name,
+            "ATTRIBUTES": get_attributes_dict(product.attributes)
         }
         for product in products_for_project
     }
 
 
-def get_stocks_info(sizes: list) -> tuple:
+def get_stocks_info(sizes: list, fbs_ids: frozenset | None = None) -> tuple:
+    """:param fbs_ids: Склады FBS, по умолчанию из общего справочника складов"""
+    fbs_ids = get_warehouse_directory().fbs_ids if fbs_ids is None else fbs_ids
     fbs_stock = 0
     fbo_stock = 0
 
@@ -121,7 +132,7 @@ def get_stocks_info(sizes: list) -> tuple:
         stocks = size.get('stocks')
         for stock in stocks:
             wh_id = stock.get('wh')
-            if wh_id == 119261 or wh_id == 302088:
+            if wh_id in fbs_ids:
                 fbs_stock += stock.get('qty')
             else:
                 fbo_stock += stock.get('qty')
@@ -129,7 +140,9 @@ def get_stocks_info(sizes: list) -> tuple:
     return fbs_stock, fbo_stock
 
 
-def get_prices_info(sizes: list) -> dict:
+def get_prices_info(sizes: list, fbs_ids: frozenset | None = None) -> dict:
+    """:param fbs_ids: Склады FBS, по умолчанию из общего справочника складов"""
+    fbs_ids = get_warehouse_directory().fbs_ids if fbs_ids is None else fbs_ids
     shop_price = 0
     basket_price = 0
     fbs_stock = 0
@@ -142,7 +155,7 @@ def get_prices_info(sizes: list) -> dict:
         stocks = size.get('stocks')
         for stock in stocks:
             wh_id = stock.get('wh')
-            if wh_id == 119261 or wh_id == 302088:
+            if wh_id in fbs_ids:
                 fbs_stock += stock.get('qty')
             else:
                 fbo_stock += stock.get('qty')
@@ -165,25 +178,8 @@ def get_cards_details(client: MoySklad, nm_ids: str, dest: str = '-1257786') ->
     url = (f'https://u-card.wb.ru/cards/v4/detail?appType=1&curr=rub&dest={dest}&spp=30&hide_dtype=11&ab_testing=false'
            f'&ab_testing=false&lang=ru&nm={nm_ids}')
 
-    headers = {
-        "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;"
-                  "q=0.8,application/signed-exchange;v=b3;q=0.7",
-        "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-        "cache-control": "max-age=0",
-        "priority": "u=0, i",
-        "sec-ch-ua": '"Google Chrome";v="141", "Not?A_Brand";v="8", "Chromium";v="141"',
-        "sec-ch-ua-mobile": "?0",
-        "sec-ch-ua-platform": '"Windows"',
-        "sec-fetch-dest": "document",
-        "sec-fetch-mode": "navigate",
-        "sec-fetch-site": "none",
-        "sec-fetch-user": "?1",
-        "upgrade-insecure-requests": "1"
-    }
-    client.headers = headers
-    client.delay_seconds = 20  # TODO: Определить оптимальное время
     # result = client.get(url=url, params=params)
-    result = client.get(url=url)
+    result = client.get(url=url, headers=CARD_HEADERS, retry_policy=CARDS_RETRY_POLICY)
     response_json = result.json() if result else {}
 
     if not result:
@@ -191,28 +187,22 @@ def get_cards_details(client: MoySklad, nm_ids: str, dest: str = '-1257786') ->
     return response_json.get('products', [])
 
 
-def get_warehouses(client: MoySklad) -> list:
-    """Получение данных о складах"""
-    url = 'https://static-basket-01.wb.ru/vol0/data/stores-data.json'
-    headers = {
-        'Accept': '*/*',
-        'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-        'Connection': 'keep-alive',
-        'sec-ch-ua': '"Chromium";v="134", "Google Chrome";v="134", "Not:A-Brand";v="24"',
-        'sec-ch-ua-mobile': '?0',
-        'sec-ch-ua-platform': '"Windows"',
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
-                      'Chrome/134.0.0.0 Safari/537.36'
-    }
-    client.headers = headers
-    result = client.get(url=url)
-    response_json = result.json() if result else []
-    if not result:
-        print('Не удалось получить данные по корзине.')
-    return response_json
+def get_warehouses(client: MoySklad | None = None) -> list:
+    """Получение данных о складах. Справочник запрашивается своим клиентом, client не используется"""
+    return get_warehouse_directory().warehouses
+
+
+def get_warehouse_directory() -> WbWarehouseDirectory:
+    """Справочник складов, общий для процесса: загружается один раз, дальше из памяти или дискового кэша"""
+    global _warehouse_directory
+    if _warehouse_directory is None:
+        _warehouse_directory = WbWarehouseDirectory()
+    return _warehouse_directory
 
 
-def get_stocks_by_size(sizes: list, wh: dict) -> tuple:
+def get_stocks_by_size(sizes: list, wh: dict, fbs_ids: frozenset | None = None) -> tuple:
+    """:param fbs_ids: Склады FBS, по умолчанию из общего справочника складов"""
+    fbs_ids = get_warehouse_directory().fbs_ids if fbs_ids is None else fbs_ids
     fbs_stock = 0
     fbo_stock = 0
     stock_list = []
@@ -221,8 +211,7 @@ def get_stocks_by_size(sizes: list, wh: dict) -> tuple:
         stocks = size.get('stocks')
         for stock in stocks:
             wh_id = stock.get('wh')
-            # Подольск 3 - 302088
-            if wh_id == 119261 or wh_id == 302088:
+            if wh_id in fbs_ids:
                 fbs_stock += stock.get('qty')
                 stock_list.append({'FBS': stock.get('qty')})
             else:
@@ -232,14 +221,15 @@ def get_stocks_by_size(sizes: list, wh: dict) -> tuple:
     return fbs_stock, fbo_stock, stock_list
 
 
-def get_stocks_by_full_stocks(full_stocks: dict, wh: dict) -> tuple:
+def get_stocks_by_full_stocks(full_stocks: dict, wh: dict, fbs_ids: frozenset | None = None) -> tuple:
+    """:param fbs_ids: Склады FBS, по умолчанию из общего справочника складов"""
+    fbs_ids = get_warehouse_directory().fbs_ids if fbs_ids is None else fbs_ids
     fbs_stock = 0
     fbo_stock = 0
     stock_list = []
 
     for wh_id, stock, in full_stocks.items():
-        # Подольск 3 - 302088, Подольск 4 - 302066
-        if wh_id in [119261, 302066, 302088]:
+        if wh_id in fbs_ids:
             fbs_stock += stock
             stock_list.append({'FBS': stock})
         else:
@@ -251,12 +241,11 @@ def get_stocks_by_full_stocks(full_stocks: dict, wh: dict) -> tuple:
 
 def get_stocks_wh(client: MoySklad, nm_list: list) -> dict:
     cards = get_cards(client, nm_list)
-    offices = get_warehouses(client)
-    warehouses = {warehouse['id']: warehouse for warehouse in offices}
+    directory = get_warehouse_directory()
     if not cards:
         print('Не удалось получить данные по корзине.')
         return {}
-    return {str(card['id']): get_stocks_by_size(card['sizes'], warehouses) for card in cards}
+    return {str(card['id']): get_stocks_by_size(card['sizes'], directory.index, directory.fbs_ids) for card in cards}
 
 
 def get_cards(client: MoySklad, nn_list: list, max_portion: int = 100) -> list:
@@ -269,31 +258,9 @@ def get_cards(client: MoySklad, nn_list: list, max_portion: int = 100) -> list:
     return results
 
 
-def aggregate_stocks(card_data):
-    stocks = {}
-    for size in card_data.get('sizes', []):
-        for stock in size.get('stocks', []):
-            if (wh := stock.get('wh')) is not None:
-                stocks[wh] = stocks.get(wh, 0) + stock.get('qty', 0)
-    return stocks
-
-
 def get_cards_by_dist(client: MoySklad, nn_list: list, max_portion: int = 100) -> dict:
-    # ПВЗ дистанции
-    # 'dest': '-1257786' - Москва
-    # 'dest': '123589328' - Подольск
-    # 'dest': '123585769' - Котовск
-    # 'dest': '-4039473' - Волгоград
-    # 'dest': '123589409' - Екатеринбург
-    # 'dest': '12358283' - Воронеж
-    # 'dest': '12358062' - Краснодар
-    # 'dest': '-364763' - Новосибирск
-    # 'dest': '123585553' - Невинномысск
-    # 'dest': '-2133462' - Казань
-
-    # TODO: WB - Добавить дополнительные точки в случае необходимости
-    dest_tuple = ('-1257786', '123589328', '123585769', '-4039473', '123589409', '12358283', '12358062', '-364763',
-                  '123585553', '-2133462')
+    # ПВЗ дистанции - DEST_LIST, асинхронный вариант - get_cards_by_dist_async
+    dest_tuple = DEST_LIST
     results = {}
     nn_list_len = len(nn_list)
     step = round(nn_list_len / max_portion * 10)
@@ -329,9 +296,9 @@ def get_cards_by_dist(client: MoySklad, nn_list: list, max_portion: int = 100) -
     return results
 
 
-def get_cards_stocks(client: MoySklad, nn_list: list):
+def get_cards_stocks(client: MoySklad, nn_list: list[MsBundle]):
     print("WB: Получение остатка из корзины")
-    cards = get_cards(client, [int(product['code']) for product in nn_list])
+    cards = get_cards(client, [int(product.code) for product in nn_list])
     if not cards:
         print('Не удалось получить данные по корзине.')
         return {}
@@ -347,29 +314,33 @@ def get_cards_prices(client: MoySklad, nn_list: list):
     return {int(card['id']): {**get_prices_info(card['sizes']), 'category': card['subjectId']} for card in cards}
 
 
-def get_stocks_wh_full(client: MoySklad, nm_list: list) -> dict:
+def get_stocks_wh_full(client: MoySklad, nm_list: list, dests: tuple | list = DEST_LIST) -> dict:
     print("WB: Получение остатков из корзины")
-    cards = get_cards_by_dist(client, nm_list)
-    offices = get_warehouses(client)
-    warehouses = {warehouse['id']: warehouse for warehouse in offices}
+    cards = run_sync(get_cards_by_dist_async(nm_list, dests))
+    directory = get_warehouse_directory()
     if not cards:
         print('Не удалось получить данные по корзине.')
         return {}
-    return {str(card_id): get_stocks_by_full_stocks(card['full_stocks'], warehouses) for card_id, card in cards.items()}
+    return {str(card_id): get_stocks_by_full_stocks(card['full_stocks'], directory.index, directory.fbs_ids)
+            for card_id, card in cards.items()}
+
+
+async def get_cards_by_dist_async(nn_list: list, dests: tuple | list = DEST_LIST) -> dict:
+    async with AsyncWbCards() as cards_client:
+        return await cards_client.get_cards_by_dist(nn_list, dests)
 
 
 def get_ms_products_for_wb(client: MoySklad, fbo_stock: bool = False, limiter_list: list = None) -> dict:
     """
     Получение товаров по 'WB'
     """
-    ms_products = client.get_bundles()
     print('Мой склад: Получение товаров')
-    # Отбираем по лимитеру если есть
-    if limiter_list:
-        products_for_project = [product for product in ms_products if product.get('pathName', '') == 'WB' and int(product['code']) in limiter_list]
-    # Отбираем только по проекту
-    else:
-        products_for_project = [product for product in ms_products if product.get('pathName', '') == 'WB']
+    limiter_set = set(limiter_list) if limiter_list else None
+    # Отбираем только по проекту и по лимитеру если есть, постранично по мере получения
+    products_for_project = [
+        product for ms_products in client.iter_bundles(typed=True) for product in ms_products
+        if product.pathName == 'WB' and (limiter_set is None or int(product.code) in limiter_set)
+    ]
 
     print("Мой склад: Получение остатка по товарам")
     stocks = client.get_stock()
@@ -382,15 +353,15 @@ def get_ms_products_for_wb(client: MoySklad, fbo_stock: bool = False, limiter_li
     print("Мой склад: Получение себестоимости товара")
 
     return {
-        int(product_['code']): {
+        int(product_.code): {
             "STOCK": get_stock_for_bundle(ms_stocks, product_),
-            "STOCK_FBS": stock_from_basket.get(product_['code'], (0, 0))[0] if stock_from_basket else 0,
-            "STOCK_FBO": stock_from_basket.get(product_['code'], (0, 0))[1] if stock_from_basket else 0,
-            "PRIME_COST": get_prime_cost(product_.get('salePrices', []), 'Цена основная'),
-            "NAME": product_['name'],
-            "ARTICLE": product_.get('article', ''),
-            "CATEGORY": get_attributes_dict(product_.get('attributes', [])).get('Категория товара', ''),
-            "VOLUME": get_volume(get_attributes_dict(product_.get('attributes', [])))
+            "STOCK_FBS": stock_from_basket.get(product_.code, (0, 0))[0] if stock_from_basket else 0,
+            "STOCK_FBO": stock_from_basket.get(product_.code, (0, 0))[1] if stock_from_basket else 0,
+            "PRIME_COST": get_prime_cost(product_.salePrices, 'Цена основная'),
+            "NAME": product_.name,
+            "ARTICLE": product_.article,
+            "CATEGORY": get_attributes_dict(product_.attributes).get('Категория товара', ''),
+            "VOLUME": get_volume(get_attributes_dict(product_.attributes))
         }
         for product_ in products_for_project
     }
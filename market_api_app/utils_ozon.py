@@ -1,5 +1,5 @@
 import logging
-import math
+import numpy as np
 
 from market_api_app import Ozon
 
@@ -50,7 +50,7 @@ def get_oz_orders(oz_client: Ozon, from_date: str = '12-12-2024', to_date: str =
     :return: Список заказов в разрезе позиций товаров
     """
     print('Ozon: Получение заказов')
-    oz_orders = oz_client.get_orders(from_date, to_date)
+    # Отправления разбираются по мере получения окон периода
     return [
         {
             'order_number': order.get('posting_number', ''),
@@ -59,6 +59,7 @@ def get_oz_orders(oz_client: Ozon, from_date: str = '12-12-2024', to_date: str =
             'price': float(position.get('price', '0.0000')),
             'quantity': position.get('quantity', 0)
         }
+        for oz_orders in oz_client.iter_orders(from_date, to_date)
         for order in oz_orders
         if order.get('status', '') not in ['cancelled']
         for position in order.get('products', [])
@@ -73,83 +74,98 @@ def calculate_logistic_cost(liters: float) -> float:
     * до 190 литров включительно — 12 ₽ за каждый дополнительный литр свыше объёма 1 л;
     * свыше 190 литров — 2344 ₽.
     """
-    if liters <= 0.4:
-        return 43
-    elif 0.4 < liters <= 1:
-        return 76
-    elif 1 < liters <= 190:
-        return 76 + math.ceil((liters - 1)) * 12
-    else:
-        return 2344
+    # Тарифы целые, как и до расчета массивом возвращается int
+    return int(calculate_logistic_cost_bulk([liters])[0])
+
+
+def calculate_logistic_cost_bulk(liters) -> np.ndarray:
+    """calculate_logistic_cost для массива объемов"""
+    liters = np.asarray(liters, dtype=float)
+    return np.select([liters <= 0.4, liters <= 1, liters <= 190],
+                     [43.0, 76.0, 76.0 + np.ceil(liters - 1) * 12], default=2344.0)
+
+
+# Тариф для логистики Москва - Екатеринбург: верхняя граница объема, литры (по возрастанию),
+# стоимость при цене до MSK_EKB_PRICE_THRESHOLD включительно и выше нее
+MSK_EKB_TARIFFS = np.array([
+    [0.200, 17.28, 68.00],
+    [0.400, 19.32, 76.00],
+    [0.600, 21.35, 81.00],
+    [0.800, 22.37, 81.00],
+    [1.000, 23.38, 81.00],
+    [1.250, 25.42, 87.00],
+    [1.500, 26.43, 94.00],
+    [1.750, 27.45, 94.00],
+    [2.000, 29.48, 94.00],
+    [3.000, 31.52, 96.00],
+    [4.000, 35.58, 118.00],
+    [5.000, 38.63, 141.00],
+    [6.000, 42.70, 141.00],
+    [7.000, 57.95, 162.00],
+    [8.000, 62.02, 167.00],
+    [9.000, 65.07, 169.00],
+    [10.000, 69.13, 169.00],
+    [11.000, 79.30, 181.00],
+    [12.000, 83.37, 181.00],
+    [13.000, 87.43, 182.00],
+    [14.000, 92.52, 191.00],
+    [15.000, 96.58, 211.00],
+    [17.000, 96.58, 228.00],
+    [20.000, 110.82, 253.00],
+    [25.000, 118.95, 296.00],
+    [30.000, 131.15, 345.00],
+    [35.000, 146.40, 391.00],
+    [40.000, 156.57, 436.00],
+    [45.000, 175.88, 492.00],
+    [50.000, 189.10, 532.00],
+    [60.000, 207.40, 575.00],
+    [70.000, 230.78, 664.00],
+    [80.000, 249.08, 788.00],
+    [90.000, 274.50, 891.00],
+    [100.000, 284.67, 1000.00],
+    [125.000, 331.43, 1129.00],
+    [150.000, 381.25, 1357.00],
+    [175.000, 436.15, 1532.00],
+    [200.000, 483.93, 1861.00],
+    [400.000, 805.20, 2939.00],
+    [600.000, 805.20, 4240.00],
+    [800.000, 805.20, 5533.00],
+    [np.inf, 805.20, 6718.00],
+])
+MSK_EKB_MAX_VOLUME = MSK_EKB_TARIFFS[:, 0].copy()
+MSK_EKB_COST_LOW = MSK_EKB_TARIFFS[:, 1].copy()
+MSK_EKB_COST_HIGH = MSK_EKB_TARIFFS[:, 2].copy()
+MSK_EKB_PRICE_THRESHOLD = 300.0
 
 
 def get_logistic_msk_ekb(price: float, liters: float) -> float:
-    # Таблица в виде списка кортежей (min_vol, max_vol, price_le_300, price_gt_300)
-    # Тариф для логистики Москва - Екатеринбург
-    tariff_table = [
-        (0.200, 17.28, 68.00),
-        (0.400, 19.32, 76.00),
-        (0.600, 21.35, 81.00),
-        (0.800, 22.37, 81.00),
-        (1.000, 23.38, 81.00),
-        (1.250, 25.42, 87.00),
-        (1.500, 26.43, 94.00),
-        (1.750, 27.45, 94.00),
-        (2.000, 29.48, 94.00),
-        (3.000, 31.52, 96.00),
-        (4.000, 35.58, 118.00),
-        (5.000, 38.63, 141.00),
-        (6.000, 42.70, 141.00),
-        (7.000, 57.95, 162.00),
-        (8.000, 62.02, 167.00),
-        (9.000, 65.07, 169.00),
-        (10.000, 69.13, 169.00),
-        (11.000, 79.30, 181.00),
-        (12.000, 83.37, 181.00),
-        (13.000, 87.43, 182.00),
-        (14.000, 92.52, 191.00),
-        (15.000, 96.58, 211.00),
-        (17.000, 96.58, 228.00),
-        (20.000, 110.82, 253.00),
-        (25.000, 118.95, 296.00),
-        (30.000, 131.15, 345.00),
-        (35.000, 146.40, 391.00),
-        (40.000, 156.57, 436.00),
-        (45.000, 175.88, 492.00),
-        (50.000, 189.10, 532.00),
-        (60.000, 207.40, 575.00),
-        (70.000, 230.78, 664.00),
-        (80.000, 249.08, 788.00),
-        (90.000, 274.50, 891.00),
-        (100.000, 284.67, 1000.00),
-        (125.000, 331.43, 1129.00),
-        (150.000, 381.25, 1357.00),
-        (175.000, 436.15, 1532.00),
-        (200.000, 483.93, 1861.00),
-        (400.000, 805.20, 2939.00),
-        (600.000, 805.20, 4240.00),
-        (800.000, 805.20, 5533.00),
-        (float('inf'), 805.20, 6718.00)
-    ]
-    # Поиск индекса соответствующему liters
-    left, right = 0, len(tariff_table) - 1
-    while left < right:
-        mid = (left + right) // 2
-        if liters <= tariff_table[mid][0]:
-            right = mid
-        else:
-            left = mid + 1
+    return float(get_logistic_msk_ekb_bulk([price], [liters])[0])
 
-    _, cost_low, cost_high = tariff_table[left]
-    return cost_low if price <= 300 else cost_high
+
+def get_logistic_msk_ekb_bulk(prices, liters) -> np.ndarray:
+    """Логистика Москва - Екатеринбург для массивов цен и объемных весов одним поиском по таблице"""
+    prices = np.asarray(prices, dtype=float)
+    # Первая строка, у которой верхняя граница не меньше объема. NaN - за пределами таблицы,
+    # для него, как и при поиске без массивов, берется последняя строка
+    rows = np.searchsorted(MSK_EKB_MAX_VOLUME, np.asarray(liters, dtype=float), side='left')
+    rows = np.minimum(rows, len(MSK_EKB_MAX_VOLUME) - 1)
+    return np.where(prices <= MSK_EKB_PRICE_THRESHOLD, MSK_EKB_COST_LOW[rows], MSK_EKB_COST_HIGH[rows])
 
 
 def calculate_last_mile_cost(price: float) -> float:
     """
     Считает стоимость последней мили как LAST_MILE_PERCENT % от цены, но не более LAST_MILE_MAX рублей.
     """
-    cost = round(price * LAST_MILE_PERCENT / 100, 1)
-    return min(cost, LAST_MILE_MAX)
+    return float(calculate_last_mile_cost_bulk([price])[0])
+
+
+def calculate_last_mile_cost_bulk(prices) -> np.ndarray:
+    """
+    calculate_last_mile_cost для массива цен.
+    Округление round() для каждого значения: np.round на значениях вида x.x5 округляет иначе
+    """
+    costs = np.asarray(prices, dtype=float) * LAST_MILE_PERCENT / 100
+    return np.minimum(np.array([round(cost, 1) for cost in costs.tolist()], dtype=float), LAST_MILE_MAX)
 
 
 def search_new_price(price: float, profitability: float, plan_profitability: float, kkk: float) -> ():
@@ -1,6 +1,8 @@
-import time
+import pandas as pd
 from market_api_app import WB
 from market_api_app.utils import get_date_for_request
+from market_api_app.wb_orders import WbOrderStore, FbsOrderPipeline, FbsOrderIndex
+from market_api_app.wb_tariffs import WbLogisticsTariffs, DEFAULT_WAREHOUSE
 
 FBS_COMMISSION = -3.5  # Принудительное повышение комиссии FBS на 0.0% над FBO, так как нет по API
 ACQUIRING_PERCENT = 2.0  # Эквайринг, % по умолчанию
@@ -65,11 +67,11 @@ def get_category_subject_id_dict(wb_client: WB) -> dict:
 
 
 def get_price_dict(wb_client: WB) -> dict:
-    product_prices = wb_client.get_product_prices()
+    product_prices = wb_client.get_product_prices(typed=True, parallel=True)
     # Если несколько размеров, то берет максимальную цену и дисконт
-    price_dict = {d['nmID']: {
-        'price': max(s['discountedPrice'] for s in d['sizes']),
-        'discount': d['discount']
+    price_dict = {d.nmID: {
+        'price': max(s.discountedPrice for s in d.sizes),
+        'discount': d.discount
     } for d in product_prices}
 
     return price_dict
@@ -220,15 +222,11 @@ def get_wb_data_for_article(nm_id: int, product: dict, prices_dict: dict, catego
 
 
 def get_order_data(order: dict, product: dict, base_dict: dict, plan_margin: float, acquiring: float = ACQUIRING_PERCENT,
-                   fbs: bool = True) -> dict:
+                   fbs: bool = True, logistics: float | None = None) -> dict:
+    """:param logistics: Логистика, заранее рассчитанная для всех заказов (get_orders_logistics), None - расчет здесь"""
     wb_prices_dict = base_dict['wb_prices_dict']
-    if fbs:
-        # logistic_dict = get_logistic_dict(base_dict['tariffs_data'], warehouse_name='Маркетплейс: Центральный '
-        #                                                                             'федеральный округ', fbs=True)
-        logistic_dict = get_logistic_dict(base_dict['tariffs_data'], warehouse_name='Свой склад РФ', fbs=True)
-    else:
-        logistic_dict = get_logistic_dict(base_dict['tariffs_data'],
-                                          warehouse_name=order.get('warehouseName', 'Свой склад РФ'))
+    if logistics is None:
+        logistics = float(get_orders_logistics([order], [product], base_dict, [fbs])[0])
 
     nm_id = order.get('nmId', '')
     # Получение цены
@@ -252,13 +250,6 @@ def get_order_data(order: dict, product: dict, base_dict: dict, plan_margin: flo
     else:
         commission = commissions[0] + FBS_COMMISSION if fbs else commissions[1]
 
-    volume = product.get('VOLUME', 0.0)
-    # logistics = get_logistics(logistic_dict['KTR'], logistic_dict['TARIFF_FOR_BASE_L'], logistic_dict['TARIFF_BASE'],
-    #                           logistic_dict['TARIFF_OVER_BASE'], logistic_dict['WH_COEFFICIENT'], volume)
-    logistics = get_logistics_new(ktr=logistic_dict['KTR'], volume=volume,
-                                  logistics_coefficient=logistic_dict['LOGISTICS_COEFFICIENT'],
-                                  logistics_first_liter=logistic_dict['LOGISTICS_FIRST_LITER'],
-                                  logistics_extra_liter=logistic_dict['LOGISTICS_EXTRA_LITER'])
 
     commission_cost = round(commission / 100 * price, 1)
     acquiring_cost = round(acquiring / 100 * price, 1)
@@ -306,56 +297,164 @@ def get_order_data(order: dict, product: dict, base_dict: dict, plan_margin: flo
     return data
 
 
-def wb_get_orders(wb_client: WB, start_of_day: str, end_of_day: str):
-    fbo_tuple_from_date, from_date_for_fbs, to_date_for_fbs = get_date_for_request(start_of_day, end_of_day)
-    wb_orders = []
-    total_dates = len(fbo_tuple_from_date)
-    for i, from_date in enumerate(fbo_tuple_from_date):
-        wb_orders.extend(wb_client.get_orders(from_date))
-        if i < total_dates - 1:
-            time.sleep(20)
+def get_tariffs_table(base_dict: dict) -> WbLogisticsTariffs:
+    """Тарифы логистики из base_dict['tariffs_data'], разбираются один раз и сохраняются в base_dict"""
+    if 'tariffs_table' not in base_dict:
+        base_dict['tariffs_table'] = WbLogisticsTariffs(base_dict['tariffs_data'])
+    return base_dict['tariffs_table']
+
+
+def get_orders_logistics(orders: list, products: list, base_dict: dict, fbs: list):
+    """
+    Логистика сразу для списка заказов: orders[i] с товаром products[i], fbs[i] - модель заказа.
+    FBS считается по тарифу 'Свой склад РФ', FBO - по складу заказа
+    """
+    # FBS тариф 'Маркетплейс: Центральный федеральный округ' при необходимости задается здесь
+    warehouse_names = [DEFAULT_WAREHOUSE if is_fbs else order.get('warehouseName', DEFAULT_WAREHOUSE)
+                       for order, is_fbs in zip(orders, fbs)]
+    volumes = [product.get('VOLUME', 0.0) for product in products]
+    return get_tariffs_table(base_dict).logistics(volumes, warehouse_names)
+
 
+def load_wb_orders(wb_client: WB, start_of_day: str, end_of_day: str,
+                   store: WbOrderStore | None = None) -> tuple[list, FbsOrderIndex]:
+    """
+    Заказы статистики за период и индекс сборочных заданий FBS для их разделения на модели
+    :param store: Локальное хранилище заказов: вместо запроса по каждому дню периода догружаются только изменения
+    RuntimeError - задания FBS получены не полностью, заказы нельзя разделить на FBS и FBO
+    """
+    fbo_tuple_from_date, from_date_for_fbs, to_date_for_fbs = get_date_for_request(start_of_day, end_of_day)
+    # Сборочные задания FBS загружаются и индексируются в фоне, пока запрашиваются заказы статистики
     # Запас +/- 3ч - 10800(6ч - 21600)
-    wb_orders_fbs = wb_client.get_orders_fbs(from_date=from_date_for_fbs - 10800, to_date=to_date_for_fbs + 10800)
-    rids = {order_fbs.get('rid') for order_fbs in wb_orders_fbs}
-
-    orders_fbs_cancel = []
-    orders_fbo_cancel = []
-    orders_fbs = []
-    orders_fbo = []
-    nm_ids_fbs = []
-    nm_ids_fbo = []
-
-    for order in wb_orders:
-        srid = order.get('srid')
-        # order_type = order.get('orderType')
-        is_cancel = order.get('isCancel')
-
-        # if order_type == 'Клиентский' and not is_cancel:
-        if not is_cancel:
-            if order.get('srid') in rids:
-                orders_fbs.append(order)
-                nm_ids_fbs.append(order.get('nmId'))
-            else:
-                orders_fbo.append(order)
-                nm_ids_fbo.append(order.get('nmId'))
-        else:
-            if srid in rids:
-                orders_fbs_cancel.append(order)
-            else:
-                orders_fbo_cancel.append(order)
+    fbs_pipeline = FbsOrderPipeline(wb_client, from_date_for_fbs - 10800, to_date_for_fbs + 10800).start()
+
+    if store is not None:
+        store.sync(wb_client, start_of_day)
+        wb_orders = store.get_orders(start_of_day, end_of_day)
+    else:
+        wb_orders = []
+        # Паузу между днями выдерживает общий ограничитель запросов WB.rate_limiter
+        for from_date in fbo_tuple_from_date:
+            wb_orders.extend(wb_client.get_orders(from_date))
+
+    return wb_orders, fbs_pipeline.result()
+
 
+def print_orders_summary(fbs: int, fbs_cancel: int, fbo: int, fbo_cancel: int):
     print(f"{'Модель':<15}{'Количество':<10}")
     print('-' * 25)
-    print(f"{'FBS':<15}{len(orders_fbs):<10}")
-    print(f"{'FBS отмены':<15}{len(orders_fbs_cancel):<10}")
-    print(f"{'FBO':<15}{len(orders_fbo):<10}")
-    print(f"{'FBO отмены':<15}{len(orders_fbo_cancel):<10}")
+    print(f"{'FBS':<15}{fbs:<10}")
+    print(f"{'FBS отмены':<15}{fbs_cancel:<10}")
+    print(f"{'FBO':<15}{fbo:<10}")
+    print(f"{'FBO отмены':<15}{fbo_cancel:<10}")
     print('-' * 25)
-    print(f"{'Всего заказов':<15}{len(wb_orders):<10}")
-    print(f"{'Без отмены':<15}{len(wb_orders) - len(orders_fbs_cancel) - len(orders_fbo_cancel):<10}")
+    print(f"{'Всего заказов':<15}{fbs + fbs_cancel + fbo + fbo_cancel:<10}")
+    print(f"{'Без отмены':<15}{fbs + fbo:<10}")
 
-    return orders_fbs, orders_fbo, set(nm_ids_fbs), set(nm_ids_fbo)
+
+def wb_get_orders(wb_client: WB, start_of_day: str, end_of_day: str, store: WbOrderStore | None = None):
+    """
+    :param store: Локальное хранилище заказов: вместо запроса по каждому дню периода догружаются только изменения
+    """
+    wb_orders, fbs_index = load_wb_orders(wb_client, start_of_day, end_of_day, store)
+    orders = fbs_index.split(wb_orders)
+    print_orders_summary(len(orders.fbs), len(orders.fbs_cancel), len(orders.fbo), len(orders.fbo_cancel))
+    return orders.fbs, orders.fbo, orders.nm_ids_fbs, orders.nm_ids_fbo
+
+
+def wb_get_orders_frame(wb_client: WB, start_of_day: str, end_of_day: str,
+                        store: WbOrderStore | None = None) -> pd.DataFrame:
+    """Вариант wb_get_orders: все заказы одной таблицей (FbsOrderIndex.to_frame) с признаками is_fbs и isCancel"""
+    wb_orders, fbs_index = load_wb_orders(wb_client, start_of_day, end_of_day, store)
+    orders = fbs_index.to_frame(wb_orders)
+    counts = orders.groupby(['is_fbs', 'isCancel']).size()
+    print_orders_summary(*(int(counts.get((is_fbs, is_cancel), 0))
+                           for is_fbs, is_cancel in ((True, False), (True, True), (False, False), (False, True))))
+    return orders
+
+
+def round_values(values: pd.Series, ndigits: int) -> pd.Series:
+    """
+    round() для каждого значения, как в get_order_data.
+    Series.round умножает на 10 ** ndigits и на значениях вида x.x5 округляет иначе, чем round()
+    """
+    return pd.Series([round(value, ndigits) for value in values.tolist()], index=values.index, dtype=float)
+
+
+def get_orders_report_frame(orders: pd.DataFrame, products: dict, base_dict: dict, plan_margin: float,
+                            acquiring: float = ACQUIRING_PERCENT) -> tuple[pd.DataFrame, list]:
+    """
+    Рентабельность заказов таблицей: расчет get_order_data сразу для всех строк orders (wb_get_orders_frame).
+    Заказы соединяются с товарами МойСклад {nmId: товар} по nmId. Округление на тех же шагах и тем же round(),
+    что и в get_order_data, поэтому значения совпадают.
+    :return: Таблица с колонками get_order_data и nmId заказов (по одному на заказ), для которых нет товара в МойСклад
+    """
+    products_df = pd.DataFrame.from_dict(products, orient='index')
+    df = orders.merge(products_df, how='left', left_on='nmId', right_index=True, indicator=True)
+    not_in_ms = df.loc[df['_merge'] == 'left_only', 'nmId'].tolist()
+    df = df[df['_merge'] == 'both'].reset_index(drop=True)
+    is_fbs = df['is_fbs'].to_numpy()
+
+    wb_prices_dict = base_dict['wb_prices_dict']
+    order_price = round_values(df['finishedPrice'], 1)
+    price = df['nmId'].map({nm_id: float(p.get('price', 0.0)) for nm_id, p in wb_prices_dict.items()}).fillna(0.0)
+    price = price.where(price != 0, order_price)
+    discount = df['nmId'].map({nm_id: float(p.get('discount', 0)) for nm_id, p in wb_prices_dict.items()}).fillna(0)
+    discount = discount.where(discount != 0, df['discountPercent'])
+    prime_cost = df['PRIME_COST'].fillna(0.0)
+
+    category_dict = base_dict.get('category_dict', {})
+    commissions = df['CATEGORY'].map(category_dict)
+    if commissions.isna().any():
+        print(f'Не удалось определить комиссию по категории для {", ".join(map(str, set(df.loc[commissions.isna(), "nmId"])))}'
+              f' по умолчанию указал 30%')
+    commission_fbs = commissions.map(lambda c: c[0] + FBS_COMMISSION, na_action='ignore')
+    commission_fbo = commissions.map(lambda c: c[1], na_action='ignore')
+    commission = commission_fbs.where(is_fbs, commission_fbo).fillna(30.0).astype(float)
+
+    warehouse_names = df['warehouseName'].where(~df['is_fbs'], DEFAULT_WAREHOUSE).replace('', DEFAULT_WAREHOUSE)
+    logistics = pd.Series(get_tariffs_table(base_dict).logistics(df['VOLUME'].fillna(0.0), warehouse_names),
+                          index=df.index)
+
+    commission_cost = round_values(commission / 100 * price, 1)
+    acquiring_cost = round_values(acquiring / 100 * price, 1)
+    reward = round_values(commission_cost + acquiring_cost + logistics, 1)
+    profit = round_values(price - prime_cost - reward, 1)
+
+    recommended_price = round_values((prime_cost + logistics) /
+                                     (1 - plan_margin / 100 - commission / 100 - acquiring / 100), 0)
+    recommended_price = recommended_price.clip(lower=60.0)
+
+    order_commission_cost = round_values(commission / 100 * order_price, 1)
+    order_acquiring_cost = round_values(acquiring / 100 * order_price, 1)
+    order_reward = round_values(order_commission_cost + order_acquiring_cost + logistics, 1)
+    order_profit = round_values(order_price - prime_cost - order_reward, 1)
+
+    report = pd.DataFrame({
+        'name': df['NAME'].fillna(''),
+        'article': df['ARTICLE'].fillna(''),
+        'nm_id': df['nmId'],
+        'url': 'https://www.wildberries.ru/catalog/' + df['nmId'].astype(str) + '/detail.aspx',
+        'stock': df['STOCK'].fillna(0.0),
+        'stock_fbs': df['STOCK_FBS'].fillna(0),
+        'stock_fbo': df['STOCK_FBO'].fillna(0),
+        'order_create': df['date'],
+        'order_name': df['is_fbs'].map({True: 'FBS_', False: 'FBO_'}) + df['sticker'].astype(str),
+        'quantity': 1,
+        'discount': discount,
+        'price': price,
+        'order_price': order_price,
+        'recommended_price': recommended_price,
+        'prime_cost': prime_cost,
+        'commission': commission_cost,
+        'acquiring': acquiring_cost,
+        'logistics': logistics,
+        'profit': profit,
+        'profitability': round_values(profit / price * 100, 1),
+        'order_profit': order_profit,
+        'order_profitability': round_values(order_profit / order_price * 100, 1)
+    })
+    return report, not_in_ms
 
 
 if __name__ == '__main__':
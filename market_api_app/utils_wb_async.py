@@ -1,5 +1,4 @@
 import asyncio
-import aiohttp
 import platform
 import pandas as pd
 import numpy as np
@@ -7,76 +6,24 @@ import logging
 
 from market_api_app import get_api_keys, MoySklad, ExcelStyle
 from market_api_app.utils_ms import get_ms_products_for_wb, get_stocks_info, get_prices_info
+from market_api_app.wb_cards import AsyncWbCards, MAX_PARALLEL_CARD_REQUESTS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('WB ASYNC')
 
 
-async def get_data(session, url, headers, params, max_retries=5, delay_seconds=30):
-    for attempt in range(1, max_retries + 1):
-        try:
-            async with session.get(url=url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    logger.info(
-                        f'Неудачный запрос, статус: {response.status}. Повтор через {delay_seconds} секунд.')
-                    await asyncio.sleep(delay_seconds)
-        except aiohttp.ClientError as e:
-            logger.info(f'Ошибка при отправке запроса на {url}: {e}')
-            await asyncio.sleep(delay_seconds)
-
-    logger.info(f'Достигнуто максимальное количество попыток ({max_retries}). Прекращение повторных запросов.')
-    return None
-
-
-async def get_cards_detail(nm_ids: str):
-
-    url = 'https://card.wb.ru/cards/v2/detail'
-
-    headers = {
-        'Accept': '*/*',
-        'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-        'Connection': 'keep-alive',
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
-                      'Chrome/134.0.0.0 Safari/537.36',
-        'sec-ch-ua': '"Chromium";v="134", "Google Chrome";v="134", "Not:A-Brand";v="24"',
-        'sec-ch-ua-mobile': '?0',
-        'sec-ch-ua-platform': '"Windows"'
-    }
-
-    params = {
-        'curr': 'rub',
-        'dest': '-1257786',
-        'appType': '1',
-        'spp': '30',
-        'nm': nm_ids,
-    }
-    try:
-        async with aiohttp.ClientSession() as session:
-            products = []
-            result = await get_data(session, url=url, headers=headers, params=params)
-            if result:
-                products = result.get('data').get('products')
-                return products
-            else:
-                return products
-
-    except aiohttp.ClientError as e:
-        print(f'Произошла ошибка при выполнении запроса: {e}')
+def create_cards_client() -> AsyncWbCards:
+    """
+    Один клиент карточек на отчет: общая сессия с пулом соединений и кэшем DNS, не более
+    MAX_PARALLEL_CARD_REQUESTS одновременных запросов; неудачная часть повторяется с экспоненциальной задержкой
+    """
+    return AsyncWbCards(max_retries=5, delay_seconds=30, limit=MAX_PARALLEL_CARD_REQUESTS)
 
 
 async def get_cards_async(nn_list: list, max_portion=100):
-    tasks = []
-
-    for i in range(0, len(nn_list), max_portion):
-        portion = ';'.join(map(str, nn_list[i:i + max_portion]))
-        task = asyncio.create_task(get_cards_detail(portion))
-        tasks.append(task)
-
-    results = await asyncio.gather(*tasks)
-    all_products = [product for result in results if result for product in result]
-    return all_products
+    async with create_cards_client() as cards_client:
+        return [product async for products in cards_client.iter_cards(nn_list, max_portion=max_portion)
+                for product in products]
 
 
 async def get_wb_fbo_stock():
@@ -88,22 +35,26 @@ async def get_wb_fbo_stock():
     nn_list = list(ms_wb_products.keys())
 
     logger.info(f'Исход: {len(nn_list)}')
-    products = await get_cards_async(nn_list)
     print('WB: Получение остатка по товарам FBO')
-    logger.info(f'Результат: {len(products)}')
-
-    for prod in products:
-        fbs_stock, fbo_stock = get_stocks_info(prod.get('sizes'))
-
-        if fbo_stock:
-            nm_id = prod.get('id')
-            web_url = f'https://www.wildberries.ru/catalog/{nm_id}/detail.aspx'
-            cost_one = ms_wb_products[nm_id].get('PRIME_COST', 0.0)
-            product_name = ms_wb_products[nm_id].get('NAME', 'БЕЗ ИМЕНИ')
-            cost_full = fbo_stock * cost_one
-            # if fbs_stock > 0:
-            #     print(f'{nm_id} - FBS {fbs_stock} - FBO {fbo_stock}')
-            update_data.append([product_name, nm_id, web_url, cost_one, fbo_stock, cost_full])
+    received = 0
+    async with create_cards_client() as cards_client:
+        # Карточки обрабатываются по мере получения частей
+        async for products in cards_client.iter_cards(nn_list):
+            received += len(products)
+            for prod in products:
+                fbs_stock, fbo_stock = get_stocks_info(prod.get('sizes'))
+
+                if fbo_stock:
+                    nm_id = prod.get('id')
+                    web_url = f'https://www.wildberries.ru/catalog/{nm_id}/detail.aspx'
+                    cost_one = ms_wb_products[nm_id].get('PRIME_COST', 0.0)
+                    product_name = ms_wb_products[nm_id].get('NAME', 'БЕЗ ИМЕНИ')
+                    cost_full = fbo_stock * cost_one
+                    # if fbs_stock > 0:
+                    #     print(f'{nm_id} - FBS {fbs_stock} - FBO {fbo_stock}')
+                    update_data.append([product_name, nm_id, web_url, cost_one, fbo_stock, cost_full])
+
+    logger.info(f'Результат: {received}')
 
     if update_data:
         # Заголовки столбцов
@@ -128,23 +79,27 @@ async def get_wb_prices(nn_list: list):
     ms_wb_products = get_ms_products_for_wb(ms_client)
     # nn_list = list(ms_wb_products.keys())
     logger.info(f'Исход: {len(nn_list)}')
-    products = await get_cards_async(nn_list)
     print('WB: Получение остатка по товарам FBO')
-    logger.info(f'Результат: {len(products)}')
-
-    for prod in products:
-        shop_price, basket_price = get_prices_info(prod.get('sizes'))
-
-        if shop_price:
-            nm_id = prod.get('id')
-            web_url = f'https://www.wildberries.ru/catalog/{nm_id}/detail.aspx'
-            cost_one = ms_wb_products[nm_id].get('PRIME_COST', 0.0)
-            product_name = ms_wb_products[nm_id].get('NAME', 'БЕЗ ИМЕНИ')
-            shop_price = round(shop_price, 2)
-            basket_price = round(basket_price, 2)
-            # if fbs_stock > 0:
-            #     print(f'{nm_id} - FBS {fbs_stock} - FBO {fbo_stock}')
-            update_data.append([product_name, nm_id, web_url, cost_one, shop_price, basket_price])
+    received = 0
+    async with create_cards_client() as cards_client:
+        # Карточки обрабатываются по мере получения частей
+        async for products in cards_client.iter_cards(nn_list):
+            received += len(products)
+            for prod in products:
+                shop_price, basket_price = get_prices_info(prod.get('sizes'))
+
+                if shop_price:
+                    nm_id = prod.get('id')
+                    web_url = f'https://www.wildberries.ru/catalog/{nm_id}/detail.aspx'
+                    cost_one = ms_wb_products[nm_id].get('PRIME_COST', 0.0)
+                    product_name = ms_wb_products[nm_id].get('NAME', 'БЕЗ ИМЕНИ')
+                    shop_price = round(shop_price, 2)
+                    basket_price = round(basket_price, 2)
+                    # if fbs_stock > 0:
+                    #     print(f'{nm_id} - FBS {fbs_stock} - FBO {fbo_stock}')
+                    update_data.append([product_name, nm_id, web_url, cost_one, shop_price, basket_price])
+
+    logger.info(f'Результат: {received}')
 
     if update_data:
         # Заголовки столбцов
@@ -1,6 +1,6 @@
 import logging
 from market_api_app import YaMarket
-from market_api_app.utils import get_api_keys, get_value_by_name
+from market_api_app.utils import get_api_keys
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('YM Utils')
@@ -90,11 +90,11 @@ def get_dict_for_commission(ym_client: YaMarket, campaign_id: int, offers: list,
     }
 
     # Если будет необходимость можно вынести параметр selling_program, чтобы получать не по проекту, а по типу FBS/FBY
-    commission = ym_client.get_categories(campaign_id=campaign_id, offers=offers_data)
+    commission = ym_client.get_categories(campaign_id=campaign_id, offers=offers_data, typed=True)
 
     commission_dict = {}
     for i, comm in enumerate(commission):
-        tariffs = comm.get("tariffs", [])
+        tariffs = comm.tariffs
         tariff_values = {
             "PRICE": 0.0,
             "FEE": {"current_amount": 0.0, "percent": 0.0},
@@ -117,48 +117,45 @@ def get_dict_for_commission(ym_client: YaMarket, campaign_id: int, offers: list,
         }
 
         for tariff in tariffs:
-            tariff_type = tariff.get("type")
-            amount = tariff.get("amount", 0.0)
-            parameters = tariff.get("parameters", [])
+            tariff_type = tariff.type
+            amount = tariff.amount
+            parameters = {parameter.name: parameter.value for parameter in tariff.parameters}
 
             if tariff_type == "FEE" and parameters:
                 tariff_values["FEE"]["current_amount"] = amount
                 tariff_values["FEE"]["percent"] = float(
-                    get_value_by_name(parameters, "value")
+                    parameters.get("value")
                 )
 
             elif tariff_type == "PAYMENT_TRANSFER" and parameters:
                 tariff_values["PAYMENT_TRANSFER"]["current_amount"] = amount
                 tariff_values["PAYMENT_TRANSFER"]["percent"] = float(
-                    get_value_by_name(parameters, "value")
+                    parameters.get("value")
                 )
 
             elif tariff_type == "DELIVERY_TO_CUSTOMER" and parameters:
                 tariff_values["DELIVERY_TO_CUSTOMER"]["current_amount"] = amount
                 tariff_values["DELIVERY_TO_CUSTOMER"]["percent"] = float(
-                    get_value_by_name(parameters, "value")
+                    parameters.get("value")
                 )
                 tariff_values["DELIVERY_TO_CUSTOMER"]["max_value"] = float(
-                    get_value_by_name(parameters, "maxValue")
+                    parameters.get("maxValue")
                 )
 
             elif tariff_type == "EXPRESS_DELIVERY" and parameters:
                 tariff_values["EXPRESS_DELIVERY"]["current_amount"] = amount
                 tariff_values["EXPRESS_DELIVERY"]["percent"] = float(
-                    get_value_by_name(parameters, "value")
+                    parameters.get("value")
                 )
                 tariff_values["EXPRESS_DELIVERY"]["min_value"] = float(
-                    get_value_by_name(parameters, "minValue")
+                    parameters.get("minValue")
                 )
                 tariff_values["EXPRESS_DELIVERY"]["max_value"] = float(
-                    get_value_by_name(parameters, "maxValue")
+                    parameters.get("maxValue")
                 )
 
             elif tariff_type == "SORTING" and parameters:
-                if (
-                        get_value_by_name(parameters, "transitWarehouseType")
-                        == transit_warehouse_type
-                ):
+                if parameters.get("transitWarehouseType") == transit_warehouse_type:
                     tariff_values["SORTING"] = amount
 
             elif tariff_type in tariff_values:
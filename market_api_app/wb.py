@@ -1,14 +1,21 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import count, islice
 import logging
 from market_api_app.base import ApiBase
+from market_api_app.schemas import WbGoodsResponse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('WB')
 
+MAX_PARALLEL_PRICE_REQUESTS = 5  # Размер всплеска лимита discounts-prices-api
+STOCKS_REPORT_LIMIT = 1000  # Максимум товаров на странице stocks-report
+
 
 class WB(ApiBase):
-    def __init__(self, api_key: str):
-        super().__init__()
+    def __init__(self, api_key: str, **kwargs):
+        super().__init__(**kwargs)
         self.headers = {'Authorization': api_key, 'Content-Type': 'application/json'}
         self.domain = 'wildberries.ru'
         self.host = f'https://marketplace-api.{self.domain}/'
@@ -16,8 +23,8 @@ class WB(ApiBase):
     def get_commission(self):
         logger.info(f'Получение комиссий по категориям')
         url = f'https://common-api.{self.domain}/api/v1/tariffs/commission'
-        result = self.get(url, {'locale': 'ru'})
-        response_json = result.json() if result else []
+        result = self.get(url, {'locale': 'ru'}, cache=True, coalesce=True)
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось получить данные о комиссиях.')
         return response_json
@@ -27,58 +34,101 @@ class WB(ApiBase):
         url = f'https://common-api.{self.domain}/api/v1/tariffs/box'
         current_date = datetime.now().strftime('%Y-%m-%d')
         params = {'date': current_date}
-        result = self.get(url, params)
-        response_json = result.json() if result else []
+        result = self.get(url, params, coalesce=True)
+        response_json = self.decode(result) if result else []
         dt_till_max = response_json.get('response', {}).get('data', {}).get('dtTillMax')
         if dt_till_max != current_date:
             params = {'date': dt_till_max}
-            result = self.get(url, params)
-            response_json = result.json() if result else []
+            result = self.get(url, params, coalesce=True)
+            response_json = self.decode(result) if result else []
 
         if not result:
             logger.error('Не удалось получить данные о тарифах логистики.')
         return response_json
 
-    def get_product_prices(self):
+    def get_product_prices(self, typed: bool = False, parallel: bool = False,
+                           max_workers: int = MAX_PARALLEL_PRICE_REQUESTS):
+        return [product for products in self.iter_product_prices(typed, parallel, max_workers) for product in products]
+
+    def iter_product_prices(self, typed: bool = False, parallel: bool = False,
+                            max_workers: int = MAX_PARALLEL_PRICE_REQUESTS):
+        """
+        Постраничная выборка цен по 1000 товаров, выборка заканчивается на неполной странице.
+        :param typed: Товары в виде WbGoods (только используемые поля) вместо dict
+        :param parallel: Запрашивать вперед до max_workers страниц одновременно, темп задает общий rate_limiter.
+                         Страницы возвращаются в порядке смещений
+        """
         print(f'Получение актуальных цен и дисконта')
         url = f'https://discounts-prices-api.{self.domain}/api/v2/list/goods/filter'
-        params = {'limit': 1000, 'offset': 0}
+        limit = 1000
+
+        def fetch_page(offset):
+            result = self.get(url, {'limit': limit, 'offset': offset})
+            if not result:
+                logger.error(f'Не удалось получить данные о ценах, смещение {offset}.')
+                return None
+            if typed:
+                return self.decode(result, WbGoodsResponse).data.listGoods
+            return self.decode(result).get('data', {}).get('listGoods', [])
+
+        offsets = count(0, limit)
+        if not parallel:
+            for offset in offsets:
+                list_goods = fetch_page(offset)
+                if list_goods:
+                    yield list_goods
+                if list_goods is None or len(list_goods) < limit:
+                    break
+            return
 
-        products_list = []
-        while True:
-            result = self.get(url, params)
-            if result:
-                response_json = result.json()
-                list_goods = response_json.get('data', {}).get('listGoods', [])
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = deque(executor.submit(fetch_page, offset) for offset in islice(offsets, max_workers))
+            while futures:
+                list_goods = futures.popleft().result()
                 if list_goods:
-                    products_list += list_goods
-                    params['offset'] += params['limit']
-                else:
+                    yield list_goods
+                if list_goods is None or len(list_goods) < limit:
+                    # Последняя страница получена, еще не начатые запросы отменяются
+                    for future in futures:
+                        future.cancel()
                     break
-            else:
-                logger.error('Не удалось получить данные о ценах.')
-                break
-        return products_list
+                futures.append(executor.submit(fetch_page, next(offsets)))
 
-    def get_orders(self, from_data):
+    def get_orders(self, from_data, flag: int = 1):
         url = f'https://statistics-api.{self.domain}/api/v1/supplier/orders'
-        params = {'dateFrom': from_data, 'flag': 1}
+        params = {'dateFrom': from_data, 'flag': flag}
         result = self.get(url, params)
-        response_json = result.json() if result else []
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось получить данные о заказах.')
         return response_json
 
-    def get_sales(self, from_data):
+    def get_order_changes(self, last_change_date: str) -> list | None:
+        """
+        Заказы, измененные начиная с last_change_date (flag=0), не более 80000 строк за запрос.
+        None - запрос не выполнен, в отличие от пустого списка при отсутствии изменений.
+        """
+        url = f'https://statistics-api.{self.domain}/api/v1/supplier/orders'
+        result = self.get(url, {'dateFrom': last_change_date, 'flag': 0})
+        if not result:
+            logger.error('Не удалось получить изменения заказов.')
+            return None
+        return self.decode(result)
+
+    def get_sales(self, from_data, flag: int = 1):
         url = f'https://statistics-api.{self.domain}/api/v1/supplier/sales'
-        params = {'dateFrom': from_data, 'flag': 1}
+        params = {'dateFrom': from_data, 'flag': flag}
         result = self.get(url, params)
-        response_json = result.json() if result else []
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось получить данные о заказах.')
         return response_json
 
     def get_orders_fbs(self, from_date=None, to_date=None):
+        return [order for orders in self.iter_orders_fbs(from_date, to_date) for order in orders]
+
+    def iter_orders_fbs(self, from_date=None, to_date=None):
+        """Страницы сборочных заданий FBS по курсору next, RuntimeError - страница не получена"""
         url = self.host + 'api/v3/orders'
         params = {'limit': 1000, 'next': 0}
         if from_date:
@@ -86,27 +136,25 @@ class WB(ApiBase):
         if to_date:
             params['dateTo'] = to_date
 
-        orders_fbs = []
         while True:
             result = self.get(url, params)
             if result:
-                response_json = result.json()
+                response_json = self.decode(result)
                 orders_list = response_json.get('orders', []) if response_json else []
                 next_cursor = response_json.get('next', '') if response_json else ''
                 if orders_list and next_cursor:
-                    orders_fbs += orders_list
+                    yield orders_list
                     params['next'] = next_cursor
                 else:
                     break
             else:
-                logger.error('Не удалось получить данные о заказах FBS.')
-                break
-        return orders_fbs
+                # Без страницы задания FBS неполные, а их заказы попали бы в FBO
+                raise RuntimeError('Не удалось получить данные о заказах FBS.')
 
     def get_offices(self):
         url = f'https://marketplace-api.{self.domain}/api/v3/offices'
-        result = self.get(url)
-        response_json = result.json() if result else []
+        result = self.get(url, coalesce=True)
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось получить данные о складах.')
         return response_json
@@ -125,17 +173,23 @@ class WB(ApiBase):
             "skipDeletedNm": False
         }
         result = self.post(url, params)
-        response_json = result.json() if result else {}
+        response_json = self.decode(result) if result else {}
         if not result:
             logger.error('Не удалось получить данные об остатках.')
         return response_json
 
     def get_stocks_report_for_products(self, from_date="2025-11-20", to_date="2025-11-20", nm_ids=None) -> dict:
-        if nm_ids is None:
-            nm_ids = []
+        """Метрики остатков {nmID: metrics}, части списка nmID запрашиваются параллельно (WbStocksReport)"""
+        # wb_stocks импортирует WB, поэтому импорт при вызове
+        from market_api_app.wb_stocks import WbStocksReport
+        return WbStocksReport(self).fetch(from_date, to_date, nm_ids)
+
+    def get_stocks_report_page(self, from_date: str, to_date: str, nm_ids: list = None, offset: int = 0,
+                               limit: int = STOCKS_REPORT_LIMIT) -> list | None:
+        """Одна страница stocks-report/products/products, None - запрос не выполнен"""
         url = f'https://seller-analytics-api.{self.domain}/api/v2/stocks-report/products/products'
         params = {
-            'nmIDs': nm_ids,
+            'nmIDs': nm_ids or [],
             'currentPeriod': {
                 'start': from_date,
                 'end': to_date
@@ -154,29 +208,23 @@ class WB(ApiBase):
                 'nonLiquid',
                 'invalidData'
             ],
-            'limit': 1000,
-            'offset': 0
+            'limit': limit,
+            'offset': offset
         }
-
-        products_stocks = []
-        while True:
-            result = self.post(url, params)
-            if result:
-                response_json = result.json()
-                products_list = response_json.get('data', {}).get('items', [])
-                if products_list and len(products_list) <= 1000:
-                    products_stocks += products_list
-                    params['offset'] += 1000
-                else:
-                    break
-            else:
-                logger.error('Не удалось получить данные об остатках')
-                break
-
-        return {int(prod.get('nmID')): prod.get('metrics') for prod in products_stocks if prod.get('nmID')}
+        result = self.post(url, params)
+        if not result:
+            logger.error('Не удалось получить данные об остатках')
+            return None
+        return self.decode(result).get('data', {}).get('items', [])
 
     def get_stocks_for_nm_id(self, nm_id: int, from_date: str = '2025-11-20', to_date: str = '2025-11-20') -> list:
+        stocks_offices = self.get_nm_id_offices(nm_id, from_date, to_date)
+        if stocks_offices is None:
+            logger.error('Не удалось получить данные об остатках.')
+        return stocks_offices or []
 
+    def get_nm_id_offices(self, nm_id: int, from_date: str, to_date: str) -> list | None:
+        """Остатки товара по складам (stocks-report/products/sizes), None - запрос не выполнен"""
         url = f'https://seller-analytics-api.{self.domain}/api/v2/stocks-report/products/sizes'
         params = {
             'nmID': nm_id,
@@ -193,18 +241,15 @@ class WB(ApiBase):
         }
 
         result = self.post(url, params)
-        response_json = result.json() if result else {}
         if not result:
-            logger.error('Не удалось получить данные об остатках.')
-        # Можно дописать разбор остатка из офисов
-        stocks_offices = response_json.get('data', {}).get('offices', [])
-        return stocks_offices
+            return None
+        return (self.decode(result).get('data') or {}).get('offices') or []
 
     def get_stocks(self, from_date: str = '2025-11-01T00:00:00'):
         url = f'https://statistics-api.{self.domain}/api/v1/supplier/stocks'
         params = {'dateFrom': from_date}
         result = self.get(url, params)
-        response_json = result.json() if result else []
+        response_json = self.decode(result) if result else []
         if not result:
             logger.error('Не удалось получить данные о складах.')
         return response_json
@@ -0,0 +1,163 @@
+import asyncio
+from collections import deque
+from datetime import datetime
+from itertools import count, islice
+import logging
+from market_api_app.base_async import AsyncApiBase
+from market_api_app.schemas import WbGoodsResponse
+from market_api_app.wb import MAX_PARALLEL_PRICE_REQUESTS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('WB ASYNC')
+
+
+class AsyncWB(AsyncApiBase):
+    def __init__(self, api_key: str, **kwargs):
+        super().__init__(**kwargs)
+        self.headers = {'Authorization': api_key, 'Content-Type': 'application/json'}
+        self.domain = 'wildberries.ru'
+        self.host = f'https://marketplace-api.{self.domain}/'
+
+    async def get_commission(self):
+        logger.info(f'Получение комиссий по категориям')
+        url = f'https://common-api.{self.domain}/api/v1/tariffs/commission'
+        result = await self.get(url, {'locale': 'ru'}, cache=True, coalesce=True)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось получить данные о комиссиях.')
+        return response_json
+
+    async def get_tariffs_for_box(self):
+        logger.info(f'Получение данных логистики')
+        url = f'https://common-api.{self.domain}/api/v1/tariffs/box'
+        current_date = datetime.now().strftime('%Y-%m-%d')
+        params = {'date': current_date}
+        result = await self.get(url, params, coalesce=True)
+        response_json = result.json() if result else []
+        dt_till_max = response_json.get('response', {}).get('data', {}).get('dtTillMax') if response_json else None
+        if dt_till_max and dt_till_max != current_date:
+            params = {'date': dt_till_max}
+            result = await self.get(url, params, coalesce=True)
+            response_json = result.json() if result else []
+
+        if not result:
+            logger.error('Не удалось получить данные о тарифах логистики.')
+        return response_json
+
+    async def get_product_prices(self, typed: bool = False, parallel: bool = False,
+                                 max_workers: int = MAX_PARALLEL_PRICE_REQUESTS):
+        return [product async for products in self.iter_product_prices(typed, parallel, max_workers)
+                for product in products]
+
+    async def iter_product_prices(self, typed: bool = False, parallel: bool = False,
+                                  max_workers: int = MAX_PARALLEL_PRICE_REQUESTS):
+        """Асинхронный вариант WB.iter_product_prices"""
+        logger.info(f'Получение актуальных цен и дисконта')
+        url = f'https://discounts-prices-api.{self.domain}/api/v2/list/goods/filter'
+        limit = 1000
+
+        async def fetch_page(offset):
+            result = await self.get(url, {'limit': limit, 'offset': offset})
+            if not result:
+                logger.error(f'Не удалось получить данные о ценах, смещение {offset}.')
+                return None
+            if typed:
+                return self.decode(result, WbGoodsResponse).data.listGoods
+            return result.json().get('data', {}).get('listGoods', [])
+
+        offsets = count(0, limit)
+        tasks = deque(asyncio.ensure_future(fetch_page(offset))
+                      for offset in islice(offsets, max_workers if parallel else 1))
+        try:
+            while tasks:
+                list_goods = await tasks.popleft()
+                if list_goods:
+                    yield list_goods
+                if list_goods is None or len(list_goods) < limit:
+                    break
+                tasks.append(asyncio.ensure_future(fetch_page(next(offsets))))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_orders(self, from_data, flag: int = 1):
+        url = f'https://statistics-api.{self.domain}/api/v1/supplier/orders'
+        params = {'dateFrom': from_data, 'flag': flag}
+        result = await self.get(url, params)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось получить данные о заказах.')
+        return response_json
+
+    async def get_sales(self, from_data, flag: int = 1):
+        url = f'https://statistics-api.{self.domain}/api/v1/supplier/sales'
+        params = {'dateFrom': from_data, 'flag': flag}
+        result = await self.get(url, params)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось получить данные о заказах.')
+        return response_json
+
+    async def get_orders_fbs(self, from_date=None, to_date=None):
+        url = self.host + 'api/v3/orders'
+        params = {'limit': 1000, 'next': 0}
+        if from_date:
+            params['dateFrom'] = from_date
+        if to_date:
+            params['dateTo'] = to_date
+
+        orders_fbs = []
+        while True:
+            result = await self.get(url, params)
+            if result:
+                response_json = result.json()
+                orders_list = response_json.get('orders', []) if response_json else []
+                next_cursor = response_json.get('next', '') if response_json else ''
+                if orders_list and next_cursor:
+                    orders_fbs += orders_list
+                    params['next'] = next_cursor
+                else:
+                    break
+            else:
+                logger.error('Не удалось получить данные о заказах FBS.')
+                break
+        return orders_fbs
+
+    async def get_offices(self):
+        url = f'https://marketplace-api.{self.domain}/api/v3/offices'
+        result = await self.get(url, coalesce=True)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось получить данные о складах.')
+        return response_json
+
+    async def get_stocks_for_nm_id(self, nm_id: int, from_date: str = '2025-11-20', to_date: str = '2025-11-20') -> list:
+        url = f'https://seller-analytics-api.{self.domain}/api/v2/stocks-report/products/sizes'
+        params = {
+            'nmID': nm_id,
+            'currentPeriod': {
+                'start': from_date,
+                'end': to_date
+            },
+            'stockType': '',
+            'orderBy': {
+                'field': 'stockCount',
+                'mode': 'desc'
+            },
+            'includeOffice': True
+        }
+
+        result = await self.post(url, params)
+        response_json = result.json() if result else {}
+        if not result:
+            logger.error('Не удалось получить данные об остатках.')
+        return response_json.get('data', {}).get('offices', [])
+
+    async def get_stocks(self, from_date: str = '2025-11-01T00:00:00'):
+        url = f'https://statistics-api.{self.domain}/api/v1/supplier/stocks'
+        params = {'dateFrom': from_date}
+        result = await self.get(url, params)
+        response_json = result.json() if result else []
+        if not result:
+            logger.error('Не удалось получить данные о складах.')
+        return response_json
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from market_api_app.base_async import AsyncApiBase
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('WB Cards')
+
+MAX_PARALLEL_CARD_REQUESTS = 4
+CARDS_PORTION = 100  # Максимум nmID в одном запросе карточек
+
+# ПВЗ, от которых запрашиваются остатки: первый - основной, его карточка попадает в результат
+DEST_MOSCOW = '-1257786'
+DEST_LIST = (
+    DEST_MOSCOW,  # Москва
+    '123589328',  # Подольск
+    '123585769',  # Котовск
+    '-4039473',  # Волгоград
+    '123589409',  # Екатеринбург
+    '12358283',  # Воронеж
+    '12358062',  # Краснодар
+    '-364763',  # Новосибирск
+    '123585553',  # Невинномысск
+    '-2133462',  # Казань
+)
+
+CARD_HEADERS = {
+    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;"
+              "q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+    "cache-control": "max-age=0",
+    "priority": "u=0, i",
+    "sec-ch-ua": '"Google Chrome";v="141", "Not?A_Brand";v="8", "Chromium";v="141"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+    "sec-fetch-dest": "document",
+    "sec-fetch-mode": "navigate",
+    "sec-fetch-site": "none",
+    "sec-fetch-user": "?1",
+    "upgrade-insecure-requests": "1"
+}
+
+
+def aggregate_stocks(card_data):
+    stocks = {}
+    for size in card_data.get('sizes', []):
+        for stock in size.get('stocks', []):
+            if (wh := stock.get('wh')) is not None:
+                stocks[wh] = stocks.get(wh, 0) + stock.get('qty', 0)
+    return stocks
+
+
+class AsyncWbCards(AsyncApiBase):
+    """
+    Публичные карточки WB (u-card.wb.ru) без токена: цены и остатки по складам, видимые с ПВЗ dest.
+    Запросы идут через общий пул соединений клиента, одновременно не более max_workers.
+    """
+
+    def __init__(self, max_workers: int = MAX_PARALLEL_CARD_REQUESTS, delay_seconds: int = 20,
+                 cache_dir: str | None = None, **kwargs):
+        super().__init__(delay_seconds=delay_seconds, cache_dir=cache_dir, **kwargs)
+        self.headers = dict(CARD_HEADERS)
+        self.max_workers = max_workers
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Создается в цикле событий первого запроса, как и сессия
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+
+    async def get_cards_details(self, nm_ids: str, dest: str = DEST_MOSCOW) -> list | None:
+        """Карточки по списку nmID через ';', None - запрос не выполнен"""
+        url = (f'https://u-card.wb.ru/cards/v4/detail?appType=1&curr=rub&dest={dest}&spp=30&hide_dtype=11'
+               f'&ab_testing=false&lang=ru&nm={nm_ids}')
+        async with self.semaphore:
+            result = await self.get(url)
+        if not result:
+            logger.error(f'Не удалось получить данные по корзине, dest {dest}.')
+            return None
+        return result.json().get('products', [])
+
+    async def iter_cards(self, nn_list: list, dest: str = DEST_MOSCOW, max_portion: int = CARDS_PORTION):
+        """Карточки частями по max_portion nmID в порядке готовности ответов, неполученные части пропускаются"""
+        tasks = [asyncio.ensure_future(self.get_cards_details(';'.join(map(str, nn_list[i:i + max_portion])), dest))
+                 for i in range(0, len(nn_list), max_portion)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                if cards := await task:
+                    yield cards
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_cards_by_dist(self, nn_list: list, dests: tuple | list = DEST_LIST,
+                                max_portion: int = CARDS_PORTION) -> dict:
+        """
+        Карточки {nmID: карточка основного ПВЗ} с full_stocks {склад: остаток} по всем ПВЗ dests.
+        Пары (часть nmID, ПВЗ) запрашиваются одновременно, остатки объединяются по мере получения ответов.
+        """
+        portions = [';'.join(map(str, nn_list[i:i + max_portion])) for i in range(0, len(nn_list), max_portion)]
+        main_dest = dests[0]
+
+        async def fetch(portion, dest):
+            return dest, await self.get_cards_details(portion, dest)
+
+        tasks = [asyncio.ensure_future(fetch(portion, dest)) for portion in portions for dest in dests]
+        logger.info(f'Количество запросов всего: {len(tasks)}')
+        results = {}
+        try:
+            for step, task in enumerate(asyncio.as_completed(tasks), 1):
+                dest, cards = await task
+                logger.debug(f'Получено ответов: {step} из {len(tasks)}')
+                for card in cards or []:
+                    if 'id' not in card:
+                        continue
+                    full_stocks = aggregate_stocks(card)
+                    merged = results.get(card['id'])
+                    if merged is None or dest == main_dest:
+                        card_copy = card.copy()
+                        card_copy['full_stocks'] = merged['full_stocks'] if merged else {}
+                        merged = results[card['id']] = card_copy
+                    merged['full_stocks'].update(full_stocks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return results
@@ -0,0 +1,243 @@
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from queue import Full, Queue
+import pandas as pd
+from market_api_app.wb import WB
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('WB Orders')
+
+ORDERS_PAGE_LIMIT = 80000  # Максимум строк в одном ответе supplier/orders, дальше запрос от lastChangeDate последней строки
+ORDERS_HISTORY_DAYS = 90  # Глубина хранения заказов в статистике WB
+QUEUE_POLL_SECONDS = 0.5  # Как часто поток загрузки проверяет остановку, пока очередь заполнена
+# Колонки заказов статистики в таблице FbsOrderIndex.to_frame
+ORDER_COLUMNS = ('srid', 'date', 'sticker', 'nmId', 'warehouseName', 'finishedPrice', 'discountPercent', 'isCancel')
+
+
+class WbOrderStore:
+    """
+    Локальное хранилище заказов WB (supplier/orders) в SQLite с ключом srid.
+    Синхронизация инкрементальная: flag=0 от сохраненной отметки lastChangeDate, поэтому отчеты за любой
+    период внутри синхронизированного диапазона строятся локально после одного запроса изменений.
+    """
+
+    def __init__(self, path: str = 'wb_orders.sqlite3'):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS orders ('
+                         'srid TEXT PRIMARY KEY, date TEXT, last_change_date TEXT, data TEXT)')
+            conn.execute('CREATE INDEX IF NOT EXISTS orders_date ON orders (date)')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def get_meta(self, key: str) -> str | None:
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('INSERT INTO meta (key, value) VALUES (?, ?) '
+                         'ON CONFLICT(key) DO UPDATE SET value = excluded.value', (key, value))
+
+    @property
+    def watermark(self) -> str | None:
+        """lastChangeDate, с которого запрашиваются следующие изменения"""
+        return self.get_meta('watermark')
+
+    @property
+    def synced_from(self) -> str | None:
+        """Дата, начиная с которой в хранилище есть все заказы"""
+        return self.get_meta('synced_from')
+
+    def upsert(self, orders: list) -> int:
+        rows = [(order['srid'], order.get('date', ''), order.get('lastChangeDate', ''),
+                 json.dumps(order, ensure_ascii=False)) for order in orders if order.get('srid')]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany('INSERT INTO orders (srid, date, last_change_date, data) VALUES (?, ?, ?, ?) '
+                             'ON CONFLICT(srid) DO UPDATE SET date = excluded.date, '
+                             'last_change_date = excluded.last_change_date, data = excluded.data', rows)
+        return len(rows)
+
+    def get_orders(self, from_date: str, to_date: str) -> list:
+        """Заказы с датой заказа в периоде, from_date и to_date в формате '2024-12-10' включительно"""
+        to_date_next = (datetime.strptime(to_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT data FROM orders WHERE date >= ? AND date < ? ORDER BY date',
+                                (from_date, to_date_next)).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def sync(self, wb_client: WB, from_date: str | None = None) -> int:
+        """
+        Догружает изменения заказов с отметки watermark.
+        Если запрошенный from_date раньше уже синхронизированного диапазона, загрузка начинается с from_date.
+        Загрузка, прерванная ошибкой запроса, при следующем вызове продолжается с сохраненной отметки.
+        :return: Количество полученных строк
+        """
+        if from_date is None:
+            from_date = (datetime.now() - timedelta(days=ORDERS_HISTORY_DAYS)).strftime('%Y-%m-%d')
+        synced_from, watermark = self.synced_from, self.watermark
+        # pending_from - начало загрузки, которая еще не завершена: прерванная загрузка продолжается с watermark
+        pending_from = self.get_meta('pending_from')
+        if watermark is not None and synced_from is not None and from_date >= synced_from:
+            start_from = synced_from
+        elif watermark is not None and pending_from is not None and from_date >= pending_from:
+            start_from = pending_from
+        else:
+            start_from = watermark = from_date
+            self.set_meta('pending_from', start_from)
+        received = 0
+        while True:
+            logger.info(f'Получение изменений заказов с {watermark}')
+            orders = wb_client.get_order_changes(watermark)
+            if orders is None:
+                # Диапазон не догружен, synced_from не сдвигается
+                return received
+            if not orders:
+                break
+            received += self.upsert(orders)
+            last_change_date = max(order.get('lastChangeDate', '') for order in orders)
+            # Отметка сохраняется после каждой страницы: прерванная синхронизация продолжится с нее
+            self.set_meta('watermark', last_change_date)
+            if len(orders) < ORDERS_PAGE_LIMIT or last_change_date <= watermark:
+                break
+            watermark = last_change_date
+        if self.synced_from is None or start_from < self.synced_from:
+            self.set_meta('synced_from', start_from)
+        logger.info(f'Получено строк заказов: {received}')
+        return received
+
+
+@dataclass(slots=True)
+class OrdersSplit:
+    """Заказы статистики, разделенные на FBS и FBO, с отменами отдельно"""
+    fbs: list = field(default_factory=list)
+    fbo: list = field(default_factory=list)
+    fbs_cancel: list = field(default_factory=list)
+    fbo_cancel: list = field(default_factory=list)
+    nm_ids_fbs: set = field(default_factory=set)
+    nm_ids_fbo: set = field(default_factory=set)
+
+
+class FbsOrderIndex:
+    """Индекс сборочных заданий FBS: хранит только rid, по нему заказы статистики относятся к FBS или FBO"""
+
+    def __init__(self):
+        self.rids = set()
+        self.count = 0
+
+    def add(self, orders_fbs: list):
+        self.rids.update(order_fbs.get('rid') for order_fbs in orders_fbs)
+        self.count += len(orders_fbs)
+
+    def __contains__(self, srid) -> bool:
+        return srid in self.rids
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_frame(self, orders: list) -> pd.DataFrame:
+        """
+        Заказы статистики таблицей с колонками ORDER_COLUMNS и признаком is_fbs (srid есть среди rid заданий FBS)
+        """
+        df = pd.DataFrame.from_records(orders, columns=list(ORDER_COLUMNS))
+        df = df.fillna({'date': '', 'sticker': '0', 'warehouseName': '', 'finishedPrice': 0.0,
+                        'discountPercent': 0, 'isCancel': False})
+        df['nmId'] = pd.to_numeric(df['nmId'], errors='coerce').fillna(0).astype('int64')
+        df['finishedPrice'] = df['finishedPrice'].astype(float)
+        df['isCancel'] = df['isCancel'].astype(bool)
+        df['is_fbs'] = df['srid'].isin(self.rids)
+        return df
+
+    def split(self, orders: list) -> OrdersSplit:
+        result = OrdersSplit()
+        for order in orders:
+            is_fbs = order.get('srid') in self.rids
+            if not order.get('isCancel'):
+                if is_fbs:
+                    result.fbs.append(order)
+                    result.nm_ids_fbs.add(order.get('nmId'))
+                else:
+                    result.fbo.append(order)
+                    result.nm_ids_fbo.add(order.get('nmId'))
+            elif is_fbs:
+                result.fbs_cancel.append(order)
+            else:
+                result.fbo_cancel.append(order)
+        return result
+
+
+class FbsOrderPipeline:
+    """
+    Загрузка сборочных заданий FBS по курсору next с индексацией по мере получения.
+    Поток загрузки запрашивает следующую страницу, пока поток индексации разбирает предыдущую;
+    в очереди не больше prefetch страниц, полный список заданий не накапливается.
+    Ошибка любого из потоков останавливает другой и передается в result().
+    """
+
+    def __init__(self, wb_client: WB, from_date: int | None = None, to_date: int | None = None, prefetch: int = 2):
+        self.wb_client = wb_client
+        self.from_date = from_date
+        self.to_date = to_date
+        self.index = FbsOrderIndex()
+        self._pages = Queue(maxsize=prefetch)
+        self._error = None
+        self._consumer_error = None
+        self._stop = threading.Event()
+        self._started = False
+        self._producer = threading.Thread(target=self._produce, daemon=True)
+        self._consumer = threading.Thread(target=self._consume, daemon=True)
+
+    def _put(self, item) -> bool:
+        """Помещает страницу в очередь, False - индексация остановлена и страница не нужна"""
+        while not self._stop.is_set():
+            try:
+                self._pages.put(item, timeout=QUEUE_POLL_SECONDS)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for orders_fbs in self.wb_client.iter_orders_fbs(self.from_date, self.to_date):
+                if not self._put(orders_fbs):
+                    return
+        except Exception as e:
+            self._error = e
+        finally:
+            self._put(None)
+
+    def _consume(self):
+        try:
+            while (orders_fbs := self._pages.get()) is not None:
+                self.index.add(orders_fbs)
+        except Exception as e:
+            self._consumer_error = e
+            self._stop.set()
+
+    def start(self) -> 'FbsOrderPipeline':
+        """Запускает загрузку в фоне, результат - result()"""
+        self._started = True
+        self._consumer.start()
+        self._producer.start()
+        return self
+
+    def result(self) -> FbsOrderIndex:
+        if not self._started:
+            self.start()
+        self._producer.join()
+        self._consumer.join()
+        if self._consumer_error is not None:
+            raise self._consumer_error
+        if self._error is not None:
+            raise self._error
+        logger.info(f'Получено сборочных заданий FBS: {len(self.index)}')
+        return self.index
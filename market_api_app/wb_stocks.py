@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from market_api_app.wb import WB, STOCKS_REPORT_LIMIT
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('WB Stocks')
+
+MAX_PARALLEL_STOCKS_REQUESTS = 3
+MAX_PARALLEL_SIZES_REQUESTS = 3
+FBS_OFFICE_NAME = 'FBS'
+
+
+def split_period(from_date: str, to_date: str, period_days: int | None = None) -> list:
+    """Делит период на отрезки по period_days дней, None - один отрезок. Даты в формате '2025-11-20'"""
+    if not period_days:
+        return [(from_date, to_date)]
+    start = datetime.strptime(from_date, '%Y-%m-%d')
+    end = datetime.strptime(to_date, '%Y-%m-%d')
+    periods = []
+    while start <= end:
+        period_end = min(start + timedelta(days=period_days - 1), end)
+        periods.append((start.strftime('%Y-%m-%d'), period_end.strftime('%Y-%m-%d')))
+        start = period_end + timedelta(days=1)
+    return periods
+
+
+class WbStocksReport:
+    """
+    Отчет об остатках WB (stocks-report/products/products) по частям.
+    Список nmID делится на части по STOCKS_REPORT_LIMIT, период - на отрезки по period_days дней.
+    Каждая пара (часть, отрезок) запрашивается отдельно, не более max_workers запросов одновременно,
+    темп задает общий ограничитель запросов WB.
+    Части с неполученной страницей запрашиваются заново до retry_rounds раз, затем RuntimeError:
+    отчет без части товаров не возвращается.
+    """
+
+    def __init__(self, wb_client: WB, max_workers: int = MAX_PARALLEL_STOCKS_REQUESTS,
+                 chunk_size: int = STOCKS_REPORT_LIMIT, retry_rounds: int = 1):
+        self.wb_client = wb_client
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.retry_rounds = retry_rounds
+
+    def get_units(self, from_date: str, to_date: str, nm_ids: list = None, period_days: int | None = None) -> list:
+        chunks = [nm_ids[i:i + self.chunk_size] for i in range(0, len(nm_ids), self.chunk_size)] if nm_ids \
+            else [None]
+        return [(chunk, period) for period in split_period(from_date, to_date, period_days) for chunk in chunks]
+
+    def fetch_unit(self, nm_ids: list | None, period: tuple) -> list | None:
+        """
+        Все страницы одной части: для nm_ids=None - постранично по всему ассортименту.
+        None - страница не получена, уже полученные страницы части отбрасываются
+        """
+        items = []
+        offset = 0
+        while True:
+            page = self.wb_client.get_stocks_report_page(period[0], period[1], nm_ids, offset, self.chunk_size)
+            if page is None:
+                logger.error(f'Не получены остатки за {period[0]} - {period[1]}, смещение {offset}.')
+                return None
+            items += page
+            # По списку nmID строк не больше, чем товаров в списке - лишний запрос не нужен
+            if len(page) < self.chunk_size or nm_ids and len(items) >= len(nm_ids):
+                break
+            offset += self.chunk_size
+        return items
+
+    def iter_units(self, from_date: str, to_date: str, nm_ids: list = None, period_days: int | None = None):
+        """
+        Возвращает (начало отрезка, строки отчета) по мере готовности частей.
+        RuntimeError - часть не получена после retry_rounds повторных проходов
+        """
+        pending = self.get_units(from_date, to_date, nm_ids, period_days)
+        logger.info(f'Отчет об остатках: {len(pending)} запросов')
+        for round_number in range(self.retry_rounds + 1):
+            if not pending:
+                return
+            if round_number:
+                logger.warning(f'Повторный запрос остатков: {len(pending)} частей')
+            failed = []
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self.fetch_unit, chunk, period): (chunk, period)
+                           for chunk, period in pending}
+                for future in as_completed(futures):
+                    items = future.result()
+                    if items is None:
+                        failed.append(futures[future])
+                        continue
+                    yield futures[future][1][0], items
+            pending = failed
+        if pending:
+            raise RuntimeError(f'Не получены остатки: {len(pending)} частей отчета.')
+
+    def fetch(self, from_date: str, to_date: str, nm_ids: list = None, period_days: int | None = None) -> dict:
+        """
+        Метрики по nmID: {nmID: metrics} для одного отрезка (period_days=None),
+        иначе {nmID: {начало отрезка: metrics}}. RuntimeError - отчет получен не полностью
+        """
+        stocks = {}
+        for period_start, items in self.iter_units(from_date, to_date, nm_ids, period_days):
+            for item in items:
+                if not item.get('nmID'):
+                    continue
+                nm_id = int(item['nmID'])
+                if period_days:
+                    stocks.setdefault(nm_id, {})[period_start] = item.get('metrics')
+                else:
+                    stocks[nm_id] = item.get('metrics')
+        return stocks
+
+    def to_jsonl(self, path: str, from_date: str, to_date: str, nm_ids: list = None,
+                 period_days: int | None = None) -> int:
+        """
+        Пишет строки {"nmID", "period", "metrics"} в файл JSON Lines по мере получения частей,
+        без накопления отчета в памяти. Возвращает количество строк.
+        """
+        count = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            for period_start, items in self.iter_units(from_date, to_date, nm_ids, period_days):
+                for item in items:
+                    if not item.get('nmID'):
+                        continue
+                    f.write(json.dumps({'nmID': int(item['nmID']), 'period': period_start,
+                                        'metrics': item.get('metrics')}, ensure_ascii=False) + '\n')
+                    count += 1
+        logger.info(f'Записано строк остатков: {count} в {path}')
+        return count
+
+
+def get_office_stocks(offices: list) -> dict:
+    """Остаток по складам {склад: stockCount}, склады продавца (регион 'Маркетплейс') суммируются в FBS"""
+    stocks = {}
+    for office in offices:
+        office_name = FBS_OFFICE_NAME if office.get('regionName', '') == 'Маркетплейс' \
+            else office.get('officeName', '')
+        stocks[office_name] = stocks.get(office_name, 0) + (office.get('metrics') or {}).get('stockCount', 0)
+    return stocks
+
+
+class WbSizesStocks:
+    """
+    Остатки по складам для списка nmID (stocks-report/products/sizes, один запрос на товар).
+    Одновременно выполняется не более max_workers запросов; ответы 429 повторяются по Retry-After,
+    а общий ограничитель запросов WB приостанавливает остальные потоки.
+    Готовые товары дописываются в файл checkpoint_path (JSON Lines): после сбоя повторный запуск
+    за тот же период запрашивает только оставшиеся nmID. После полной загрузки файл удаляется.
+    """
+
+    def __init__(self, wb_client: WB, max_workers: int = MAX_PARALLEL_SIZES_REQUESTS,
+                 checkpoint_path: str | None = None, retry_rounds: int = 1):
+        self.wb_client = wb_client
+        self.max_workers = max_workers
+        self.checkpoint_path = checkpoint_path
+        self.retry_rounds = retry_rounds
+
+    def load_checkpoint(self, period: list) -> dict:
+        """Товары, уже полученные за период: {nmID: {склад: остаток}}"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        stocks = {}
+        with open(self.checkpoint_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    # Строка, недописанная при сбое
+                    continue
+                if row.get('period') == period:
+                    stocks[int(row['nmID'])] = row['stocks']
+        if stocks:
+            logger.info(f'Продолжение загрузки остатков: уже получено товаров {len(stocks)}')
+        return stocks
+
+    def open_checkpoint(self):
+        checkpoint = open(self.checkpoint_path, 'a+', encoding='utf-8')
+        # Недописанная при сбое строка завершается, чтобы не испортить следующую
+        if checkpoint.tell():
+            checkpoint.seek(checkpoint.tell() - 1)
+            if checkpoint.read(1) != '\n':
+                checkpoint.write('\n')
+        return checkpoint
+
+    def fetch_nm_id(self, nm_id: int, from_date: str, to_date: str) -> dict | None:
+        offices = self.wb_client.get_nm_id_offices(nm_id, from_date, to_date)
+        return None if offices is None else get_office_stocks(offices)
+
+    def fetch(self, nm_ids: list, from_date: str, to_date: str) -> dict:
+        """
+        Остатки {nmID: {склад: остаток}} в порядке nm_ids.
+        Товары, не полученные после retry_rounds повторных проходов, в результат не входят и остаются
+        для следующего запуска.
+        """
+        period = [from_date, to_date]
+        stocks = self.load_checkpoint(period)
+        pending = [nm_id for nm_id in dict.fromkeys(int(nm_id) for nm_id in nm_ids) if nm_id not in stocks]
+        checkpoint = self.open_checkpoint() if self.checkpoint_path else None
+        try:
+            for round_number in range(self.retry_rounds + 1):
+                if not pending:
+                    break
+                if round_number:
+                    logger.warning(f'Повторный запрос остатков для {len(pending)} товаров')
+                failed = []
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    futures = {executor.submit(self.fetch_nm_id, nm_id, from_date, to_date): nm_id
+                               for nm_id in pending}
+                    for future in as_completed(futures):
+                        nm_id = futures[future]
+                        nm_stocks = future.result()
+                        if nm_stocks is None:
+                            failed.append(nm_id)
+                            continue
+                        stocks[nm_id] = nm_stocks
+                        if checkpoint:
+                            checkpoint.write(json.dumps({'nmID': nm_id, 'period': period, 'stocks': nm_stocks},
+                                                        ensure_ascii=False) + '\n')
+                            checkpoint.flush()
+                pending = failed
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        if pending:
+            logger.error(f'Не получены остатки для {len(pending)} товаров: {pending[:10]}')
+        elif self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return {int(nm_id): stocks[int(nm_id)] for nm_id in nm_ids if int(nm_id) in stocks}
+
+    @staticmethod
+    def to_matrix(stocks: dict) -> list:
+        """
+        Матрица для записи на лист: заголовок ['NmID', 'FBS', склады...] и строка на товар.
+        Склады после FBS упорядочены по убыванию суммарного остатка, отсутствующий остаток - 0
+        """
+        totals = {}
+        for nm_stocks in stocks.values():
+            for office_name, stock in nm_stocks.items():
+                totals[office_name] = totals.get(office_name, 0) + stock
+        offices = [FBS_OFFICE_NAME] + sorted((name for name in totals if name != FBS_OFFICE_NAME),
+                                             key=lambda name: -totals[name])
+        return [['NmID'] + offices] + [[nm_id] + [nm_stocks.get(name, 0) for name in offices]
+                                       for nm_id, nm_stocks in stocks.items()]
@@ -0,0 +1,81 @@
+import logging
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('WB Tariffs')
+
+DEFAULT_WAREHOUSE = 'Свой склад РФ'
+
+# Тариф для товаров объемом до литра (см. utils_wb.get_logistics_new): границы ступеней и цена за литр
+VOLUME_STEPS_MIN = np.array([0.001, 0.201, 0.401, 0.601, 0.801])
+VOLUME_STEPS_MAX = np.array([0.200, 0.400, 0.600, 0.800, 0.999])
+VOLUME_STEPS_PRICE = np.array([23.0, 26.0, 29.0, 30.0, 32.0])
+
+
+def parse_tariff_number(value) -> float:
+    """'46,5' -> 46.5, '-' и пустое значение -> nan"""
+    if value is None or value == '-' or value == '':
+        return np.nan
+    if isinstance(value, str):
+        return float(value.replace(',', '.'))
+    return float(value)
+
+
+class WbLogisticsTariffs:
+    """
+    Тарифы логистики коробов WB (tariffs/box), разобранные один раз в массивы по складам:
+    первый литр, дополнительный литр и коэффициент логистики. Если значение FBW не задано ('-'),
+    берется значение FBS, как в utils_wb.get_logistic_dict. Неизвестный склад - тариф DEFAULT_WAREHOUSE.
+    """
+
+    def __init__(self, tariffs_data: dict):
+        warehouses = (tariffs_data or {}).get('response', {}).get('data', {}).get('warehouseList') or []
+        self.names = [warehouse['warehouseName'] for warehouse in warehouses]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.first_liter = self._compile(warehouses, 'boxDeliveryBase', 'boxDeliveryMarketplaceBase')
+        self.extra_liter = self._compile(warehouses, 'boxDeliveryLiter', 'boxDeliveryMarketplaceLiter')
+        self.coefficient = np.round(
+            self._compile(warehouses, 'boxDeliveryCoefExpr', 'boxDeliveryMarketplaceCoefExpr') / 100, 2)
+        self.default_row = self.index.get(DEFAULT_WAREHOUSE)
+        if self.default_row is None:
+            logger.warning(f'В тарифах нет склада "{DEFAULT_WAREHOUSE}".')
+
+    @staticmethod
+    def _compile(warehouses: list, key: str, fallback_key: str) -> np.ndarray:
+        values = np.array([parse_tariff_number(warehouse.get(key)) for warehouse in warehouses], dtype=float)
+        fallback = np.array([parse_tariff_number(warehouse.get(fallback_key)) for warehouse in warehouses],
+                            dtype=float)
+        return np.where(np.isnan(values), fallback, values)
+
+    def rows(self, warehouse_names) -> np.ndarray:
+        """Номера строк тарифа для списка складов"""
+        return np.array([self.index.get(name, self.default_row) for name in warehouse_names], dtype=int)
+
+    def get_logistic_dict(self, warehouse_name: str = DEFAULT_WAREHOUSE) -> dict:
+        """Тариф склада в формате utils_wb.get_logistic_dict"""
+        row = self.index.get(warehouse_name, self.default_row)
+        return {
+            'KTR': 1.0,
+            'TARIFF_BASE': 1.0,
+            'LOGISTICS_FIRST_LITER': float(self.first_liter[row]),
+            'LOGISTICS_EXTRA_LITER': float(self.extra_liter[row]),
+            'LOGISTICS_COEFFICIENT': float(self.coefficient[row])
+        }
+
+    def logistics(self, volumes, warehouse_names, ktr: float = 1.0) -> np.ndarray:
+        """
+        Логистика для массива заказов: volumes[i] - объем товара в литрах, warehouse_names[i] - склад.
+        Результат совпадает с utils_wb.get_logistics_new для каждого заказа.
+        """
+        volumes = np.asarray(volumes, dtype=float)
+        rows = self.rows(warehouse_names)
+        first_liter = self.first_liter[rows]
+        extra_liter = self.extra_liter[rows]
+        coefficient = self.coefficient[rows]
+
+        over_liter = np.round((first_liter + extra_liter * np.maximum(volumes - 1, 0)) * ktr, 2)
+        # Ступень до литра: первая подходящая по границам, вне ступеней - стоимость первого литра
+        in_step = (volumes[:, None] >= VOLUME_STEPS_MIN) & (volumes[:, None] <= VOLUME_STEPS_MAX)
+        step_price = VOLUME_STEPS_PRICE[in_step.argmax(axis=1)] * coefficient
+        under_liter = np.where(in_step.any(axis=1), step_price, first_liter)
+        return np.where(volumes > 1.0, over_liter, under_liter)
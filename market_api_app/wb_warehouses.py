@@ -0,0 +1,88 @@
+import logging
+import time
+from types import MappingProxyType
+from market_api_app import fastjson
+from market_api_app.base import ApiBase
+from market_api_app.http_cache import HttpCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('WB Warehouses')
+
+WAREHOUSES_URL = 'https://static-basket-01.wb.ru/vol0/data/stores-data.json'
+WAREHOUSES_TTL = 24 * 60 * 60  # Справочник меняется редко, чаще раза в сутки не проверяется
+
+# Склады продавца по умолчанию, остатки на них считаются FBS: Подольск - 119261, Подольск 3 - 302088, Подольск 4 - 302066
+FBS_WAREHOUSE_IDS = frozenset({119261, 302066, 302088})
+
+WAREHOUSES_HEADERS = {
+    'Accept': '*/*',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Connection': 'keep-alive',
+    'sec-ch-ua': '"Chromium";v="134", "Google Chrome";v="134", "Not:A-Brand";v="24"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"Windows"',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/134.0.0.0 Safari/537.36'
+}
+
+
+class WbWarehouseDirectory:
+    """
+    Справочник складов WB (stores-data.json) с дисковым кэшем.
+    В течение ttl секунд используется сохраненный ответ без обращения к серверу, затем выполняется
+    условный запрос с ETag: при ответе 304 кэш продлевается. Индекс {id: склад} неизменяемый и строится один раз.
+    Справочник запрашивается своим клиентом с кэшем в cache_dir: заголовки и кэш клиентов API не затрагиваются.
+    """
+
+    def __init__(self, cache_dir: str | None = '.http_cache', ttl: float = WAREHOUSES_TTL,
+                 fbs_ids=FBS_WAREHOUSE_IDS):
+        """
+        :param fbs_ids: id складов продавца, остатки на которых считаются FBS. В stores-data.json склады
+                        продавца не отмечены, поэтому список задается продавцом
+        """
+        self.client = ApiBase(cache_dir=cache_dir)
+        self.http_cache = self.client.http_cache
+        self.ttl = ttl
+        self.fbs_ids = frozenset(fbs_ids)
+        self._warehouses = None
+        self._index = None
+
+    def load_cached(self) -> list | None:
+        """Сохраненный справочник, если он не старше ttl"""
+        if not self.http_cache:
+            return None
+        entry = self.http_cache.load(HttpCache.get_key('GET', WAREHOUSES_URL, WAREHOUSES_HEADERS))
+        if not entry or time.time() - entry.get('stored_at', 0) >= self.ttl:
+            return None
+        try:
+            return fastjson.loads(entry['content'])
+        except ValueError:
+            return None
+
+    @property
+    def warehouses(self) -> list:
+        if self._warehouses is None:
+            warehouses = self.load_cached()
+            if warehouses is None:
+                # При неизменном справочнике сервер ответит 304, сохраненный ответ продлевается еще на ttl
+                result = self.client.get(WAREHOUSES_URL, cache=True, headers=WAREHOUSES_HEADERS)
+                if not result:
+                    logger.error('Не удалось получить справочник складов.')
+                    return []
+                warehouses = self.client.decode(result)
+            self._warehouses = warehouses
+        return self._warehouses
+
+    @property
+    def index(self) -> MappingProxyType:
+        """Неизменяемый индекс {id склада: склад}"""
+        if self._index is None:
+            self._index = MappingProxyType({warehouse['id']: MappingProxyType(warehouse)
+                                            for warehouse in self.warehouses if 'id' in warehouse})
+        return self._index
+
+    def name(self, wh_id: int, default: str = 'FBO') -> str:
+        return self.index.get(wh_id, {}).get('name', default)
+
+    def is_fbs(self, wh_id: int) -> bool:
+        return wh_id in self.fbs_ids
@@ -1,13 +1,15 @@
 import logging
 from market_api_app.base import ApiBase
+from market_api_app.schemas import YmTariffsResponse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('YaMarket')
 
 
 class YaMarket(ApiBase):
-    def __init__(self, api_key: str, max_retries: int = 3, delay_seconds: int = 15, auth_type: str = 'oauth2'):
-        super().__init__(max_retries=max_retries, delay_seconds=delay_seconds)
+    def __init__(self, api_key: str, max_retries: int = 3, delay_seconds: int = 15, auth_type: str = 'oauth2',
+                 **kwargs):
+        super().__init__(max_retries=max_retries, delay_seconds=delay_seconds, **kwargs)
         if auth_type == 'oauth2':
             self.headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
         else:
@@ -17,13 +19,14 @@ class YaMarket(ApiBase):
     def get_campaigns(self):
         logger.info(f"Получение информации о магазинах кабинета")
         url = self.host + "v2/campaigns?page=&pageSize="
-        result = self.get(url)
-        response_json = result.json() if result else {}
+        result = self.get(url, cache=True, coalesce=True)
+        response_json = self.decode(result) if result else {}
         if not result:
             logger.error('Не удалось получить данные о комиссиях.')
         return response_json
 
-    def get_categories(self, offers: list, campaign_id: int = 0, selling_program: str = "FBS"):
+    def get_categories(self, offers: list, campaign_id: int = 0, selling_program: str = "FBS", typed: bool = False):
+        """:param typed: Тарифы в виде YmTariffOffer (только используемые поля) вместо dict"""
         logger.info(f"Получение актуальных тарифов")
         # Максимум 200, то можно совместить с получением номенклатуры
         url = self.host + "v2/tariffs/calculate"
@@ -38,10 +41,16 @@ class YaMarket(ApiBase):
             "offers": offers,
         }
 
-        result = self.post(url, data)
+        result = self.post(url, data, coalesce=True)
         if not result:
             logger.error("Не удалось получить данные по тарифам.")
-        result_json = result.json() if result else {}
+        if result and typed:
+            tariffs = self.decode(result, YmTariffsResponse)
+            if tariffs.status == "OK":
+                return tariffs.result.offers
+            logger.error("Не удалось получить данные по тарифам.")
+            return []
+        result_json = self.decode(result) if result else {}
         if result_json and result_json.get("status") == "OK":
             return result_json.get("result", {}).get("offers", [])
         else:
@@ -49,20 +58,22 @@ class YaMarket(ApiBase):
             return []
 
     def get_offers(self, business_id: int):
+        return [offer for offers in self.iter_offers(business_id) for offer in offers]
+
+    def iter_offers(self, business_id: int):
         logger.info(f"Получение карточек товара")
         page_token = ""
         data = {"archived": False}
 
-        offers_list = []
         while True:
             url = (
                 self.host
                 + f"v2/businesses/{business_id}/offer-mappings?page_token={page_token}&limit=200"
             )
-            result = self.post(url, data)
-            result_json = result.json() if result else {}
+            result = self.post(url, data, coalesce=True)
+            result_json = self.decode(result) if result else {}
             if result_json and result_json.get("status") == "OK":
-                offers_list += result_json.get("result", {}).get("offerMappings", [])
+                yield result_json.get("result", {}).get("offerMappings", [])
                 if not result_json.get("result", {}).get("paging", {}):
                     break
                 page_token = (
@@ -71,7 +82,6 @@ class YaMarket(ApiBase):
             else:
                 logger.error("Не удалось получить данные о карточках товара.")
                 break
-        return offers_list
 
     def get_orders(self, campaign_id: int = 0, from_date: str = '13-12-2024', to_date: str = '13-12-2024') -> list:
         logger.info(f"Получение информации о заказах")
@@ -80,7 +90,7 @@ class YaMarket(ApiBase):
         orders_list = []
         while True:
             result = self.get(url, params)
-            result_json = result.json() if result else {}
+            result_json = self.decode(result) if result else {}
             if result_json and result_json.get("orders"):
                 orders_list += result_json.get("orders")
                 if not result_json.get("paging", {}):
@@ -97,10 +107,10 @@ class YaMarket(ApiBase):
         data = {
           "language": "RU"
         }
-        result = self.post(url, data)
+        result = self.post(url, data, cache=True, coalesce=True)
         if not result:
             logger.error("Не удалось получить данные о категориях товара.")
-        result_json = result.json() if result else {}
+        result_json = self.decode(result) if result else {}
         if result_json and result_json.get("status") == "OK":
             return result_json.get("result", {}).get("children", [])
         else:
@@ -108,6 +118,9 @@ class YaMarket(ApiBase):
             return []
 
     def get_offer_prices(self, campaign_id: int, offers: list = None) -> list:
+        return [offer for offers_ in self.iter_offer_prices(campaign_id, offers) for offer in offers_]
+
+    def iter_offer_prices(self, campaign_id: int, offers: list = None):
         logger.info(f"Получение актуальных цен")
         # Максимум 2000, то можно совместить с получением номенклатуры
         page_token = ""
@@ -116,16 +129,15 @@ class YaMarket(ApiBase):
         if offers:
             # Если потребуется использование работы по выборке, необходимо ограничить в 2000 позиций.
             data['offerIds'] = offers
-        offers_list = []
         while True:
             url = (
                     self.host
                     + f"v2/campaigns/{campaign_id}/offer-prices?page_token={page_token}&limit=2000"
             )
-            result = self.post(url, data)
-            result_json = result.json() if result else {}
+            result = self.post(url, data, coalesce=True)
+            result_json = self.decode(result) if result else {}
             if result_json and result_json.get("status") == "OK":
-                offers_list += result_json.get("result", {}).get("offers", [])
+                yield result_json.get("result", {}).get("offers", [])
                 if not result_json.get("result", {}).get("paging", {}):
                     break
                 page_token = (
@@ -134,4 +146,3 @@ class YaMarket(ApiBase):
             else:
                 logger.error("Не удалось получить данные о ценах.")
                 break
-        return offers_list
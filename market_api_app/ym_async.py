@@ -0,0 +1,139 @@
+import logging
+from market_api_app.base_async import AsyncApiBase
+from market_api_app.schemas import YmTariffsResponse
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger('YaMarket ASYNC')
+
+
+class AsyncYaMarket(AsyncApiBase):
+    def __init__(self, api_key: str, max_retries: int = 3, delay_seconds: int = 15, auth_type: str = 'oauth2',
+                 **kwargs):
+        super().__init__(max_retries=max_retries, delay_seconds=delay_seconds, **kwargs)
+        if auth_type == 'oauth2':
+            self.headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        else:
+            self.headers = {"Api-Key": api_key, "Content-Type": "application/json"}
+        self.host = "https://api.partner.market.yandex.ru/"
+
+    async def get_campaigns(self):
+        logger.info(f"Получение информации о магазинах кабинета")
+        url = self.host + "v2/campaigns?page=&pageSize="
+        result = await self.get(url, cache=True, coalesce=True)
+        response_json = result.json() if result else {}
+        if not result:
+            logger.error('Не удалось получить данные о комиссиях.')
+        return response_json
+
+    async def get_categories(self, offers: list, campaign_id: int = 0, selling_program: str = "FBS",
+                             typed: bool = False):
+        logger.info(f"Получение актуальных тарифов")
+        url = self.host + "v2/tariffs/calculate"
+        data = {
+            "parameters": {
+                **({"campaignId": campaign_id} if campaign_id else {"sellingProgram": selling_program,
+                                                                     "frequency": "BIWEEKLY",
+                                                                     "paymentDelayWeeks": 0,
+                                                                     "currency": "RUR"}),
+
+            },
+            "offers": offers,
+        }
+
+        result = await self.post(url, data, coalesce=True)
+        if result and typed:
+            tariffs = self.decode(result, YmTariffsResponse)
+            if tariffs.status == "OK":
+                return tariffs.result.offers
+            logger.error("Не удалось получить данные по тарифам.")
+            return []
+        result_json = result.json() if result else {}
+        if result_json and result_json.get("status") == "OK":
+            return result_json.get("result", {}).get("offers", [])
+        else:
+            logger.error("Не удалось получить данные по тарифам.")
+            return []
+
+    async def get_offers(self, business_id: int):
+        logger.info(f"Получение карточек товара")
+        page_token = ""
+        data = {"archived": False}
+
+        offers_list = []
+        while True:
+            url = (
+                self.host
+                + f"v2/businesses/{business_id}/offer-mappings?page_token={page_token}&limit=200"
+            )
+            result = await self.post(url, data, coalesce=True)
+            result_json = result.json() if result else {}
+            if result_json and result_json.get("status") == "OK":
+                offers_list += result_json.get("result", {}).get("offerMappings", [])
+                if not result_json.get("result", {}).get("paging", {}):
+                    break
+                page_token = (
+                    result_json.get("result", {}).get("paging", {}).get("nextPageToken", "")
+                )
+            else:
+                logger.error("Не удалось получить данные о карточках товара.")
+                break
+        return offers_list
+
+    async def get_orders(self, campaign_id: int = 0, from_date: str = '13-12-2024', to_date: str = '13-12-2024') -> list:
+        logger.info(f"Получение информации о заказах")
+        url = self.host + f'v2/campaigns/{campaign_id}/orders'
+        params = {'fake': False, 'fromDate': from_date, 'toDate': to_date, 'limit': 1000}
+        orders_list = []
+        while True:
+            result = await self.get(url, params)
+            result_json = result.json() if result else {}
+            if result_json and result_json.get("orders"):
+                orders_list += result_json.get("orders")
+                if not result_json.get("paging", {}):
+                    break
+                params['page_token'] = result_json.get("paging", {}).get("nextPageToken", "")
+            else:
+                logger.error("Не удалось получить данные о заказах.")
+                break
+        return orders_list
+
+    async def get_tree(self):
+        logger.info(f"Получение информации о категориях")
+        url = self.host + "v2/categories/tree"
+        data = {
+          "language": "RU"
+        }
+        result = await self.post(url, data, cache=True, coalesce=True)
+        result_json = result.json() if result else {}
+        if result_json and result_json.get("status") == "OK":
+            return result_json.get("result", {}).get("children", [])
+        else:
+            logger.error("Не удалось получить данные о категориях товара.")
+            return []
+
+    async def get_offer_prices(self, campaign_id: int, offers: list = None) -> list:
+        logger.info(f"Получение актуальных цен")
+        page_token = ""
+        data = {}
+
+        if offers:
+            data['offerIds'] = offers
+        offers_list = []
+        while True:
+            url = (
+                    self.host
+                    + f"v2/campaigns/{campaign_id}/offer-prices?page_token={page_token}&limit=2000"
+            )
+            result = await self.post(url, data, coalesce=True)
+            result_json = result.json() if result else {}
+            if result_json and result_json.get("status") == "OK":
+                offers_list += result_json.get("result", {}).get("offers", [])
+                if not result_json.get("result", {}).get("paging", {}):
+                    break
+                page_token = (
+                    result_json.get("result", {}).get("paging", {}).get("nextPageToken", "")
+                )
+            else:
+                logger.error("Не удалось получить данные о ценах.")
+                break
+        return offers_list
@@ -5,9 +5,10 @@ setup(
     name='market_api_app',
     version=__version__,
     packages=find_packages(),
-    install_requires=['requests', 'pandas', 'openpyxl', 'gspread'],
+    install_requires=['requests', 'aiohttp', 'pandas', 'openpyxl', 'gspread'],
     extras_require={
         "dev": ["pytest",],
+        "fast": ["orjson", "msgspec"],
     },
     include_package_data=True,
     author='Lubentsov Artem',
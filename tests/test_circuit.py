@@ -0,0 +1,87 @@
+import time
+
+import pytest
+import requests
+
+from market_api_app import circuit
+from market_api_app.base import ApiBase
+from market_api_app.circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers
+from market_api_app.ratelimit import RateLimiter
+from market_api_app.retry import RetryPolicy
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_opens_after_threshold_and_half_opens(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for status in (500, None):
+        breaker.record(status)
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record(503)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in == 30
+
+    clock[0] += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    # Одна проба: остальные вызовы ждут ее результата
+    assert not breaker.allow()
+    breaker.record(200)
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record(502)
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record(None)
+    assert breaker.state == OPEN
+    assert breaker.retry_in == 10
+
+
+def test_client_errors_do_not_open(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    for _ in range(5):
+        breaker.record(404)
+    assert breaker.state == CLOSED
+
+
+def test_breakers_per_method_and_host():
+    breakers = CircuitBreakers(failure_threshold=1)
+    breakers.get('https://api.example.com/v1/orders?page=2').record(500)
+    assert breakers.get('https://api.example.com/v1/orders') is breakers.get('https://api.example.com/v1/orders?x=1')
+    assert breakers.is_open('https://api.example.com/v1/orders')
+    assert not breakers.is_open('https://api.example.com/v1/stocks')
+    assert breakers.is_open('https://api.example.com/')
+    assert not breakers.is_open('https://other.example.com/')
+
+
+class FailingSession:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls += 1
+        raise requests.ConnectionError('refused')
+
+
+def test_open_breaker_fails_fast(monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda delay: None)
+    monkeypatch.setattr(ApiBase, 'circuit_breakers', CircuitBreakers(failure_threshold=2, reset_timeout=60))
+    client = ApiBase(retry_policy=RetryPolicy(max_retries=5))
+    client.rate_limiter = RateLimiter(defaults={})
+    client.session = FailingSession()
+    url = 'https://api.example.com/v1/orders'
+
+    assert client.get(url) is None
+    assert client.session.calls == 2
+    assert not client.is_available(url)
+    assert client.get(url) is None
+    assert client.session.calls == 2
@@ -0,0 +1,75 @@
+import json
+import threading
+
+import pytest
+import requests
+
+from market_api_app import wb_orders
+from market_api_app.wb import WB
+from market_api_app.wb_orders import FbsOrderPipeline
+
+
+def make_response(data: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(data).encode()
+    return response
+
+
+def fbs_page(first_rid: int, count: int, next_cursor: int) -> dict:
+    return {'orders': [{'rid': f'r{rid}'} for rid in range(first_rid, first_rid + count)], 'next': next_cursor}
+
+
+def make_client(monkeypatch, *responses) -> WB:
+    client = WB('token')
+    responses = list(responses)
+    cursors = []
+
+    def get(url, params=None, **kwargs):
+        cursors.append(params['next'])
+        return responses.pop(0)
+
+    monkeypatch.setattr(client, 'get', get)
+    client.cursors = cursors
+    return client
+
+
+def test_pages_are_indexed_by_cursor(monkeypatch):
+    client = make_client(monkeypatch, make_response(fbs_page(0, 3, 11)), make_response(fbs_page(3, 2, 12)),
+                         make_response({'orders': [], 'next': 12}))
+    index = FbsOrderPipeline(client, 1, 2, prefetch=1).result()
+    assert len(index) == 5
+    assert 'r4' in index and 'r5' not in index
+    assert client.cursors == [0, 11, 12]
+
+
+def test_failed_page_is_raised_from_result(monkeypatch):
+    client = make_client(monkeypatch, make_response(fbs_page(0, 3, 11)), None)
+    with pytest.raises(RuntimeError, match='FBS'):
+        FbsOrderPipeline(client).result()
+
+
+class EndlessPages:
+    """Бесконечный курсор: загрузка должна остановиться после ошибки индексации"""
+
+    def __init__(self):
+        self.produced = 0
+        self.stopped = threading.Event()
+
+    def iter_orders_fbs(self, from_date=None, to_date=None):
+        try:
+            while True:
+                self.produced += 1
+                yield [{'rid': self.produced}] if self.produced != 3 else [None]
+        finally:
+            self.stopped.set()
+
+
+def test_consumer_error_stops_producer(monkeypatch):
+    monkeypatch.setattr(wb_orders, 'QUEUE_POLL_SECONDS', 0.01)
+    client = EndlessPages()
+    pipeline = FbsOrderPipeline(client, prefetch=1)
+    with pytest.raises(AttributeError):
+        pipeline.result()
+    assert client.stopped.wait(5)
+    assert client.produced <= 5
@@ -0,0 +1,72 @@
+import pytest
+import requests
+
+from market_api_app.base import ApiBase
+from market_api_app.circuit import circuit_breakers
+from market_api_app.http_cache import HttpCache
+
+URL = 'https://api.example.com/v1/directory'
+
+
+def make_response(status_code: int, headers: dict | None = None, content: bytes = b'') -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response.url = URL
+    response._content = content
+    return response
+
+
+class StubSession:
+    """Отдает ответы по очереди и запоминает заголовки каждого запроса"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.sent_headers.append(dict(headers))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def client(tmp_path):
+    circuit_breakers.reset()
+    client = ApiBase(cache_dir=str(tmp_path))
+    yield client
+    circuit_breakers.reset()
+
+
+def test_not_modified_returns_stored_body(client):
+    client.session = StubSession(make_response(200, {'ETag': '"v1"'}, b'{"a": 1}'),
+                                 make_response(304, {'ETag': '"v1"'}))
+    assert client.get(URL, cache=True).json() == {'a': 1}
+    key = HttpCache.get_key('GET', URL, client.headers)
+    stored_at = client.http_cache.load(key)['stored_at']
+
+    response = client.get(URL, cache=True)
+    assert response.status_code == 200
+    assert response.json() == {'a': 1}
+    assert client.session.sent_headers[1]['If-None-Match'] == '"v1"'
+    assert client.http_cache.load(key)['stored_at'] >= stored_at
+
+
+def test_not_modified_without_entry_is_refetched(client):
+    # Сервер ответил 304, а сохраненного тела нет (файл кэша удален)
+    client.session = StubSession(make_response(304), make_response(200, {'ETag': '"v2"'}, b'[1, 2]'))
+    response = client.get(URL, cache=True)
+    assert response.json() == [1, 2]
+    assert len(client.session.sent_headers) == 2
+    assert 'If-None-Match' not in client.session.sent_headers[1]
+    assert client.http_cache.load(HttpCache.get_key('GET', URL, client.headers))['etag'] == '"v2"'
+
+
+def test_repeated_not_modified_without_entry_gives_up(client):
+    client.session = StubSession(make_response(304), make_response(304))
+    assert client.get(URL, cache=True) is None
+
+
+def test_response_without_validators_is_not_stored(client):
+    client.session = StubSession(make_response(200, content=b'{}'))
+    assert client.get(URL, cache=True).json() == {}
+    assert client.http_cache.load(HttpCache.get_key('GET', URL, client.headers)) is None
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from market_api_app import ozon, ozon_async
+from market_api_app.base_async import AsyncResponse
+from market_api_app.ozon import Ozon, split_dates
+from market_api_app.ozon_async import AsyncOzon
+
+
+def posting(number: str) -> dict:
+    return {'posting_number': number, 'status': 'delivered', 'products': []}
+
+
+class FakePages:
+    """get_orders_page по страницам окон {since: [страница, ...]}, None - запрос не выполнен"""
+
+    def __init__(self, windows: dict):
+        self.windows = windows
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def __call__(self, since: str, to: str, offset: int = 0, limit: int = 2):
+        with self.lock:
+            self.requested.append((since, offset))
+        return self.windows[since][offset // limit]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(ozon, 'ORDERS_PAGE_LIMIT', 2)
+    return Ozon('client-id', 'api-key')
+
+
+def test_windows_are_paged_and_deduplicated(client, monkeypatch):
+    first, second = (since for since, _ in split_dates('01-12-2024', '10-12-2024', 7))
+    pages = FakePages({
+        first: [{'postings': [posting('1'), posting('2')], 'has_next': True},
+                {'postings': [posting('3')], 'has_next': False}],
+        # Отправление 3 изменилось на границе окон и попало в оба
+        second: [{'postings': [posting('3'), posting('4')], 'has_next': True},
+                 {'postings': [], 'has_next': True}],
+    })
+    monkeypatch.setattr(client, 'get_orders_page', pages)
+
+    postings = client.get_orders('01-12-2024', '10-12-2024', window_days=7)
+    assert sorted(p['posting_number'] for p in postings) == ['1', '2', '3', '4']
+    assert sorted(pages.requested) == sorted([(first, 0), (first, 2), (second, 0), (second, 2)])
+
+
+def test_failed_page_raises(client, monkeypatch):
+    first, second = (since for since, _ in split_dates('01-12-2024', '10-12-2024', 7))
+    monkeypatch.setattr(client, 'get_orders_page', FakePages({
+        first: [{'postings': [posting('1'), posting('2')], 'has_next': True}, None],
+        second: [{'postings': [posting('3')], 'has_next': False}],
+    }))
+    with pytest.raises(RuntimeError, match='смещение 2'):
+        client.get_orders('01-12-2024', '10-12-2024', window_days=7)
+
+
+def test_async_windows_are_paged_deduplicated_and_failures_raised(monkeypatch):
+    monkeypatch.setattr(ozon_async, 'ORDERS_PAGE_LIMIT', 2)
+    first, second = (since for since, _ in split_dates('01-12-2024', '10-12-2024', 7))
+    pages = {
+        (first, 0): {'postings': [posting('1'), posting('2')], 'has_next': True},
+        (first, 2): {'postings': [posting('3')], 'has_next': False},
+        (second, 0): {'postings': [posting('3'), posting('4')], 'has_next': False},
+    }
+
+    async def post(url, data, cache=False, coalesce=False, mutating=False):
+        page = pages.get((data['filter']['since'], data['offset']))
+        if page is None:
+            return AsyncResponse(503, url, {}, b'')
+        return AsyncResponse(200, url, {}, json.dumps({'result': page}).encode())
+
+    client = AsyncOzon('client-id', 'api-key')
+    monkeypatch.setattr(client, 'post', post)
+    postings = asyncio.run(client.get_orders('01-12-2024', '10-12-2024', window_days=7))
+    assert sorted(p['posting_number'] for p in postings) == ['1', '2', '3', '4']
+
+    pages[(second, 0)]['has_next'] = True
+    with pytest.raises(RuntimeError, match='смещение 2'):
+        asyncio.run(client.get_orders('01-12-2024', '10-12-2024', window_days=7))
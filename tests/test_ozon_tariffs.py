@@ -0,0 +1,71 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from market_api_app.ozon_tariffs import OzonTariffSnapshot
+
+
+def price_item(offer_id: str, price: float) -> SimpleNamespace:
+    commissions = SimpleNamespace(fbs_deliv_to_customer_amount=25.0, fbs_direct_flow_trans_min_amount=10.0,
+                                  fbs_first_mile_max_amount=25.0, fbs_first_mile_min_amount=0.0,
+                                  fbs_return_flow_amount=50.0, fbs_return_flow_trans_max_amount=30.0,
+                                  fbs_return_flow_trans_min_amount=5.0, sales_percent_fbs=15.0)
+    return SimpleNamespace(offer_id=offer_id, acquiring=price * 0.015, commissions=commissions,
+                           price=SimpleNamespace(price=price, marketing_price=price, marketing_seller_price=price),
+                           volume_weight=1.5)
+
+
+class FakeOzon:
+    """iter_products(typed=True, strict=True) по страницам, fail_on - номер страницы, на которой каталог обрывается"""
+
+    def __init__(self, pages: list, fail_on: int | None = None):
+        self.headers = {'Client-Id': '42'}
+        self.pages = pages
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def iter_products(self, typed: bool = False, strict: bool = False):
+        assert typed and strict
+        self.calls += 1
+        for number, page in enumerate(self.pages):
+            if number == self.fail_on:
+                raise RuntimeError('Не удалось получить данные о товарах, список неполный.')
+            yield page
+
+
+PAGES = [[price_item('A', 500.0), price_item('B', 1500.0)], [price_item('C', 900.0)]]
+
+
+def test_fresh_snapshot_is_persisted_and_reused(tmp_path):
+    filename = str(tmp_path / 'tariffs.json')
+    client = FakeOzon(PAGES)
+    snapshot = OzonTariffSnapshot.load_or_fetch(client, filename)
+    assert snapshot.offer_ids == ['A', 'B', 'C']
+
+    cached = OzonTariffSnapshot.load_or_fetch(client, filename)
+    assert client.calls == 1
+    assert cached.offer_ids == ['A', 'B', 'C']
+    assert cached.get_offer('B') == snapshot.get_offer('B')
+
+
+def test_partial_catalog_falls_back_to_stale_snapshot(tmp_path):
+    filename = str(tmp_path / 'tariffs.json')
+    OzonTariffSnapshot.load_or_fetch(FakeOzon(PAGES[:1]), filename)
+    with open(filename, encoding='utf-8') as f:
+        stored = f.read()
+
+    # max_age_hours=0: сохраненный снимок устарел, каталог обрывается на второй странице
+    snapshot = OzonTariffSnapshot.load_or_fetch(FakeOzon(PAGES, fail_on=1), filename, max_age_hours=0)
+    assert snapshot.offer_ids == ['A', 'B']
+    with open(filename, encoding='utf-8') as f:
+        assert f.read() == stored
+    assert json.loads(stored)['data']['offer_ids'] == ['A', 'B']
+
+
+def test_partial_catalog_without_previous_snapshot_raises(tmp_path):
+    filename = str(tmp_path / 'tariffs.json')
+    with pytest.raises(RuntimeError):
+        OzonTariffSnapshot.load_or_fetch(FakeOzon(PAGES, fail_on=1), filename)
+    assert not os.path.exists(filename)
@@ -0,0 +1,69 @@
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from market_api_app import ratelimit
+from market_api_app.ratelimit import RateLimiter, TokenBucket
+
+
+def headers(values: dict) -> CaseInsensitiveDict:
+    # Заголовки ответа requests / aiohttp не зависят от регистра
+    return CaseInsensitiveDict(values)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_wb_headers_set_rate_and_block_until_reset(clock):
+    bucket = TokenBucket()
+    bucket.update(headers({'X-Ratelimit-Limit': '10', 'X-Ratelimit-Remaining': '4', 'X-Ratelimit-Reset': '3'}), 200)
+    assert bucket.capacity == 10
+    assert bucket.rate == pytest.approx(2.0)
+    assert bucket.tokens == 1.0
+
+    bucket.update(headers({'X-Ratelimit-Limit': '10', 'X-Ratelimit-Remaining': '0', 'X-Ratelimit-Reset': '5'}), 200)
+    assert bucket.tokens == 0
+    assert bucket.blocked_until == pytest.approx(1005.0)
+    assert bucket.reserve() == pytest.approx(5.0)
+
+
+def test_moysklad_headers_in_milliseconds(clock):
+    bucket = TokenBucket(rate=15.0, capacity=45)
+    bucket.update(headers({'X-RateLimit-Limit': '45', 'X-RateLimit-Remaining': '44',
+                           'X-Lognex-Retry-TimeInterval': '3000'}), 200)
+    assert bucket.rate == pytest.approx(15.0)
+    assert bucket.capacity == 45
+    assert bucket.tokens == 44
+
+    bucket.update(headers({'X-Lognex-Retry-After': '1500'}), 429)
+    assert bucket.tokens <= 0
+    assert bucket.blocked_until == pytest.approx(1001.5)
+
+
+def test_429_without_headers_blocks_for_a_second(clock):
+    bucket = TokenBucket()
+    bucket.update(headers({'Retry-After': 'soon'}), 429)
+    assert bucket.blocked_until == pytest.approx(1001.0)
+    clock[0] += 1.0
+    assert bucket.reserve() == 0.0
+
+
+def test_unknown_quota_is_not_throttled(clock):
+    bucket = TokenBucket()
+    bucket.update(headers({}), 200)
+    assert bucket.rate is None
+    assert all(bucket.reserve() == 0.0 for _ in range(100))
+
+
+def test_buckets_per_host_and_token():
+    limiter = RateLimiter(defaults={'api.example.com': (2.0, 4)})
+    first = limiter.get_bucket('https://api.example.com/a', {'Authorization': 'one'})
+    assert limiter.get_bucket('https://api.example.com/b', {'Authorization': 'one'}) is first
+    assert limiter.get_bucket('https://api.example.com/a', {'Authorization': 'two'}) is not first
+    assert (first.rate, first.capacity) == (2.0, 4)
+
+    limiter.configure('api.example.com', 1.0, 2)
+    assert (first.rate, first.capacity) == (1.0, 2)
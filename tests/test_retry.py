@@ -0,0 +1,113 @@
+import time
+
+import pytest
+import requests
+
+from market_api_app.base import ApiBase
+from market_api_app.circuit import circuit_breakers
+from market_api_app.ratelimit import RateLimiter
+from market_api_app.retry import RetryPolicy
+
+URL = 'https://api.example.com/v1/items'
+
+
+def make_response(status_code: int, headers: dict | None = None, content: bytes = b'{}') -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response.url = URL
+    response._content = content
+    return response
+
+
+class StubSession:
+    """Отдает заранее заданные ответы (или исключения) по очереди"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Задержки time.sleep без ожидания: часы time.monotonic сдвигаются на время задержки"""
+    delays = []
+    now = [1000.0]
+
+    def sleep(delay):
+        delays.append(delay)
+        now[0] += delay
+
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(time, 'sleep', sleep)
+    circuit_breakers.reset()
+    yield delays
+    circuit_breakers.reset()
+
+
+def make_client(policy: RetryPolicy, *responses) -> ApiBase:
+    client = ApiBase(retry_policy=policy)
+    client.rate_limiter = RateLimiter(defaults={})
+    client.session = StubSession(*responses)
+    return client
+
+
+def test_retry_after_header_is_honoured():
+    policy = RetryPolicy(max_delay=1.0)
+    assert policy.get_delay(0, make_response(429, {'Retry-After': '5'})) == 5.0
+    assert policy.get_delay(0, make_response(429, {'X-Ratelimit-Retry': '2'})) == 2.0
+    assert policy.get_delay(0, make_response(429, {'X-Lognex-Retry-After': '1500'})) == 1.5
+    assert policy.get_delay(0, make_response(429, {'Retry-After': '-3'})) == 0.0
+    assert policy.get_delay(0, make_response(429)) == 1.0
+
+
+def test_backoff_is_capped_by_max_delay():
+    policy = RetryPolicy(max_delay=4.0, base_delay=1.0, jitter=0.5)
+    for attempt in range(10):
+        delay = policy.get_delay(attempt, make_response(503))
+        cap = min(4.0, 2 ** attempt)
+        assert cap / 2 <= delay <= cap
+
+
+def test_retries_transient_errors(sleeps):
+    client = make_client(RetryPolicy(max_retries=3, jitter=0),
+                         requests.ConnectionError('reset'), make_response(503), make_response(200))
+    assert client.get(URL).status_code == 200
+    assert client.session.calls == 3
+    assert sleeps == [1.0, 2.0]
+
+
+def test_client_errors_are_not_retried(sleeps):
+    client = make_client(RetryPolicy(max_retries=3), make_response(400), make_response(200))
+    assert client.get(URL) is None
+    assert client.session.calls == 1
+    assert sleeps == []
+
+
+def test_retry_after_within_deadline_is_waited(sleeps):
+    client = make_client(RetryPolicy(max_retries=2, max_delay=1.0, deadline=10.0),
+                         make_response(429, {'Retry-After': '3'}), make_response(200))
+    assert client.get(URL).status_code == 200
+    assert sleeps == [3.0]
+
+
+def test_deadline_stops_retries(sleeps):
+    client = make_client(RetryPolicy(max_retries=5, deadline=10.0),
+                         make_response(429, {'Retry-After': '30'}), make_response(200))
+    assert client.get(URL) is None
+    assert client.session.calls == 1
+    assert sleeps == []
+
+
+def test_per_request_policy(sleeps):
+    client = make_client(RetryPolicy(max_retries=1), make_response(503), make_response(200))
+    response = client.get(URL, retry_policy=RetryPolicy(max_retries=2, jitter=0))
+    assert response.status_code == 200
+    assert sleeps == [1.0]
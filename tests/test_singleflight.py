@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from market_api_app import singleflight
+from market_api_app.base import ApiBase
+from market_api_app.singleflight import SingleFlight
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(singleflight.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_result_is_shared_for_ttl(clock):
+    flight = SingleFlight()
+    calls = []
+
+    def func():
+        calls.append(1)
+        return len(calls)
+
+    assert flight.do('key', func, ttl=10) == 1
+    clock[0] += 9
+    assert flight.do('key', func, ttl=10) == 1
+    clock[0] += 1
+    assert flight.do('key', func, ttl=10) == 2
+    assert flight.do('other', func, ttl=10) == 3
+
+
+def test_failed_result_is_not_stored(clock):
+    flight = SingleFlight()
+    results = [None, 'ok']
+    assert flight.do('key', lambda: results.pop(0), ttl=10) is None
+    assert flight.do('key', lambda: results.pop(0), ttl=10) == 'ok'
+
+
+def test_exception_reaches_waiting_calls_and_is_not_stored():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait(5)
+        # Ожидающий вызов успевает подписаться на результат
+        time.sleep(0.05)
+        raise ValueError('boom')
+
+    def waiter():
+        release.set()
+        try:
+            flight.do('key', lambda: 'own call', ttl=10)
+        except ValueError as e:
+            errors.append(e)
+
+    owner = threading.Thread(target=lambda: pytest.raises(ValueError, flight.do, 'key', failing, 10))
+    owner.start()
+    started.wait(5)
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    owner.join(5)
+    thread.join(5)
+
+    assert [str(e) for e in errors] == ['boom']
+    assert flight.do('key', lambda: 'retry', ttl=10) == 'retry'
+
+
+def test_clear_drops_finished_results(clock):
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 'first', ttl=10) == 'first'
+    flight.clear()
+    assert flight.do('key', lambda: 'second', ttl=10) == 'second'
+
+
+def test_async_calls_are_coalesced_and_errors_propagated():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'data'
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    async def main():
+        results = await asyncio.gather(*(flight.do_async('key', fetch, 10) for _ in range(5)))
+        errors = await asyncio.gather(*(flight.do_async('err', fail, 10) for _ in range(3)), return_exceptions=True)
+        return results, errors
+
+    results, errors = asyncio.run(main())
+    assert results == ['data'] * 5
+    assert calls == [1]
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert 'err' not in flight._async_calls
+
+
+def test_only_mutating_requests_invalidate(monkeypatch):
+    flight = SingleFlight()
+    monkeypatch.setattr(ApiBase, 'single_flight', flight)
+    client = ApiBase()
+    sent = []
+
+    def send(func, url, cache=False, **kwargs):
+        sent.append(func.__name__)
+        return f'response {len(sent)}'
+
+    monkeypatch.setattr(client, 'send', send)
+    url = 'https://api.example.com/v1/list'
+    assert client.post(url, {'page': 1}, coalesce=True) == 'response 1'
+    client.post('https://api.example.com/v1/report', {})
+    assert client.post(url, {'page': 1}, coalesce=True) == 'response 1'
+    client.post('https://api.example.com/v1/create', {}, mutating=True)
+    assert client.post(url, {'page': 1}, coalesce=True) == 'response 4'
+    client.put('https://api.example.com/v1/item', {})
+    assert client.post(url, {'page': 1}, coalesce=True) == 'response 6'
+    assert sent == ['_post', '_post', '_post', '_post', '_put', '_post']
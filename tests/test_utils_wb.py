@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from market_api_app.utils_wb import get_logistic_dict, get_logistics_new, get_order_data, get_orders_report_frame
+from market_api_app.wb_orders import FbsOrderIndex
+from market_api_app.wb_tariffs import DEFAULT_WAREHOUSE
+
+WAREHOUSES = [DEFAULT_WAREHOUSE, 'Коледино', 'Электросталь', 'Казань']
+# Склада нет в тарифах: логистика по DEFAULT_WAREHOUSE
+UNKNOWN_WAREHOUSE = 'Тула'
+CATEGORIES = {'Игрушки': [25.0, 22.5], 'Посуда': [19.5, 17.0]}
+REPORT_COLUMNS = ['discount', 'price', 'order_price', 'recommended_price', 'prime_cost', 'commission', 'acquiring',
+                  'logistics', 'profit', 'profitability', 'order_profit', 'order_profitability']
+
+
+def make_base_dict(rnd: random.Random) -> dict:
+    warehouse_list = [
+        {
+            'warehouseName': name,
+            'boxDeliveryBase': f'{rnd.uniform(30, 80):.2f}'.replace('.', ','),
+            'boxDeliveryLiter': f'{rnd.uniform(5, 20):.2f}'.replace('.', ','),
+            'boxDeliveryCoefExpr': str(rnd.choice([100, 125, 150, 205])),
+            'boxDeliveryMarketplaceBase': '46', 'boxDeliveryMarketplaceLiter': '14',
+            'boxDeliveryMarketplaceCoefExpr': '100',
+        }
+        for name in WAREHOUSES
+    ]
+    return {
+        'tariffs_data': {'response': {'data': {'warehouseList': warehouse_list}}},
+        'category_dict': CATEGORIES,
+        'wb_prices_dict': {nm_id: {'price': rnd.choice([0, round(rnd.uniform(100, 5000), 2)]),
+                                   'discount': rnd.choice([0, rnd.randint(5, 60)])}
+                           for nm_id in range(1, 41)},
+    }
+
+
+def make_products(rnd: random.Random) -> dict:
+    # nmId 36-40 нет в МойСклад
+    return {
+        nm_id: {
+            'NAME': f'Товар {nm_id}', 'ARTICLE': f'A-{nm_id}', 'STOCK': float(rnd.randint(0, 50)),
+            'STOCK_FBS': rnd.randint(0, 20), 'STOCK_FBO': rnd.randint(0, 20),
+            'PRIME_COST': round(rnd.uniform(50, 2000), 2),
+            'CATEGORY': rnd.choice(list(CATEGORIES) + ['Без категории']),
+            'VOLUME': round(rnd.uniform(0.05, 6.0), 3),
+        }
+        for nm_id in range(1, 36)
+    }
+
+
+def make_orders(rnd: random.Random, count: int) -> list:
+    return [
+        {
+            'srid': f'srid-{i}', 'date': f'2025-01-{i % 28 + 1:02d}T10:00:00', 'sticker': str(1000 + i),
+            'nmId': rnd.randint(1, 40), 'warehouseName': rnd.choice(WAREHOUSES + ['', UNKNOWN_WAREHOUSE]),
+            # Цены с половинками на границе округления проверяют совпадение с round()
+            'finishedPrice': rnd.choice([round(rnd.uniform(100, 5000), 2), rnd.randint(100, 5000) + 0.05,
+                                         rnd.randint(100, 5000) + 0.25]),
+            'discountPercent': rnd.randint(0, 70), 'isCancel': False,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_orders_report_frame_matches_get_order_data(seed):
+    rnd = random.Random(seed)
+    base_dict, products, orders = make_base_dict(rnd), make_products(rnd), make_orders(rnd, 331)
+    fbs_index = FbsOrderIndex()
+    fbs_index.add([{'rid': order['srid']} for order in orders if rnd.random() < 0.4])
+
+    report, not_in_ms = get_orders_report_frame(fbs_index.to_frame(orders), products, base_dict, plan_margin=28.0,
+                                                acquiring=2.0)
+
+    expected = [
+        get_order_data(order, products[order['nmId']], base_dict, plan_margin=28.0, acquiring=2.0,
+                       fbs=order['srid'] in fbs_index)
+        for order in orders if order['nmId'] in products
+    ]
+    assert not_in_ms == [order['nmId'] for order in orders if order['nmId'] not in products]
+    assert len(report) == len(expected)
+    for row, data in zip(report.to_dict('records'), expected):
+        assert row['order_name'] == data['order_name']
+        for column in REPORT_COLUMNS:
+            assert row[column] == pytest.approx(data[column], abs=1e-9), (data['order_name'], column)
+
+
+def get_baseline_logistics(order: dict, product: dict, base_dict: dict, fbs: bool) -> float:
+    """Логистика заказа по исходным get_logistic_dict и get_logistics_new"""
+    warehouse_name = DEFAULT_WAREHOUSE if fbs else order.get('warehouseName') or DEFAULT_WAREHOUSE
+    tariff = get_logistic_dict(base_dict['tariffs_data'], warehouse_name, fbs)
+    return get_logistics_new(ktr=tariff['KTR'], logistics_coefficient=tariff['LOGISTICS_COEFFICIENT'],
+                             logistics_first_liter=tariff['LOGISTICS_FIRST_LITER'],
+                             logistics_extra_liter=tariff['LOGISTICS_EXTRA_LITER'], volume=product['VOLUME'])
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_orders_logistics_match_baseline_tariffs(seed):
+    rnd = random.Random(seed)
+    base_dict, products, orders = make_base_dict(rnd), make_products(rnd), make_orders(rnd, 331)
+    fbs_index = FbsOrderIndex()
+    fbs_index.add([{'rid': order['srid']} for order in orders if rnd.random() < 0.4])
+    orders = [order for order in orders if order['nmId'] in products]
+
+    report, _ = get_orders_report_frame(fbs_index.to_frame(orders), products, base_dict, plan_margin=28.0,
+                                        acquiring=2.0)
+
+    for row, order in zip(report.to_dict('records'), orders):
+        fbs = order['srid'] in fbs_index
+        expected = get_baseline_logistics(order, products[order['nmId']], base_dict, fbs)
+        data = get_order_data(order, products[order['nmId']], base_dict, plan_margin=28.0, acquiring=2.0, fbs=fbs)
+        assert data['logistics'] == pytest.approx(expected, abs=1e-9), order['srid']
+        assert row['logistics'] == pytest.approx(expected, abs=1e-9), order['srid']
@@ -0,0 +1,74 @@
+import pytest
+
+from market_api_app import wb_orders
+from market_api_app.wb_orders import WbOrderStore
+
+
+class FakeStatistics:
+    """get_order_changes по заданному списку страниц, None - неудачный запрос"""
+
+    def __init__(self, *pages):
+        self.pages = list(pages)
+        self.requested = []
+
+    def get_order_changes(self, date_from: str):
+        self.requested.append(date_from)
+        return self.pages.pop(0)
+
+
+def order(srid: str, date: str, last_change_date: str) -> dict:
+    return {'srid': srid, 'date': date, 'lastChangeDate': last_change_date}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(wb_orders, 'ORDERS_PAGE_LIMIT', 2)
+    return WbOrderStore(str(tmp_path / 'orders.sqlite3'))
+
+
+def test_full_pages_are_continued_from_last_change(store):
+    client = FakeStatistics(
+        [order('a', '2024-12-01', '2024-12-01T10:00:00'), order('b', '2024-12-02', '2024-12-02T10:00:00')],
+        [order('b', '2024-12-02', '2024-12-03T09:00:00'), order('c', '2024-12-03', '2024-12-03T10:00:00')],
+        [order('d', '2024-12-04', '2024-12-04T10:00:00')],
+    )
+    assert store.sync(client, '2024-12-01') == 5
+    assert client.requested == ['2024-12-01', '2024-12-02T10:00:00', '2024-12-03T10:00:00']
+    assert store.watermark == '2024-12-04T10:00:00'
+    assert store.synced_from == '2024-12-01'
+    assert [o['srid'] for o in store.get_orders('2024-12-01', '2024-12-04')] == ['a', 'b', 'c', 'd']
+    assert store.get_orders('2024-12-02', '2024-12-02')[0]['lastChangeDate'] == '2024-12-03T09:00:00'
+
+
+def test_failed_request_resumes_from_watermark(store):
+    client = FakeStatistics(
+        [order('a', '2024-12-01', '2024-12-01T10:00:00'), order('b', '2024-12-02', '2024-12-02T10:00:00')],
+        None,
+        [order('c', '2024-12-03', '2024-12-03T10:00:00')],
+    )
+    assert store.sync(client, '2024-12-01') == 2
+    assert store.synced_from is None
+    assert store.watermark == '2024-12-02T10:00:00'
+
+    assert store.sync(client, '2024-12-01') == 1
+    assert client.requested == ['2024-12-01', '2024-12-02T10:00:00', '2024-12-02T10:00:00']
+    assert store.synced_from == '2024-12-01'
+    assert len(store.get_orders('2024-12-01', '2024-12-31')) == 3
+
+
+def test_synced_range_is_extended_to_earlier_date(store):
+    client = FakeStatistics(
+        [order('b', '2024-12-10', '2024-12-10T10:00:00')],
+        [],
+        [order('a', '2024-12-01', '2024-12-01T10:00:00')],
+    )
+    store.sync(client, '2024-12-10')
+    # Период внутри синхронизированного диапазона: запрос только новых изменений
+    store.sync(client, '2024-12-15')
+    assert client.requested == ['2024-12-10', '2024-12-10T10:00:00']
+    assert store.synced_from == '2024-12-10'
+
+    store.sync(client, '2024-12-01')
+    assert client.requested[-1] == '2024-12-01'
+    assert store.synced_from == '2024-12-01'
+    assert [o['srid'] for o in store.get_orders('2024-12-01', '2024-12-31')] == ['a', 'b']
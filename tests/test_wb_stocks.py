@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from market_api_app.wb_stocks import WbStocksReport
+
+
+class FakeAnalytics:
+    """get_stocks_report_page по каталогу nmID, fail - сколько раз не отвечает страница
+    {(начало периода, nmID первого товара страницы): количество}"""
+
+    def __init__(self, nm_ids: list, fail: dict | None = None):
+        self.nm_ids = nm_ids
+        self.fail = dict(fail or {})
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def get_stocks_report_page(self, from_date, to_date, nm_ids=None, offset=0, limit=1000):
+        rows = nm_ids or self.nm_ids
+        page = rows[offset:offset + limit]
+        key = (from_date, page[0] if page else None)
+        with self.lock:
+            self.requests.append((*key, offset))
+            if self.fail.get(key, 0) > 0:
+                self.fail[key] -= 1
+                return None
+        return [{'nmID': nm_id, 'metrics': {'stockCount': nm_id, 'period': from_date}} for nm_id in page]
+
+
+def test_chunks_and_periods_are_merged():
+    client = FakeAnalytics(list(range(1, 8)))
+    report = WbStocksReport(client, chunk_size=3)
+    stocks = report.fetch('2025-11-01', '2025-11-04', nm_ids=list(range(1, 8)), period_days=2)
+    assert sorted(stocks) == list(range(1, 8))
+    assert stocks[5] == {'2025-11-01': {'stockCount': 5, 'period': '2025-11-01'},
+                         '2025-11-03': {'stockCount': 5, 'period': '2025-11-03'}}
+    # 3 части по 2 отрезка, каждая - одна страница
+    assert len(client.requests) == 6
+
+
+def test_whole_assortment_is_paged_by_offset():
+    client = FakeAnalytics(list(range(1, 8)))
+    stocks = WbStocksReport(client, chunk_size=3).fetch('2025-11-01', '2025-11-01')
+    assert sorted(stocks) == list(range(1, 8))
+    assert [offset for _, _, offset in client.requests] == [0, 3, 6]
+
+
+def test_failed_unit_is_retried():
+    client = FakeAnalytics(list(range(1, 8)), fail={('2025-11-01', 4): 1})
+    stocks = WbStocksReport(client, chunk_size=3).fetch('2025-11-01', '2025-11-01')
+    assert sorted(stocks) == list(range(1, 8))
+    assert [offset for _, _, offset in client.requests] == [0, 3, 0, 3, 6]
+
+
+def test_unit_failed_after_retries_raises():
+    client = FakeAnalytics(list(range(1, 8)), fail={('2025-11-01', 1): 5})
+    report = WbStocksReport(client, chunk_size=3, retry_rounds=2)
+    with pytest.raises(RuntimeError):
+        report.fetch('2025-11-01', '2025-11-01', nm_ids=list(range(1, 8)))
+    assert sum(1 for request in client.requests if request[1] == 1) == 3
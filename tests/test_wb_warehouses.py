@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+import requests
+
+from market_api_app.base import ApiBase
+from market_api_app.circuit import circuit_breakers
+from market_api_app.http_cache import HttpCache
+from market_api_app.wb_warehouses import WAREHOUSES_HEADERS, WAREHOUSES_URL, WbWarehouseDirectory
+
+WAREHOUSES = [{'id': 507, 'name': 'Коледино'}, {'id': 119261, 'name': 'Подольск'}, {'name': 'Без id'}]
+
+
+def make_response(status_code: int, content: bytes = b'') -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers['ETag'] = '"v1"'
+    response.url = WAREHOUSES_URL
+    response._content = content
+    return response
+
+
+class StubSession:
+    """Сессия всех клиентов теста: ответ 200 без условных заголовков, иначе 304"""
+
+    def __init__(self):
+        self.sent_headers = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.sent_headers.append(dict(headers))
+        if 'If-None-Match' in headers:
+            return make_response(304)
+        return make_response(200, json.dumps(WAREHOUSES).encode())
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = StubSession()
+    monkeypatch.setattr(ApiBase, 'create_session', staticmethod(lambda *args, **kwargs: session))
+    circuit_breakers.reset()
+    return session
+
+
+def test_directories_share_disk_cache(tmp_path, session):
+    first = WbWarehouseDirectory(cache_dir=str(tmp_path))
+    assert first.name(507) == 'Коледино'
+    second = WbWarehouseDirectory(cache_dir=str(tmp_path))
+    assert second.name(119261) == 'Подольск'
+    assert second.name(1) == 'FBO'
+    assert len(session.sent_headers) == 1
+    assert session.sent_headers[0]['User-Agent'] == WAREHOUSES_HEADERS['User-Agent']
+
+
+def test_not_modified_extends_cache(tmp_path, session):
+    WbWarehouseDirectory(cache_dir=str(tmp_path)).warehouses
+    key = HttpCache.get_key('GET', WAREHOUSES_URL, WAREHOUSES_HEADERS)
+    meta_path = os.path.join(str(tmp_path), f'{key}.json')
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    meta['stored_at'] -= 2 * 24 * 60 * 60
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+    expired = WbWarehouseDirectory(cache_dir=str(tmp_path))
+    assert expired.warehouses == WAREHOUSES
+    assert session.sent_headers[-1]['If-None-Match'] == '"v1"'
+    assert len(session.sent_headers) == 2
+
+    assert WbWarehouseDirectory(cache_dir=str(tmp_path)).warehouses == WAREHOUSES
+    assert len(session.sent_headers) == 2
+
+
+def test_index_is_immutable_and_fbs_ids_configurable(tmp_path, session):
+    directory = WbWarehouseDirectory(cache_dir=str(tmp_path), fbs_ids=[507])
+    assert set(directory.index) == {507, 119261}
+    with pytest.raises(TypeError):
+        directory.index[1] = {}
+    assert directory.is_fbs(507)
+    assert not directory.is_fbs(119261)
+    assert WbWarehouseDirectory(cache_dir=None).is_fbs(119261)